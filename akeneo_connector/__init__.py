@@ -1,4 +1,18 @@
 from .akeneo_connector import AkeneoConnector
 from .akeneo_paginator import AkeneoPaginator
 from .akeneo_product import AkeneoProduct
-from .akeneo_attribute import AkeneoAttribute
\ No newline at end of file
+from .akeneo_attribute import AkeneoAttribute
+from .akeneo_search import AkeneoSearch
+from .akeneo_exporter import AkeneoExporter
+from .akeneo_crawler import AkeneoCrawler, CrawlShard
+from .akeneo_transport import AkeneoTransport, RequestsTransport, Http2Transport, MemoryTransport, RecordReplayTransport
+from .akeneo_parallel import map_products, imap_products, MapResult
+from .akeneo_catalog import AkeneoCatalog
+from .akeneo_product_model import AkeneoProductModel, AkeneoModelCache
+from .akeneo_reconcile import AkeneoReconciler, FingerprintStore, ReconcileReport
+from .akeneo_resilience import HedgedTransport, CircuitBreakerTransport, CircuitOpenError
+from .akeneo_events import AkeneoEventReceiver, AkeneoEventSimulator, EventBatch
+from .akeneo_category import AkeneoCategoryTree
+from .akeneo_resilience import RateLimitedTransport
+from .akeneo_pool import AkeneoConnectorPool
+from .akeneo_writer import AkeneoBulkWriter
\ No newline at end of file
@@ -0,0 +1,5 @@
+import sys
+
+from akeneo_connector.cli import main
+
+sys.exit(main())
@@ -0,0 +1,308 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from akeneo_connector.akeneo_checkpoint import read_json, write_json_atomic
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_options import AkeneoOptionCache
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+
+class AkeneoCatalog:
+    """
+    The AkeneoCatalog class loads the structure of the catalog (families, attributes,
+    attribute options, channels, locales and categories) and keeps it in memory,
+    indexed by code.
+
+    All lists are fetched concurrently with the paginator, followed by the options
+    of every select attribute. The catalog can be saved to and loaded from a
+    snapshot file, so workers start with a warm catalog.
+
+    Attributes:
+        connector (AkeneoConnector): The Akeneo connector to use.
+        workers (int): The number of lists fetched at the same time.
+        page_size (int): The number of items per page.
+        families (dict): The families by code.
+        attributes (dict): The attributes by code.
+        options (dict): The options by code, by attribute code.
+        channels (dict): The channels by code.
+        locales (dict): The locales by code.
+        categories (dict): The categories by code.
+        loaded_at (float): The time the catalog was loaded from Akeneo. None if not loaded.
+        load_seconds (float): The seconds it took to load the catalog.
+    """
+    RESOURCES = ['families', 'attributes', 'channels', 'locales', 'categories']
+    SELECT_TYPES = AkeneoOptionCache.SELECT_TYPES
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, connector: AkeneoConnector | None = None, workers: int = 8, page_size: int = 100):
+        """
+        Initializes an instance of the AkeneoCatalog class.
+
+        Args:
+            connector (AkeneoConnector): The Akeneo connector to use.
+            workers (int): The number of lists fetched at the same time.
+            page_size (int): The number of items per page (1 to 100).
+        """
+        if connector is None:
+            self.connector = AkeneoConnector()
+        else:
+            self.connector = connector
+
+        self.workers = workers
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Empties the catalog.
+        """
+        self.families = {}
+        self.attributes = {}
+        self.options = {}
+        self.channels = {}
+        self.locales = {}
+        self.categories = {}
+        self.loaded_at = None
+        self.load_seconds = None
+
+    def fetch(self, url: str) -> dict:
+        """
+        Fetches all items of a list.
+
+        Args:
+            url (str): The URL of the list.
+
+        Returns:
+            dict: The items by code.
+        """
+        paginator = AkeneoPaginator(url, page_size=self.page_size, connector=self.connector)
+        return {item['code']: item for item in paginator}
+
+    def load(self, resources: list[str] | None = None, options: bool = True):
+        """
+        Loads the catalog from Akeneo, fetching all lists concurrently.
+
+        Args:
+            resources (list): The lists to load: 'families', 'attributes', 'channels', 'locales' and/or 'categories'. All if None.
+            options (bool): Whether to load the options of the select attributes.
+
+        Returns:
+            AkeneoCatalog: The catalog itself.
+        """
+        resources = self.RESOURCES if resources is None else resources
+        for resource in resources:
+            if resource not in self.RESOURCES:
+                raise ValueError(f"Invalid resource: {resource}. Choose one of {', '.join(self.RESOURCES)}.")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='akeneo-catalog') as executor:
+            # Fetch every list in one burst
+            futures = {resource: executor.submit(self.fetch, getattr(self.connector, f"{resource}_url")) for resource in resources}
+            for resource, future in futures.items():
+                setattr(self, resource, future.result())
+
+        # Then the options of every select attribute, which need the attributes
+        if options and 'attributes' in resources:
+            cache = self.option_cache()
+            cache.update_types({code: attribute.get('type') for code, attribute in self.attributes.items()})
+            self.options = cache.load_selects(workers=self.workers).options
+
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - started
+        return self
+
+    def option_cache(self) -> AkeneoOptionCache:
+        """
+        Creates an empty option cache that loads options with the connector and page size of the catalog.
+
+        Returns:
+            AkeneoOptionCache: The option cache.
+        """
+        return AkeneoOptionCache(self.connector, page_size=self.page_size)
+
+    def load_options(self, attribute: str) -> dict:
+        """
+        Loads the options of an attribute, unless they are already loaded.
+
+        Args:
+            attribute (str): The code of the attribute.
+
+        Returns:
+            dict: The options by code.
+        """
+        with self.lock:
+            if attribute in self.options:
+                return self.options[attribute]
+
+        options = self.option_cache().load([attribute], workers=1).options[attribute]
+        with self.lock:
+            self.options[attribute] = options
+        return options
+
+    def family(self, code: str) -> dict | None:
+        """
+        Gets a family.
+
+        Args:
+            code (str): The code of the family.
+
+        Returns:
+            dict: The family. None if not found.
+        """
+        return self.families.get(code)
+
+    def attribute(self, code: str) -> dict | None:
+        """
+        Gets an attribute.
+
+        Args:
+            code (str): The code of the attribute.
+
+        Returns:
+            dict: The attribute. None if not found.
+        """
+        return self.attributes.get(code)
+
+    def option(self, attribute: str, code: str) -> dict | None:
+        """
+        Gets an attribute option.
+
+        Args:
+            attribute (str): The code of the attribute.
+            code (str): The code of the option.
+
+        Returns:
+            dict: The option. None if not found.
+        """
+        return self.options.get(attribute, {}).get(code)
+
+    def attribute_label(self, code: str, locale: str | None = None) -> str:
+        """
+        Gets the label of an attribute.
+
+        Args:
+            code (str): The code of the attribute.
+            locale (str): The locale of the label.
+
+        Returns:
+            str: The label. The code if there is no label for the locale.
+        """
+        return ((self.attributes.get(code) or {}).get('labels') or {}).get(locale) or code
+
+    def option_label(self, attribute: str, code: str, locale: str | None = None) -> str:
+        """
+        Gets the label of an attribute option.
+
+        Args:
+            attribute (str): The code of the attribute.
+            code (str): The code of the option.
+            locale (str): The locale of the label.
+
+        Returns:
+            str: The label. The code if there is no label for the locale.
+        """
+        return ((self.option(attribute, code) or {}).get('labels') or {}).get(locale) or code
+
+    def family_attributes(self, code: str) -> list[dict]:
+        """
+        Gets the attributes of a family.
+
+        Args:
+            code (str): The code of the family.
+
+        Returns:
+            list: The attributes. Empty if the family is not found.
+        """
+        family = self.families.get(code) or {}
+        return [self.attributes[attribute] for attribute in family.get('attributes', []) if attribute in self.attributes]
+
+    def channel_locales(self, code: str) -> list[str]:
+        """
+        Gets the locales of a channel.
+
+        Args:
+            code (str): The code of the channel.
+
+        Returns:
+            list: The locale codes. Empty if the channel is not found.
+        """
+        return (self.channels.get(code) or {}).get('locales', [])
+
+    def enabled_locales(self) -> list[str]:
+        """
+        Gets the enabled locales.
+
+        Returns:
+            list: The codes of the enabled locales.
+        """
+        return [code for code, locale in self.locales.items() if locale.get('enabled')]
+
+    def to_dict(self) -> dict:
+        """
+        Returns the catalog as a dictionary.
+
+        Returns:
+            dict: The catalog.
+        """
+        return {
+            'version': self.SNAPSHOT_VERSION,
+            'origin': self.connector.origin,
+            'loaded_at': self.loaded_at,
+            'families': self.families,
+            'attributes': self.attributes,
+            'options': self.options,
+            'channels': self.channels,
+            'locales': self.locales,
+            'categories': self.categories,
+        }
+
+    def save(self, path: str):
+        """
+        Atomically saves the catalog to a snapshot file.
+
+        Args:
+            path (str): The path of the snapshot.
+        """
+        write_json_atomic(path, self.to_dict())
+
+    def restore(self, path: str, max_age: float | None = None) -> bool:
+        """
+        Loads the catalog from a snapshot file.
+
+        Args:
+            path (str): The path of the snapshot.
+            max_age (float): The maximum age of the snapshot in seconds. Any age if None.
+
+        Returns:
+            bool: True if the snapshot was loaded, False if it is missing, outdated or of another instance.
+        """
+        snapshot = read_json(path)
+        if snapshot is None or snapshot.get('version') != self.SNAPSHOT_VERSION or snapshot.get('origin') != self.connector.origin:
+            return False
+
+        loaded_at = snapshot.get('loaded_at') or 0
+        if max_age is not None and time.time() - loaded_at > max_age:
+            return False
+
+        for resource in self.RESOURCES + ['options']:
+            setattr(self, resource, snapshot.get(resource) or {})
+        self.loaded_at = loaded_at
+        return True
+
+    def warm(self, path: str, max_age: float | None = 3600):
+        """
+        Loads the catalog from a snapshot file if it is fresh enough, and from Akeneo otherwise, saving a new snapshot.
+
+        Args:
+            path (str): The path of the snapshot.
+            max_age (float): The maximum age of the snapshot in seconds. Any age if None.
+
+        Returns:
+            AkeneoCatalog: The catalog itself.
+        """
+        if not self.restore(path, max_age=max_age):
+            self.load()
+            self.save(path)
+        return self
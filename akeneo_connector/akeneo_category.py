@@ -0,0 +1,307 @@
+from typing import Iterable
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_product import AkeneoProduct
+from akeneo_connector.akeneo_json import collection_results
+from akeneo_connector.akeneo_search import AkeneoSearch
+
+
+class AkeneoCategoryTree:
+    """
+    The AkeneoCategoryTree class keeps the category trees in memory, with the
+    ancestors and descendants of every category computed once when loading.
+
+    Subtree searches are built from the descendants index, and products are moved
+    between categories in bulk with collection PATCH requests instead of one
+    update per product.
+
+    Attributes:
+        connector (AkeneoConnector): The Akeneo connector to use.
+        categories (dict): The categories by code.
+        parents (dict): The parent code by category code. None for roots.
+        children (dict): The child codes by category code.
+        roots (list): The codes of the root categories (the trees).
+        max_codes (int): The maximum number of codes in an `IN` filter, above which `IN CHILDREN` is used.
+    """
+
+    def __init__(self, connector: AkeneoConnector | None = None, catalog = None, max_codes: int = 500):
+        """
+        Initializes an instance of the AkeneoCategoryTree class.
+
+        Args:
+            connector (AkeneoConnector): The Akeneo connector to use. The catalog's connector, or a new one, if None.
+            catalog (AkeneoCatalog): A loaded catalog to take the categories from, instead of fetching them.
+            max_codes (int): The maximum number of codes in an `IN` filter, above which `IN CHILDREN` is used.
+        """
+        if connector is None:
+            connector = catalog.connector if catalog is not None else AkeneoConnector()
+
+        self.connector = connector
+        self.max_codes = max_codes
+        self.build(catalog.categories if catalog is not None else {})
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __contains__(self, code: str):
+        return code in self.categories
+
+    def load(self):
+        """
+        Fetches all categories from Akeneo and builds the indexes.
+
+        Returns:
+            AkeneoCategoryTree: The tree itself.
+        """
+        paginator = AkeneoPaginator(self.connector.categories_url, page_size=100, connector=self.connector)
+        self.build({category['code']: category for category in paginator})
+        return self
+
+    def build(self, categories: dict):
+        """
+        Builds the parent, children, ancestor and descendant indexes.
+
+        Args:
+            categories (dict): The categories by code.
+        """
+        self.categories = categories
+        self.parents = {code: category.get('parent') for code, category in categories.items()}
+        self.children = {code: [] for code in categories}
+        self.roots = []
+        for code, parent in self.parents.items():
+            # Categories whose parent is unknown are treated as roots
+            if parent in self.children:
+                self.children[parent].append(code)
+            else:
+                self.roots.append(code)
+
+        # Walk every tree from its root, so ancestors are known before their children
+        self.ancestor_index = {}
+        order = []
+        stack = [(root, ()) for root in reversed(self.roots)]
+        while stack:
+            code, ancestors = stack.pop()
+            if code in self.ancestor_index:
+                continue
+            self.ancestor_index[code] = ancestors
+            order.append(code)
+            stack.extend((child, ancestors + (code,)) for child in reversed(self.children[code]))
+
+        # Then collect the descendants bottom-up
+        self.descendant_index = {code: set() for code in order}
+        for code in reversed(order):
+            parent = self.parents[code]
+            if parent in self.descendant_index:
+                self.descendant_index[parent].add(code)
+                self.descendant_index[parent] |= self.descendant_index[code]
+
+    def category(self, code: str) -> dict | None:
+        """
+        Gets a category.
+
+        Args:
+            code (str): The code of the category.
+
+        Returns:
+            dict: The category. None if not found.
+        """
+        return self.categories.get(code)
+
+    def ancestors(self, code: str) -> list[str]:
+        """
+        Gets the ancestors of a category.
+
+        Args:
+            code (str): The code of the category.
+
+        Returns:
+            list: The codes of the ancestors, the root first. Empty for roots and unknown categories.
+        """
+        return list(self.ancestor_index.get(code, ()))
+
+    def descendants(self, code: str, include_self: bool = False) -> set[str]:
+        """
+        Gets the descendants of a category.
+
+        Args:
+            code (str): The code of the category.
+            include_self (bool): Whether to include the category itself.
+
+        Returns:
+            set: The codes of the children, their children, and so on.
+        """
+        descendants = set(self.descendant_index.get(code, ()))
+        if include_self and code in self.categories:
+            descendants.add(code)
+        return descendants
+
+    def path(self, code: str, locale: str | None = None, separator: str = ' > ') -> str:
+        """
+        Gets the path of a category from its root, e.g. 'Master > Shoes > Sneakers'.
+
+        Args:
+            code (str): The code of the category.
+            locale (str): The locale of the labels. Codes if None, or for categories without a label.
+            separator (str): The separator between the categories.
+
+        Returns:
+            str: The path.
+        """
+        codes = self.ancestors(code) + [code]
+        return separator.join(((self.categories.get(item) or {}).get('labels') or {}).get(locale) or item for item in codes)
+
+    def is_under(self, code: str, ancestor: str) -> bool:
+        """
+        Checks whether a category is in the subtree of another category.
+
+        Args:
+            code (str): The code of the category.
+            ancestor (str): The code of the possible ancestor.
+
+        Returns:
+            bool: True if the category is the ancestor itself or one of its descendants.
+        """
+        return code == ancestor or ancestor in self.ancestor_index.get(code, ())
+
+    def search(self, code: str, search: AkeneoSearch | None = None, include_children: bool = True) -> AkeneoSearch:
+        """
+        Adds a filter on the products classified in a category or its subtree.
+
+        Args:
+            code (str): The code of the category.
+            search (AkeneoSearch): The search to add the filter to. A new search if None.
+            include_children (bool): Whether to include the products of the descendants.
+
+        Returns:
+            AkeneoSearch: The search.
+        """
+        if code not in self.categories:
+            raise ValueError(f"Unknown category: {code}.")
+
+        search = AkeneoSearch() if search is None else search
+        codes = self.descendants(code, include_self=True) if include_children else {code}
+        if len(codes) > self.max_codes:
+            return search.add('categories', 'IN CHILDREN', [code])
+        return search.add('categories', 'IN', sorted(codes))
+
+    def products(self, code: str, include_children: bool = True, **options) -> AkeneoPaginator:
+        """
+        Iterates over the products classified in a category or its subtree.
+
+        Args:
+            code (str): The code of the category.
+            include_children (bool): Whether to include the products of the descendants.
+            **options: Other AkeneoPaginator options, e.g. `attributes` or `page_size`.
+
+        Returns:
+            AkeneoPaginator: The paginator.
+        """
+        search = self.search(code, search=options.pop('search', None), include_children=include_children)
+        options.setdefault('page_size', 100)
+        options.setdefault('pagination_type', 'search_after')
+        return AkeneoPaginator(self.connector.products_url, connector=self.connector, search=search, **options)
+
+    def reassign(
+            self,
+            products: Iterable,
+            add: Iterable[str] = (),
+            remove: Iterable[str] = (),
+            batch_size: int = 100,
+            dry_run: bool = False
+        ) -> dict:
+        """
+        Adds and removes categories of many products, with collection PATCH requests.
+
+        The new categories of every product are computed from its current categories,
+        and only products whose categories change are sent.
+
+        Args:
+            products (iterable): AkeneoProduct objects or raw products, with their current categories.
+                Raw products without a 'categories' key are not sent and are counted as failed.
+            add (iterable): The codes of the categories to add.
+            remove (iterable): The codes of the categories to remove.
+            batch_size (int): The number of products per request (at most 100).
+            dry_run (bool): Whether to only count the changes, without sending them.
+
+        Returns:
+            dict: The number of products 'seen', 'changed', 'updated' and 'failed', the number of 'requests',
+                and the identifier and message of every product that failed in 'errors'.
+        """
+        add = list(dict.fromkeys(add))
+        remove = set(remove)
+        for code in add:
+            if code not in self.categories:
+                raise ValueError(f"Unknown category: {code}.")
+
+        report = {'seen': 0, 'changed': 0, 'updated': 0, 'failed': 0, 'requests': 0, 'errors': []}
+        batch = []
+        for product in products:
+            report['seen'] += 1
+            if isinstance(product, AkeneoProduct):
+                identifier, current = product.identifier, product.categories
+            elif 'categories' in product:
+                identifier, current = product.get('identifier'), product['categories'] or []
+            else:
+                # Without its current categories, sending the product would replace all of them
+                report['failed'] += 1
+                report['errors'].append((product.get('identifier'), 'Missing categories'))
+                continue
+
+            categories = [code for code in current if code not in remove]
+            categories += [code for code in add if code not in categories]
+            if categories == list(current):
+                continue
+
+            report['changed'] += 1
+            batch.append({'identifier': identifier, 'categories': categories})
+            if len(batch) >= batch_size:
+                self.write(batch, report, dry_run)
+                batch = []
+
+        if batch:
+            self.write(batch, report, dry_run)
+        return report
+
+    def move(self, source: str, target: str, include_children: bool = False, dry_run: bool = False) -> dict:
+        """
+        Moves all products of a category to another category.
+
+        Args:
+            source (str): The code of the category to move the products out of.
+            target (str): The code of the category to move the products into.
+            include_children (bool): Whether to also move the products of the descendants of the source,
+                removing them from the descendants.
+            dry_run (bool): Whether to only count the changes, without sending them.
+
+        Returns:
+            dict: The outcome, see `reassign`.
+        """
+        remove = self.descendants(source, include_self=True) if include_children else {source}
+        return self.reassign(self.products(source, include_children=include_children), add=[target], remove=remove, dry_run=dry_run)
+
+    def write(self, batch: list[dict], report: dict, dry_run: bool = False):
+        """
+        Sends a batch of category changes and counts the outcome.
+
+        Args:
+            batch (list): The payloads.
+            report (dict): The report to count the outcome in.
+            dry_run (bool): Whether to skip sending.
+        """
+        if dry_run:
+            return
+
+        report['requests'] += 1
+        results = collection_results(self.connector.update(self.connector.products_url, batch))
+        if results is None:
+            report['failed'] += len(batch)
+            report['errors'].extend((payload['identifier'], 'Request failed') for payload in batch)
+            return
+
+        for result in results:
+            if 200 <= int(result.get('status_code', 0)) < 300:
+                report['updated'] += 1
+            else:
+                report['failed'] += 1
+                report['errors'].append((result.get('identifier'), result.get('message') or result.get('errors')))
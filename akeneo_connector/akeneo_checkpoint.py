@@ -0,0 +1,119 @@
+import json
+import os
+import time
+
+
+def write_json_atomic(path: str, data: dict):
+    """
+    Writes a JSON file so that it is either fully replaced or left untouched, even on a crash.
+
+    Args:
+        path (str): The path of the file.
+        data (dict): The data to write.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+    # Make the rename itself durable
+    if hasattr(os, 'O_DIRECTORY'):
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def read_json(path: str) -> dict | None:
+    """
+    Reads a JSON file.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        dict: The data. None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class PaginatorCheckpoint:
+    """
+    The PaginatorCheckpoint class saves the position of a paginator to a file, so a
+    crawl can resume exactly where it stopped.
+
+    The position is the link of the current page (which holds the search_after
+    cursor when using search_after pagination), the number of items of that page
+    that have been consumed, and the counters of the paginator.
+
+    Attributes:
+        path (str): The path of the checkpoint file.
+        interval (float): The minimum number of seconds between saves.
+        every (int): Save after this many consumed items, regardless of the interval.
+        saves (int): The number of saves.
+    """
+
+    def __init__(self, path: str, interval: float = 10.0, every: int | None = None):
+        """
+        Initializes an instance of the PaginatorCheckpoint class.
+
+        Args:
+            path (str): The path of the checkpoint file.
+            interval (float): The minimum number of seconds between saves.
+            every (int): Save after this many consumed items, regardless of the interval.
+        """
+        self.path = path
+        self.interval = interval
+        self.every = every
+        self.saves = 0
+        self.last_saved = time.monotonic()
+        self.last_count = 0
+
+    def load(self) -> dict | None:
+        """
+        Loads the saved position.
+
+        Returns:
+            dict: The saved position. None if there is none.
+        """
+        return read_json(self.path)
+
+    def due(self, count: int) -> bool:
+        """
+        Checks whether the position should be saved.
+
+        Args:
+            count (int): The number of consumed items.
+
+        Returns:
+            bool: True if the interval has passed or enough items have been consumed.
+        """
+        if self.every is not None and count - self.last_count >= self.every:
+            return True
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save(self, state: dict):
+        """
+        Saves a position.
+
+        Args:
+            state (dict): The position of the paginator.
+        """
+        write_json_atomic(self.path, state)
+        self.saves += 1
+        self.last_saved = time.monotonic()
+        self.last_count = state.get('count', 0)
+
+    def clear(self):
+        """
+        Removes the saved position, so the next crawl starts from the beginning.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,17 +1,37 @@
 import base64
 import json
 import os
-import requests as req
+import threading
+import time
 from urllib3 import encode_multipart_formdata
 
+from akeneo_connector.akeneo_json import JsonCodec, PageStream, get_codec
+from akeneo_connector.akeneo_metrics import AkeneoMetrics, endpoint_of
+from akeneo_connector.akeneo_options import AkeneoOptionCache
+from akeneo_connector.akeneo_profiler import AkeneoProfiler
+from akeneo_connector.akeneo_transport import AkeneoTransport, get_transport
+
 
 
 class AkeneoConnector:
     """
     The AkeneoConnector class is used to connect to the Akeneo API.
 
+    A connector can be shared between threads: requests only read its state, the
+    access token is refreshed under a lock, and the default transport is pooled.
+
     Attributes:
+        origin (str): The host name of the Akeneo instance.
+        scheme (str): The scheme of the API URLs, 'https' unless testing against a local server.
         products_url (str): The URL to get the products from.
+        product_model_url (str): The URL of a product model, with a {code} placeholder.
+        product_models_url (str): The URL to get the product models from.
+        families_url (str): The URL to list the families.
+        attributes_url (str): The URL to list the attributes.
+        attribute_options_url (str): The URL to list the options of an attribute, with an {attribute} placeholder.
+        channels_url (str): The URL to list the channels.
+        locales_url (str): The URL to list the locales.
+        categories_url (str): The URL to list the categories.
         username (str): The username to authenticate with.
         password (str): The password to authenticate with.
         auth_token (str): The authentication token to use.
@@ -19,15 +39,50 @@ class AkeneoConnector:
         access_token (str): The access token to use.
         headers (dict): The headers to use for the request.
         version (str): The version of the API to use.
+        codec (JsonCodec): The codec to decode and encode JSON with.
+        hooks (dict): The callbacks by event name.
+        retries (int): The number of times to retry requests that failed with a retryable status.
+        metrics (AkeneoMetrics): The metrics collected from the requests. None if not collected.
+        profiler (AkeneoProfiler): The profiler recording time per phase. None if not profiling.
+        transport (AkeneoTransport): The transport the requests are sent with.
+        option_cache (AkeneoOptionCache): The cache to resolve option labels with. None if not resolving labels.
     """
 
     # Constants
-    PRODUCT_URL = 'https://{origin}/api/rest/{version}/products/{identifier}'
-    PRODUCTS_URL = 'https://{origin}/api/rest/{version}/products'
-    ATTRIBUTE_URL = 'https://{origin}/api/rest/{version}/attributes/{code}'
-    PRODUCTS_MEDIA_URL = 'https://{origin}/api/rest/{version}/media-files'
-
-    def __init__(self, origin: str | None = None, username = None, password = None, auth_token = None, auth_url = None, version='v1'):
+    PRODUCT_URL = '{scheme}://{origin}/api/rest/{version}/products/{identifier}'
+    PRODUCTS_URL = '{scheme}://{origin}/api/rest/{version}/products'
+    ATTRIBUTE_URL = '{scheme}://{origin}/api/rest/{version}/attributes/{code}'
+    PRODUCTS_MEDIA_URL = '{scheme}://{origin}/api/rest/{version}/media-files'
+    PRODUCT_MODEL_URL = '{scheme}://{origin}/api/rest/{version}/product-models/{code}'
+    PRODUCT_MODELS_URL = '{scheme}://{origin}/api/rest/{version}/product-models'
+    FAMILIES_URL = '{scheme}://{origin}/api/rest/{version}/families'
+    ATTRIBUTES_URL = '{scheme}://{origin}/api/rest/{version}/attributes'
+    ATTRIBUTE_OPTIONS_URL = '{scheme}://{origin}/api/rest/{version}/attributes/{attribute}/options'
+    CHANNELS_URL = '{scheme}://{origin}/api/rest/{version}/channels'
+    LOCALES_URL = '{scheme}://{origin}/api/rest/{version}/locales'
+    CATEGORIES_URL = '{scheme}://{origin}/api/rest/{version}/categories'
+
+    # Events emitted while making requests
+    EVENTS = ['request_start', 'request_end', 'retry', 'error', 'token_refresh']
+    RETRY_STATUSES = [429, 502, 503, 504]
+
+    def __init__(
+            self,
+            origin: str | None = None,
+            username = None,
+            password = None,
+            auth_token = None,
+            auth_url = None,
+            version='v1',
+            json_codec: str | JsonCodec | None = None,
+            log_requests: bool | None = None,
+            retries: int = 0,
+            metrics: AkeneoMetrics | bool = False,
+            profiler: AkeneoProfiler | bool = False,
+            scheme: str | None = None,
+            transport: str | AkeneoTransport | None = None,
+            option_cache: AkeneoOptionCache | bool = False
+        ):
         """
         Initializes an instance of the AkeneoConnector class.
 
@@ -36,6 +91,16 @@ class AkeneoConnector:
             password (str): The password to authenticate with.
             auth_token (str): The authentication token to use.
             auth_url (str): The URL to authenticate with.
+            json_codec (str | JsonCodec): The JSON codec to use ('orjson', 'json' or 'intern'). The fastest available if None.
+            log_requests (bool): Whether to print every request. Defaults to AKENEO_LOG_REQUESTS, or True if not set.
+            retries (int): The number of times to retry requests that failed with a retryable status.
+            metrics (AkeneoMetrics | bool): The metrics to collect request events in, or True for new metrics.
+            profiler (AkeneoProfiler | bool): The profiler to record time per phase in, or True for a new profiler.
+            scheme (str): The scheme of the API URLs. Defaults to AKENEO_SCHEME, or 'https' if not set.
+            transport (str | AkeneoTransport): The transport to send requests with ('requests', 'http2' or 'memory'), or a
+                transport instance. A pooled RequestsTransport if None.
+            option_cache (AkeneoOptionCache | bool): The cache to resolve option labels with when formatting values,
+                or True for a new cache. Formatting then does not need `with_attribute_options`.
         """
         # Initialize the AkeneoConnector class
         # Initialize the AkeneoConnector class
@@ -44,21 +109,103 @@ class AkeneoConnector:
             raise ValueError("auth_token is required")
         
         self.origin = os.getenv('AKENEO_ORIGIN') if origin is None else origin
+        self.scheme = os.getenv('AKENEO_SCHEME', 'https') if scheme is None else scheme
         self.username = os.getenv('AKENEO_USERNAME') if username is None else username
         self.password = os.getenv('AKENEO_PASSWORD') if password is None else password
         self.auth_token = base64.b64encode(auth_token.encode()).decode()
         self.auth_url = os.getenv('AKENEO_AUTH_URL') if auth_url is None else auth_url
+        self.codec = get_codec(json_codec if json_codec is not None else os.getenv('AKENEO_JSON_CODEC'))
+        self.retries = retries
+        self.token_lock = threading.Lock()
+        self.transport = get_transport(transport)
+
+        # Register the request hooks
+        self.hooks = {event: [] for event in self.EVENTS}
+        if log_requests is None:
+            log_requests = os.getenv('AKENEO_LOG_REQUESTS', 'true').lower() not in ('0', 'false', 'no', 'off')
+        if log_requests:
+            self.add_hook('request_start', self.log_request)
+
+        self.metrics = AkeneoMetrics() if metrics is True else (metrics or None)
+        if self.metrics is not None:
+            self.metrics.attach(self)
+
+        self.profiler = None
+        if profiler:
+            (AkeneoProfiler() if profiler is True else profiler).attach(self)
+
+        self.headers = {}
         self.access_token = self.get_access_token()
         self.headers = {
             'Authorization': 'Bearer ' + self.access_token,
             'Content-type': 'application/vnd.akeneo.collection+json'
         }
         self.version = version
-        self.product_url = self.PRODUCT_URL.format(origin=self.origin, version=self.version, identifier='{identifier}')
-        self.products_url = self.PRODUCTS_URL.format(origin=self.origin, version=self.version)
-        self.products_media_url = self.PRODUCTS_MEDIA_URL.format(origin=self.origin, version=self.version)
+        self.product_url = self.PRODUCT_URL.format(scheme=self.scheme, origin=self.origin, version=self.version, identifier='{identifier}')
+        self.products_url = self.PRODUCTS_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.products_media_url = self.PRODUCTS_MEDIA_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.product_model_url = self.PRODUCT_MODEL_URL.format(scheme=self.scheme, origin=self.origin, version=self.version, code='{code}')
+        self.product_models_url = self.PRODUCT_MODELS_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.families_url = self.FAMILIES_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.attributes_url = self.ATTRIBUTES_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.attribute_options_url = self.ATTRIBUTE_OPTIONS_URL.format(scheme=self.scheme, origin=self.origin, version=self.version, attribute='{attribute}')
+        self.channels_url = self.CHANNELS_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.locales_url = self.LOCALES_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.categories_url = self.CATEGORIES_URL.format(scheme=self.scheme, origin=self.origin, version=self.version)
+        self.option_cache = AkeneoOptionCache(self) if option_cache is True else (option_cache or None)
         
 
+    @classmethod
+    def from_env(cls, prefix: str = 'AKENEO_', **options):
+        """
+        Creates a connector from environment variables with a prefix, e.g. AKENEO_BRAND_A_ORIGIN, so
+        several Akeneo instances can be configured side by side.
+
+        Only the prefixed variables are read, never the unprefixed AKENEO_* ones, so the
+        credentials of one instance are never sent to the server of another.
+
+        Args:
+            prefix (str): The prefix of the ORIGIN, SCHEME, USERNAME, PASSWORD, AUTH_TOKEN and AUTH_URL variables.
+            **options: Other AkeneoConnector options. Given credentials replace the environment variables.
+
+        Returns:
+            AkeneoConnector: The connector.
+
+        Raises:
+            ValueError: When ORIGIN, AUTH_URL, USERNAME, PASSWORD or AUTH_TOKEN is neither given nor set.
+        """
+        for name in ['origin', 'username', 'password', 'auth_token', 'auth_url']:
+            if options.get(name) is None:
+                options[name] = os.getenv(prefix + name.upper())
+        if options.get('scheme') is None:
+            options['scheme'] = os.getenv(prefix + 'SCHEME', 'https')
+
+        missing = [prefix + name.upper() for name in ['origin', 'auth_url', 'username', 'password', 'auth_token'] if not options[name]]
+        if missing:
+            raise ValueError(f"Missing environment variables: {', '.join(missing)}.")
+        return cls(**options)
+
+    def list_urls(self) -> list[str]:
+        """
+        Returns the URLs of the lists that can be paginated through, except attribute options.
+
+        Returns:
+            list: The URLs of the products, product models, families, attributes, channels, locales and categories.
+        """
+        return [self.products_url, self.product_models_url, self.families_url, self.attributes_url, self.channels_url, self.locales_url, self.categories_url]
+
+    def close(self):
+        """
+        Closes the transport, releasing its connections.
+        """
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def get_access_token(self):
         """
         Gets the access token from Akeneo.
@@ -79,11 +226,11 @@ class AkeneoConnector:
         }
 
         # Send the request to the Akeneo API
-        response = req.post(self.auth_url, headers=headers, data=body)
+        response = self.request('POST', self.auth_url, headers=headers, data=body, authenticate=False)
 
         try:
             # Get the JSON response from the request
-            data = response.json()
+            data = self.codec.loads(response.content)
 
             # Get the access_token from the response data
             self.access_token = data.get('access_token')  
@@ -93,6 +240,145 @@ class AkeneoConnector:
         except:
             print(f"Error: {response.status_code} - {response.text}")
             raise ValueError("Error getting access token")
+
+    def refresh_access_token(self, expired_token: str | None = None):
+        """
+        Gets a new access token, unless another thread already replaced the expired one.
+
+        Args:
+            expired_token (str): The access token that was rejected.
+        """
+        with self.token_lock:
+            if expired_token is not None and expired_token != self.access_token:
+                return
+
+            self.get_access_token()
+            self.headers['Authorization'] = 'Bearer ' + self.access_token
+            self.emit('token_refresh', url=self.auth_url)
+
+    def add_hook(self, event: str, callback):
+        """
+        Registers a callback for request events.
+
+        Callbacks receive a dictionary with the 'event' name, the 'method', 'url' and
+        'endpoint' of the request and, depending on the event, the 'status',
+        'elapsed' seconds, 'bytes_in', 'bytes_out', 'attempt' and 'error'.
+
+        Args:
+            event (str): The event: 'request_start', 'request_end', 'retry', 'error' or 'token_refresh'.
+            callback (callable): The function to call with the event.
+        """
+        if event not in self.hooks:
+            raise ValueError(f"Invalid event: {event}. Choose one of {', '.join(self.EVENTS)}.")
+        self.hooks[event].append(callback)
+
+    def remove_hook(self, event: str, callback):
+        """
+        Removes a callback for request events.
+
+        Args:
+            event (str): The event the callback was registered for.
+            callback (callable): The callback to remove.
+        """
+        if callback in self.hooks.get(event, []):
+            self.hooks[event].remove(callback)
+
+    def emit(self, event: str, **data):
+        """
+        Calls the callbacks registered for an event.
+
+        Args:
+            event (str): The event.
+            **data: The data of the event.
+        """
+        callbacks = self.hooks[event]
+        if not callbacks:
+            return
+
+        data['event'] = event
+        if 'url' in data and 'endpoint' not in data:
+            data['endpoint'] = endpoint_of(data['url'])
+        for callback in callbacks:
+            callback(data)
+
+    def log_request(self, event: dict):
+        """
+        Prints a request.
+
+        Args:
+            event (dict): The 'request_start' event.
+        """
+        print(f"{event['method']} {event['url']}")
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False, authenticate: bool = True, retries: int | None = None):
+        """
+        Sends a request to Akeneo with the transport. All requests of the connector go through this method.
+
+        Expired access tokens are refreshed once, and requests that fail with a
+        retryable status are retried with exponential backoff, honoring Retry-After.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            headers (dict): Headers to add to (or replace in) the default headers.
+            data (bytes | str | dict): The body of the request.
+            stream (bool): Whether to download the body while it is being read.
+            authenticate (bool): Whether to send the access token.
+            retries (int): The number of times to retry a failed request. The connector's `retries` if None.
+
+        Returns:
+            Response: The response.
+        """
+        retries = self.retries if retries is None else retries
+        bytes_out = len(data) if isinstance(data, (bytes, str)) else None
+        attempt = 0
+        refreshed = False
+
+        while True:
+            # Build the headers, letting the given headers replace the defaults case-insensitively
+            access_token = self.access_token if authenticate else None
+            request_headers = dict(self.headers) if authenticate else {}
+            for key, value in (headers or {}).items():
+                for existing in [existing for existing in request_headers if existing.lower() == key.lower()]:
+                    del request_headers[existing]
+                request_headers[key] = value
+
+            self.emit('request_start', method=method, url=url, attempt=attempt, bytes_out=bytes_out)
+            started = time.perf_counter()
+            try:
+                response = self.transport.request(method, url, headers=request_headers, data=data, stream=stream)
+            except self.transport.errors as e:
+                self.emit('error', method=method, url=url, attempt=attempt, error=e, elapsed=time.perf_counter() - started)
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                delay = min(0.5 * 2 ** attempt, 30)
+                self.emit('retry', method=method, url=url, attempt=attempt, error=e, delay=delay)
+                time.sleep(delay)
+                continue
+
+            if self.hooks['request_end']:
+                bytes_in = int(response.headers.get('Content-Length', 0)) if stream else len(response.content)
+                self.emit('request_end', method=method, url=url, attempt=attempt, status=response.status_code, elapsed=time.perf_counter() - started, bytes_in=bytes_in, bytes_out=bytes_out)
+
+            # Refresh an expired access token once
+            if response.status_code == 401 and authenticate and not refreshed:
+                refreshed = True
+                response.close()
+                self.refresh_access_token(access_token)
+                continue
+
+            # Retry when Akeneo is busy or unavailable
+            if response.status_code in self.RETRY_STATUSES and attempt < retries:
+                attempt += 1
+                response.close()
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else min(0.5 * 2 ** attempt, 30)
+                self.emit('retry', method=method, url=url, attempt=attempt, status=response.status_code, delay=delay)
+                time.sleep(delay)
+                continue
+
+            return response
         
     def get(self, url: str):
         """
@@ -102,8 +388,7 @@ class AkeneoConnector:
             dict: The JSON response.
         """
         # Method to get the products from Akeneo
-        print(f"GET {url}")
-        response = req.get(url, headers=self.headers)
+        response = self.request('GET', url)
 
         # Check if the request was successful
         if response.status_code < 200 or response.status_code >= 300:
@@ -111,12 +396,32 @@ class AkeneoConnector:
             return None
         
         # Try to parse the response as JSON
+        started = time.perf_counter() if self.profiler is not None else None
         try:
-            data = response.json()
+            data = self.codec.loads(response.content)
         except:
             data = response.text
 
+        if started is not None:
+            self.profiler.add('decode', time.perf_counter() - started)
+
         return data
+
+    def get_stream(self, url: str) -> PageStream | None:
+        """
+        Retrieves a paginated response from a given Akeneo API endpoint URL, decoding its items while they are downloaded.
+
+        Returns:
+            PageStream: The stream of items. None if the request failed.
+        """
+        response = self.request('GET', url, stream=True)
+
+        # Check if the request was successful
+        if response.status_code < 200 or response.status_code >= 300:
+            print(f"Request error: {response.status_code} - {response.text}")
+            return None
+
+        return PageStream(response.iter_content(chunk_size=65536), codec=self.codec)
     
     def update(self, url: str, payload: list | dict, is_new: bool = False):
         """
@@ -131,18 +436,18 @@ class AkeneoConnector:
             payloads = payload
 
         # Convert to JSON-strings
-        batch_strings = [json.dumps(p) for p in payloads]
+        batch_strings = [self.codec.dumps(p) for p in payloads]
 
         # Join the JSON-strings into a single string
-        data_str = "\n".join(batch_strings)
+        data_str = b"\n".join(batch_strings)
 
         # Create headers
-        headers = self.headers.copy()
-        headers['Content-Type'] = 'application/vnd.akeneo.collection+json' if not is_new else 'application/json'
+        headers = {
+            'Content-Type': 'application/vnd.akeneo.collection+json' if not is_new else 'application/json'
+        }
 
         # Set the payload to the joined JSON-strings
-        print(f"PATCH {url}")
-        response = req.patch(url, headers=headers, data=data_str)
+        response = self.request('PATCH', url, headers=headers, data=data_str)
 
         # Check if the request was successful
         if response.status_code < 200 or response.status_code >= 300:
@@ -151,7 +456,7 @@ class AkeneoConnector:
         
         # Try to parse the response as JSON
         try:
-            data = response.json()
+            data = self.codec.loads(response.content)
         except:
             data = response.text
 
@@ -167,7 +472,7 @@ class AkeneoConnector:
         Returns:
             response: The response object containing the media file.
         """
-        response = req.get(media_url, headers=self.headers)
+        response = self.request('GET', media_url)
         if response.status_code == 200:
             return response.content
         else:
@@ -184,7 +489,7 @@ class AkeneoConnector:
         Returns:
             dict: The JSON response.
         """
-        response = req.get(self.ATTRIBUTE_URL.format(origin=self.origin, version=self.version, code=attributecode), headers=self.headers)
+        response = self.request('GET', self.ATTRIBUTE_URL.format(scheme=self.scheme, origin=self.origin, version=self.version, code=attributecode))
         
         # Check if the request was successful
         if response.status_code < 200 or response.status_code >= 300:
@@ -193,7 +498,7 @@ class AkeneoConnector:
         
         # Try to parse the response as JSON
         try:
-            data = response.json()
+            data = self.codec.loads(response.content)
         except:
             data = response.text
             
@@ -221,15 +526,13 @@ class AkeneoConnector:
         # Encode body and header
         encoded_body, content_type = encode_multipart_formdata(fields)
 
-        # Add authorization
+        # Replace the JSON content type
         headers = {
             'Content-Type': content_type,
-            'Authorization': 'Bearer ' + self.access_token,
         }
 
         # Send the request to the Akeneo API
-        print(f"POST {self.products_media_url}")
-        response = req.post(self.products_media_url, headers=headers, data=encoded_body)
+        response = self.request('POST', self.products_media_url, headers=headers, data=encoded_body)
 
         # Check if the request was successful
         if response.status_code < 200 or response.status_code >= 300:
@@ -238,7 +541,7 @@ class AkeneoConnector:
         
         # Try to parse the response as JSON
         try:
-            data = response.json()
+            data = self.codec.loads(response.content)
         except:
             data = response.text
 
@@ -0,0 +1,356 @@
+import functools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from akeneo_connector.akeneo_checkpoint import read_json, write_json_atomic
+from akeneo_connector.akeneo_search import AkeneoSearch
+
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# The queue the worker processes put their pages on and the event telling them
+# to stop early, set by the pool initializer
+_pages = None
+_stop = None
+
+
+class CrawlShard:
+    """
+    A disjoint slice of the catalog, defined by a search filter.
+
+    Attributes:
+        name (str): The unique name of the shard.
+        search (AkeneoSearch): The filter that selects the products of the shard.
+    """
+
+    def __init__(self, name: str, search: AkeneoSearch | dict):
+        self.name = name
+        self.search = search if isinstance(search, AkeneoSearch) else AkeneoSearch(search)
+
+    def __repr__(self):
+        return f"CrawlShard({self.name!r}, {self.search.to_json()})"
+
+
+def shards_by_family(families: list[str], per_shard: int = 1) -> list[CrawlShard]:
+    """
+    Splits the catalog into shards by family.
+
+    Two extra shards hold the products of all other families and the products
+    without a family, so together the shards cover the whole catalog.
+
+    Args:
+        families (list): The family codes.
+        per_shard (int): The number of families per shard.
+
+    Returns:
+        list: The shards.
+    """
+    shards = []
+    for index in range(0, len(families), per_shard):
+        group = families[index:index + per_shard]
+        shards.append(CrawlShard(f"family-{'-'.join(group)}", AkeneoSearch().add('family', 'IN', group)))
+
+    shards.append(CrawlShard('family-other', AkeneoSearch().add('family', 'NOT IN', list(families)).add('family', 'NOT EMPTY')))
+    shards.append(CrawlShard('family-none', AkeneoSearch().add('family', 'EMPTY')))
+    return shards
+
+
+def shards_by_updated(start: datetime, end: datetime, count: int) -> list[CrawlShard]:
+    """
+    Splits the catalog into shards by equal ranges of the `updated` date.
+
+    Ranges are inclusive on whole seconds, the precision of Akeneo dates, so they
+    never overlap. Two extra shards hold the products updated before `start` and
+    from `end` on, so together the shards cover the whole catalog.
+
+    Args:
+        start (datetime): The start of the first range.
+        end (datetime): The end of the last range.
+        count (int): The number of ranges.
+
+    Returns:
+        list: The shards.
+    """
+    start = start.replace(microsecond=0)
+    end = end.replace(microsecond=0)
+    if count < 1 or end <= start:
+        raise ValueError("Invalid date ranges: end must be after start and count at least 1.")
+
+    step = (end - start) / count
+    boundaries = [start + step * index for index in range(count)] + [end]
+    boundaries = [boundary.replace(microsecond=0) for boundary in boundaries]
+
+    second = timedelta(seconds=1)
+    shards = [CrawlShard('updated-before', AkeneoSearch().add('updated', '<', start.strftime(DATE_FORMAT)))]
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        if upper <= lower:
+            continue
+        shards.append(CrawlShard(
+            f"updated-{lower.strftime('%Y%m%d%H%M%S')}",
+            AkeneoSearch().add('updated', 'BETWEEN', [lower.strftime(DATE_FORMAT), (upper - second).strftime(DATE_FORMAT)])
+        ))
+    shards.append(CrawlShard('updated-after', AkeneoSearch().add('updated', '>', (end - second).strftime(DATE_FORMAT))))
+    return shards
+
+
+def _init_worker(pages, stop):
+    """
+    Initializes a worker process with the queue to put pages on.
+    """
+    global _pages, _stop
+    _pages = pages
+    _stop = stop
+
+
+def crawl_shard(name: str, url: str, options: dict, connector_options: dict) -> int:
+    """
+    Crawls a single shard in a worker process, putting every page on the shared queue.
+
+    The shard ends with a 'done' message on the same queue, so it arrives after all
+    pages of the shard. Pages are sent as raw items, so they are fetched without
+    wrapping them in AkeneoProduct objects first.
+
+    Args:
+        name (str): The name of the shard.
+        url (str): The link of the page to start at. The first page if None.
+        options (dict): The keyword arguments for the paginator.
+        connector_options (dict): The keyword arguments for the connector.
+
+    Returns:
+        int: The number of crawled items.
+    """
+    from akeneo_connector.akeneo_connector import AkeneoConnector
+    from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+    count = 0
+    try:
+        # The paginator only validates the options and builds the link of the first page
+        connector = AkeneoConnector(**connector_options)
+        if url is None:
+            url = AkeneoPaginator(connector=connector, **options).links['self']
+
+        while url is not None and not _stop.is_set():
+            response = connector.get(url)
+            if response is None:
+                raise RuntimeError(f"Request failed: {url}")
+
+            items = response['_embedded']['items']
+            url = ((response.get('_links') or {}).get('next') or {}).get('href')
+            count += len(items)
+            _pages.put(('page', name, items, url))
+            if not items:
+                break
+    except Exception as e:
+        _pages.put(('done', name, repr(e), None))
+        raise
+
+    _pages.put(('done', name, None, None))
+    return count
+
+
+def _report_lost_worker(queue, name: str, future):
+    """
+    Puts the 'done' message of a shard whose worker process died without sending it, e.g. when killed.
+
+    Errors raised while crawling are reported by the worker itself, so they are not reported twice.
+
+    Args:
+        queue (Queue): The queue the workers put their pages on.
+        name (str): The name of the shard.
+        future (Future): The finished future of the shard.
+    """
+    if future.cancelled():
+        return
+
+    error = future.exception()
+    if isinstance(error, BrokenProcessPool):
+        queue.put(('done', name, repr(error), None))
+
+
+class AkeneoCrawler:
+    """
+    The AkeneoCrawler class crawls the catalog with one paginator per shard in a
+    pool of processes, merging all pages into a single stream.
+
+    Every shard keeps its own checkpoint with the link of its next page, saved once
+    its pages have been consumed. A crawl that is interrupted continues from these
+    checkpoints, and finished shards are skipped.
+
+    Attributes:
+        shards (list): The shards to crawl.
+        processes (int): The number of worker processes.
+        options (dict): The keyword arguments for the paginators.
+        connector_options (dict): The keyword arguments for the connectors. Requests are not logged unless
+            `log_requests` is given.
+        checkpoint_dir (str): The directory to keep shard checkpoints in. None to not keep checkpoints.
+        counts (dict): The number of items consumed per shard.
+        errors (dict): The error per failed shard.
+    """
+
+    def __init__(
+            self,
+            shards: list[CrawlShard],
+            processes: int | None = None,
+            page_size: int = 100,
+            search: AkeneoSearch | dict | None = None,
+            checkpoint_dir: str | None = None,
+            connector_options: dict | None = None,
+            queue_size: int | None = None,
+            **options
+        ):
+        """
+        Initializes an instance of the AkeneoCrawler class.
+
+        Args:
+            shards (list): The shards to crawl.
+            processes (int): The number of worker processes. The number of CPUs if None.
+            page_size (int): The number of items per page.
+            search (AkeneoSearch | dict): Filters applied to every shard.
+            checkpoint_dir (str): The directory to keep shard checkpoints in. None to not keep checkpoints.
+            connector_options (dict): The keyword arguments for the connectors, e.g. origin and credentials.
+                Requests are not logged unless `log_requests` is given.
+            queue_size (int): The number of pages buffered between the workers and the consumer.
+            **options: Other keyword arguments for the paginators, e.g. attributes, locales and scope.
+        """
+        names = [shard.name for shard in shards]
+        if len(set(names)) != len(names):
+            raise ValueError("Shard names must be unique.")
+
+        self.shards = shards
+        self.processes = processes or os.cpu_count() or 1
+        self.search = search
+        self.options = {'page_size': page_size, 'pagination_type': 'search_after', **options}
+        self.connector_options = {'log_requests': False, **(connector_options or {})}
+        self.queue_size = queue_size or self.processes * 2
+        self.checkpoint_dir = checkpoint_dir
+        self.counts = {}
+        self.errors = {}
+
+        if checkpoint_dir is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def checkpoint_path(self, name: str) -> str:
+        """
+        Returns the path of the checkpoint of a shard.
+
+        Args:
+            name (str): The name of the shard.
+
+        Returns:
+            str: The path of the checkpoint.
+        """
+        return os.path.join(self.checkpoint_dir, re.sub(r'[^A-Za-z0-9_\-]', '_', name) + '.json')
+
+    def load_checkpoint(self, name: str) -> dict | None:
+        """
+        Loads the checkpoint of a shard.
+
+        Args:
+            name (str): The name of the shard.
+
+        Returns:
+            dict: The checkpoint. None if there is none.
+        """
+        if self.checkpoint_dir is None:
+            return None
+
+        return read_json(self.checkpoint_path(name))
+
+    def save_checkpoint(self, name: str, next_url: str | None):
+        """
+        Atomically saves the checkpoint of a shard.
+
+        Args:
+            name (str): The name of the shard.
+            next_url (str): The link of the next page. None if the shard is complete.
+        """
+        if self.checkpoint_dir is None:
+            return
+
+        write_json_atomic(self.checkpoint_path(name), {'next': next_url, 'count': self.counts.get(name, 0), 'done': next_url is None})
+
+    def pages(self):
+        """
+        Crawls all shards, yielding their pages as they arrive.
+
+        The checkpoint of a shard is saved when the consumer asks for the page after
+        one of its pages, so a page is only marked as done once it has been consumed.
+
+        Returns:
+            iterator: An iterator for (shard name, items) tuples.
+        """
+        context = multiprocessing.get_context()
+        queue = context.Queue(maxsize=self.queue_size)
+        stop = context.Event()
+        pending = set()
+        self.errors = {}
+
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=context, initializer=_init_worker, initargs=(queue, stop)) as executor:
+            for shard in self.shards:
+                checkpoint = self.load_checkpoint(shard.name) or {}
+                if checkpoint.get('done'):
+                    continue
+                self.counts[shard.name] = checkpoint.get('count', 0)
+
+                options = dict(self.options, search=shard.search.merge(self.search))
+                future = executor.submit(crawl_shard, shard.name, checkpoint.get('next'), options, self.connector_options)
+
+                # Report workers that die without saying they are done, e.g. when killed
+                future.add_done_callback(functools.partial(_report_lost_worker, queue, shard.name))
+                pending.add(shard.name)
+
+            try:
+                while pending:
+                    kind, name, payload, next_url = queue.get()
+
+                    if kind == 'done':
+                        if name in pending:
+                            pending.discard(name)
+                            if payload is not None:
+                                self.errors[name] = payload
+                        continue
+
+                    yield name, payload
+                    self.counts[name] += len(payload)
+                    self.save_checkpoint(name, next_url)
+            finally:
+                # Stop the workers when the consumer stops early, unblocking any that wait on a full queue
+                if pending:
+                    stop.set()
+                    while pending:
+                        kind, name, _, _ = queue.get()
+                        if kind == 'done':
+                            pending.discard(name)
+
+        if self.errors:
+            failed = ', '.join(f"{name} ({error})" for name, error in self.errors.items())
+            raise RuntimeError(f"Crawl failed for shards: {failed}. Run again to resume them.")
+
+    def __iter__(self):
+        """
+        Crawls all shards, yielding the items of all shards as a single stream.
+
+        Returns:
+            iterator: An iterator for the raw items.
+        """
+        for _, items in self.pages():
+            yield from items
+
+    def run(self, sink) -> int:
+        """
+        Crawls all shards into a sink.
+
+        Args:
+            sink (callable): Called with the list of items of every page.
+
+        Returns:
+            int: The total number of consumed items.
+        """
+        for _, items in self.pages():
+            sink(items)
+
+        return sum(self.counts.values())
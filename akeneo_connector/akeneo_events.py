@@ -0,0 +1,452 @@
+import hashlib
+import hmac
+import json
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import requests as req
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_product import AkeneoProduct
+
+
+SIGNATURE_HEADER = 'X-Akeneo-Request-Signature'
+TIMESTAMP_HEADER = 'X-Akeneo-Request-Timestamp'
+
+
+def sign(secret: str, timestamp: int | str, body: bytes) -> str:
+    """
+    Signs an event request the way Akeneo does: an HMAC-SHA256 of '<timestamp>.<body>'.
+
+    Args:
+        secret (str): The secret of the event subscription.
+        timestamp (int | str): The Unix timestamp of the request.
+        body (bytes): The body of the request.
+
+    Returns:
+        str: The hexadecimal signature.
+    """
+    message = str(timestamp).encode() + b'.' + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, timestamp: str | None, body: bytes, signature: str | None, tolerance: float | None = 300) -> bool:
+    """
+    Verifies the signature of an event request.
+
+    Args:
+        secret (str): The secret of the event subscription.
+        timestamp (str): The value of the X-Akeneo-Request-Timestamp header.
+        body (bytes): The body of the request.
+        signature (str): The value of the X-Akeneo-Request-Signature header.
+        tolerance (float): The maximum age of the request in seconds, against replays. Any age if None.
+
+    Returns:
+        bool: True if the signature is valid and the request is recent enough.
+    """
+    if not timestamp or not signature:
+        return False
+
+    try:
+        age = time.time() - float(timestamp)
+    except ValueError:
+        return False
+    if tolerance is not None and abs(age) > tolerance:
+        return False
+
+    return hmac.compare_digest(sign(secret, timestamp, body), signature)
+
+
+class EventBatch:
+    """
+    The products that changed in a batch of events.
+
+    Attributes:
+        products (list): The created and updated products, refreshed from Akeneo (or taken from the events).
+        removed (list): The identifiers of the removed products.
+        events (list): The raw events of the batch, including events of other resources.
+        failed (list): The identifiers of the changed products that could not be refreshed.
+    """
+
+    def __init__(self, products: list[AkeneoProduct], removed: list[str], events: list[dict], failed: list[str] | None = None):
+        self.products = products
+        self.removed = removed
+        self.events = events
+        self.failed = failed if failed is not None else []
+
+    def __repr__(self):
+        return (
+            f"EventBatch(products={len(self.products)}, removed={len(self.removed)}, "
+            f"failed={len(self.failed)}, events={len(self.events)})"
+        )
+
+
+class AkeneoEventReceiver:
+    """
+    The AkeneoEventReceiver class receives Akeneo product events (created, updated
+    and removed) on a local HTTP endpoint, so changes are synced as they happen
+    instead of by polling the whole catalog.
+
+    Requests are verified with the secret of the event subscription and answered
+    right away. Events are batched per `batch_size` products or `flush_interval`
+    seconds, keeping the last action per product, and the changed products are
+    refreshed with one bulk `identifier IN` request per 100 products before the
+    batch is passed to the callback.
+
+    Products that cannot be refreshed (e.g. while Akeneo is unavailable) are passed
+    in the `failed` identifiers of their batch, and errors of the refresh and of
+    the callback go to `on_error`, so one failing batch does not stop the receiver.
+
+    Attributes:
+        callback (callable): Called with every EventBatch.
+        secret (str): The secret to verify requests with. None to accept unsigned requests.
+        connector (AkeneoConnector): The connector to refresh products with.
+        refresh (bool): Whether to refresh changed products from Akeneo, rather than use the data in the events.
+        batch_size (int): The maximum number of products per batch.
+        flush_interval (float): The maximum seconds an event waits for its batch.
+        path (str): The path events are posted to.
+        received (int): The number of events received.
+        rejected (int): The number of requests rejected.
+        batches (int): The number of batches passed to the callback.
+        errors (int): The number of failed refreshes and callbacks.
+        on_error (callable): Called with the error and the batch when a refresh or the callback fails.
+    """
+    ACTIONS = ['product.created', 'product.updated', 'product.removed']
+
+    def __init__(
+            self,
+            callback: Callable[[EventBatch], None],
+            secret: str | None = None,
+            connector: AkeneoConnector | None = None,
+            refresh: bool = True,
+            batch_size: int = 100,
+            flush_interval: float = 1.0,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            path: str = '/',
+            on_error: Callable[[Exception, EventBatch], None] | None = None
+        ):
+        """
+        Initializes an instance of the AkeneoEventReceiver class.
+
+        Args:
+            callback (callable): Called with every EventBatch, e.g. to update a cache or snapshot store.
+            secret (str): The secret to verify requests with. None to accept unsigned requests.
+            connector (AkeneoConnector): The connector to refresh products with. A new one if None and refreshing.
+            refresh (bool): Whether to refresh changed products from Akeneo, rather than use the data in the events.
+            batch_size (int): The maximum number of products per batch.
+            flush_interval (float): The maximum seconds an event waits for its batch.
+            host (str): The host to listen on.
+            port (int): The port to listen on. A free port if 0.
+            path (str): The path events are posted to.
+            on_error (callable): Called with the error and the batch when a refresh or the callback fails.
+        """
+        if connector is None and refresh:
+            connector = AkeneoConnector()
+
+        self.callback = callback
+        self.secret = secret
+        self.connector = connector
+        self.refresh = refresh
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.path = path
+        self.on_error = on_error
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.received = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors = 0
+
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}{path}"
+        self.threads = []
+        self.stopping = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """
+        Starts receiving and batching events in background threads.
+        """
+        self.threads = [
+            threading.Thread(target=self.server.serve_forever, name='akeneo-events-server', daemon=True),
+            threading.Thread(target=self.run, name='akeneo-events-batcher', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops receiving events, and delivers the events that were received.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join()
+
+    def handler(self):
+        """
+        Builds the request handler class bound to this receiver.
+
+        Returns:
+            type: The request handler class.
+        """
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def answer(self, status: int):
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if self.path.split('?')[0] != receiver.path:
+                    return self.answer(404)
+
+                if receiver.secret is not None and not verify_signature(receiver.secret, self.headers.get(TIMESTAMP_HEADER), body, self.headers.get(SIGNATURE_HEADER)):
+                    with receiver.lock:
+                        receiver.rejected += 1
+                    return self.answer(401)
+
+                try:
+                    events = json.loads(body).get('events') or []
+                except (ValueError, AttributeError):
+                    with receiver.lock:
+                        receiver.rejected += 1
+                    return self.answer(400)
+
+                # Answer right away, Akeneo expects a response within half a second
+                receiver.receive(events)
+                self.answer(200)
+
+        return Handler
+
+    def receive(self, events: list[dict]):
+        """
+        Queues events for the next batch, e.g. events received some other way.
+
+        Args:
+            events (list): The events, as sent by Akeneo.
+        """
+        with self.lock:
+            self.received += len(events)
+        for event in events:
+            self.events.put(event)
+
+    def run(self):
+        """
+        Collects queued events into batches and delivers them, until the receiver is stopped.
+        """
+        pending = {}
+        events = []
+        deadline = None
+
+        while True:
+            timeout = max(deadline - time.monotonic(), 0) if deadline is not None else 0.1
+            try:
+                event = self.events.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            if event is not None:
+                events.append(event)
+                resource = (event.get('data') or {}).get('resource') or {}
+                identifier = resource.get('identifier')
+                if event.get('action') in self.ACTIONS and identifier is not None:
+                    # Keep the last action per product
+                    pending.pop(identifier, None)
+                    pending[identifier] = (event['action'], resource)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            stopping = self.stopping.is_set() and self.events.empty()
+            due = deadline is not None and time.monotonic() >= deadline
+            if events and (len(pending) >= self.batch_size or due or stopping):
+                try:
+                    self.deliver(pending, events)
+                except Exception as e:
+                    # Keep batching: the next events must not be dropped
+                    self.error(e, EventBatch([], [], events, failed=list(pending)))
+                pending, events, deadline = {}, [], None
+
+            if stopping:
+                return
+
+    def deliver(self, pending: dict, events: list[dict]):
+        """
+        Refreshes the changed products of a batch and passes the batch to the callback.
+
+        Args:
+            pending (dict): The last action and resource by identifier.
+            events (list): The raw events of the batch.
+        """
+        removed = [identifier for identifier, (action, _) in pending.items() if action == 'product.removed']
+        changed = {identifier: resource for identifier, (action, resource) in pending.items() if action != 'product.removed'}
+
+        failed = []
+        refresh_error = None
+        if self.refresh:
+            try:
+                products = self.fetch(list(changed))
+            except Exception as e:
+                products, failed, refresh_error = [], list(changed), e
+            else:
+                # Products that no longer exist were removed after the event
+                found = {product.identifier for product in products}
+                removed += [identifier for identifier in changed if identifier not in found]
+        else:
+            products = [AkeneoProduct(resource, connector=self.connector) for resource in changed.values()]
+
+        batch = EventBatch(products, removed, events, failed=failed)
+        if refresh_error is not None:
+            self.error(refresh_error, batch)
+
+        try:
+            self.callback(batch)
+        except Exception as e:
+            self.error(e, batch)
+
+        with self.lock:
+            self.batches += 1
+
+    def error(self, error: Exception, batch: EventBatch):
+        """
+        Counts a failed refresh or callback, and passes it to `on_error`.
+
+        Args:
+            error (Exception): The error.
+            batch (EventBatch): The batch that was being delivered.
+        """
+        with self.lock:
+            self.errors += 1
+        if self.on_error is None:
+            return
+
+        try:
+            self.on_error(error, batch)
+        except Exception:
+            pass
+
+    def fetch(self, identifiers: list[str]) -> list[AkeneoProduct]:
+        """
+        Fetches products in bulk, 100 per request.
+
+        Args:
+            identifiers (list): The identifiers of the products.
+
+        Returns:
+            list: The products that were found.
+        """
+        from akeneo_connector.akeneo_paginator import AkeneoPaginator
+        from akeneo_connector.akeneo_search import AkeneoSearch
+
+        products = []
+        for start in range(0, len(identifiers), 100):
+            search = AkeneoSearch().add('identifier', 'IN', identifiers[start:start + 100])
+            products.extend(AkeneoPaginator(self.connector.products_url, page_size=100, search=search, connector=self.connector))
+        return products
+
+
+class AkeneoEventSimulator:
+    """
+    The AkeneoEventSimulator class posts signed product events the way Akeneo does,
+    to test a receiver without an Akeneo instance.
+
+    Attributes:
+        url (str): The URL of the receiver.
+        secret (str): The secret to sign requests with. None to send unsigned requests.
+        session (Session): The session the requests are sent with.
+    """
+
+    def __init__(self, url: str, secret: str | None = None):
+        """
+        Initializes an instance of the AkeneoEventSimulator class.
+
+        Args:
+            url (str): The URL of the receiver.
+            secret (str): The secret to sign requests with. None to send unsigned requests.
+        """
+        self.url = url
+        self.secret = secret
+        self.session = req.Session()
+
+    @staticmethod
+    def event(action: str, resource: dict) -> dict:
+        """
+        Builds an event.
+
+        Args:
+            action (str): The action, e.g. 'product.updated'.
+            resource (dict): The product, or at least its identifier.
+
+        Returns:
+            dict: The event.
+        """
+        return {
+            'action': action,
+            'event_id': str(uuid.uuid4()),
+            'event_datetime': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'author': 'simulator',
+            'author_type': 'api',
+            'pim_source': 'simulator',
+            'data': {'resource': resource},
+        }
+
+    def send(self, events: list[dict]) -> int:
+        """
+        Posts events in one request.
+
+        Args:
+            events (list): The events.
+
+        Returns:
+            int: The status of the response.
+        """
+        body = json.dumps({'events': events}).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.secret is not None:
+            timestamp = str(int(time.time()))
+            headers[TIMESTAMP_HEADER] = timestamp
+            headers[SIGNATURE_HEADER] = sign(self.secret, timestamp, body)
+        return self.session.post(self.url, data=body, headers=headers).status_code
+
+    def products_changed(self, identifiers: list[str], action: str = 'product.updated', per_request: int = 10) -> list[int]:
+        """
+        Posts an event per product, several events per request like Akeneo does.
+
+        Args:
+            identifiers (list): The identifiers of the products.
+            action (str): The action: 'product.created', 'product.updated' or 'product.removed'.
+            per_request (int): The number of events per request.
+
+        Returns:
+            list: The status of every response.
+        """
+        events = [self.event(action, {'identifier': identifier}) for identifier in identifiers]
+        return [self.send(events[start:start + per_request]) for start in range(0, len(events), per_request)]
+
+    def close(self):
+        """
+        Closes the session.
+        """
+        self.session.close()
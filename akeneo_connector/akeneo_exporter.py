@@ -0,0 +1,494 @@
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from akeneo_connector.akeneo_checkpoint import PaginatorCheckpoint
+from akeneo_connector.akeneo_json import get_codec
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_product import AkeneoProduct
+from akeneo_connector.akeneo_units import format_value
+
+
+# Marker put on a queue to tell the next stage that no more pages will follow
+_DONE = object()
+
+BASE_COLUMNS = ['identifier', 'family', 'parent', 'enabled', 'categories', 'created', 'updated']
+
+
+def value_column(attribute: str, locale: str | None = None, scope: str | None = None) -> str:
+    """
+    Builds the column name for a value, following Akeneo's own export convention.
+
+    Args:
+        attribute (str): The attribute code.
+        locale (str): The locale of the value.
+        scope (str): The scope of the value.
+
+    Returns:
+        str: The column name, e.g. 'name-en_US-ecommerce'.
+    """
+    return '-'.join(part for part in [attribute, locale, scope] if part)
+
+
+class JsonlWriter:
+    """
+    Writes exported products as one JSON object per line.
+
+    Attributes:
+        path (str): The path of the output file.
+        file (file): The opened output file.
+    """
+    supports_resume = True
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.codec = get_codec()
+        self.file = open(path, 'ab' if append else 'wb')
+
+    def write(self, rows: list[dict]):
+        """
+        Writes a batch of rows.
+
+        Args:
+            rows (list): The rows to write.
+        """
+        self.file.write(b''.join(self.codec.dumps(row) + b'\n' for row in rows))
+
+    def flush(self):
+        """
+        Flushes the written rows to disk.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """
+        Closes the output file.
+        """
+        self.file.close()
+
+
+class CsvWriter:
+    """
+    Writes exported products as flat CSV rows.
+
+    The columns are taken from the first batch unless given upfront. Columns that
+    only appear in later batches are ignored, so pass `columns` (or project on
+    attributes and locales) for catalogs with sparse attributes.
+
+    Attributes:
+        path (str): The path of the output file.
+        columns (list): The columns of the CSV file.
+        file (file): The opened output file.
+    """
+    supports_resume = True
+
+    def __init__(self, path: str, append: bool = False, columns: list[str] | None = None, delimiter: str = ';'):
+        self.path = path
+        self.columns = columns
+        self.delimiter = delimiter
+        self.writer = None
+
+        # Reuse the header of the existing file when resuming
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline='', encoding='utf-8') as existing:
+                self.columns = next(csv.reader(existing, delimiter=delimiter))
+            self.file = open(path, 'a', newline='', encoding='utf-8')
+            self.writer = csv.DictWriter(self.file, fieldnames=self.columns, delimiter=delimiter, extrasaction='ignore')
+        else:
+            self.file = open(path, 'w', newline='', encoding='utf-8')
+
+    def write(self, rows: list[dict]):
+        """
+        Writes a batch of rows.
+
+        Args:
+            rows (list): The rows to write.
+        """
+        if self.writer is None:
+            if self.columns is None:
+                columns = {}
+                for row in rows:
+                    columns.update(dict.fromkeys(row))
+                self.columns = BASE_COLUMNS + sorted(column for column in columns if column not in BASE_COLUMNS)
+            self.writer = csv.DictWriter(self.file, fieldnames=self.columns, delimiter=self.delimiter, extrasaction='ignore')
+            self.writer.writeheader()
+
+        self.writer.writerows(rows)
+
+    def flush(self):
+        """
+        Flushes the written rows to disk.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """
+        Closes the output file.
+        """
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes exported products as flat rows to a Parquet file. Requires pyarrow.
+
+    Every page is written as a row group. All columns are stored as strings, with
+    the schema taken from the first batch unless `columns` is given.
+
+    Attributes:
+        path (str): The path of the output file.
+        columns (list): The columns of the Parquet file.
+    """
+    supports_resume = False
+
+    def __init__(self, path: str, append: bool = False, columns: list[str] | None = None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet exports: pip install akeneo_connector[parquet]")
+
+        if append:
+            raise ValueError("Parquet exports cannot be resumed")
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.columns = columns
+        self.writer = None
+
+    def write(self, rows: list[dict]):
+        """
+        Writes a batch of rows as a row group.
+
+        Args:
+            rows (list): The rows to write.
+        """
+        if not rows:
+            return
+
+        if self.writer is None:
+            if self.columns is None:
+                columns = {}
+                for row in rows:
+                    columns.update(dict.fromkeys(row))
+                self.columns = BASE_COLUMNS + sorted(column for column in columns if column not in BASE_COLUMNS)
+            schema = self.pa.schema([(column, self.pa.string()) for column in self.columns])
+            self.writer = self.pq.ParquetWriter(self.path, schema)
+
+        table = self.pa.table({
+            column: [None if row.get(column) is None else str(row.get(column)) for row in rows]
+            for column in self.columns
+        }, schema=self.writer.schema)
+        self.writer.write_table(table)
+
+    def flush(self):
+        """
+        Row groups are written as a whole, so there is nothing to flush.
+        """
+        pass
+
+    def close(self):
+        """
+        Closes the output file.
+        """
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {
+    'jsonl': JsonlWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+class AkeneoExporter:
+    """
+    The AkeneoExporter class streams products from a paginator into a file.
+
+    Fetching, transforming and writing run as three pipeline stages connected by
+    bounded queues, so the next page is downloaded while the previous one is being
+    transformed and written. A single transform stage is used on purpose, as
+    `format_value` switches the process-wide locale.
+
+    Attributes:
+        paginator (AkeneoPaginator): The paginator to read products from.
+        path (str): The path of the output file.
+        format (str): The output format: 'jsonl', 'csv' or 'parquet'.
+        attributes (list): The attributes to export. All attributes if None.
+        locales (list): The locales to export. All locales if None.
+        formatted (bool): Whether to export formatted values instead of raw data.
+        format_locale (str): The locale values without a locale are formatted in: the first requested locale.
+            The default locale if None.
+        checkpoint (PaginatorCheckpoint): The position after the last written page, saved next to the output file.
+        count (int): The number of exported products.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            format: str | None = None,
+            paginator: AkeneoPaginator | None = None,
+            attributes: list[str] | None = None,
+            locales: list[str] | None = None,
+            formatted: bool = False,
+            resume: bool = False,
+            queue_size: int = 4,
+            progress_interval: float = 5.0,
+            progress_stream = sys.stderr
+        ):
+        """
+        Initializes an instance of the AkeneoExporter class.
+
+        Args:
+            path (str): The path of the output file.
+            format (str): The output format. Inferred from the file extension if None.
+            paginator (AkeneoPaginator): The paginator to read products from. All products, projected on the attributes and locales, if None.
+            attributes (list): The attributes to export. All attributes if None.
+            locales (list): The locales to export. All locales if None.
+            formatted (bool): Whether to export formatted values instead of raw data.
+            resume (bool): Whether to continue a previously interrupted export.
+            queue_size (int): The number of pages buffered between stages.
+            progress_interval (float): Seconds between progress reports. 0 to disable.
+            progress_stream (file): The stream to report progress on.
+        """
+        if format is None:
+            format = os.path.splitext(path)[1].lstrip('.').lower()
+        if format not in WRITERS:
+            raise ValueError(f"Invalid format: {format}. Choose one of {', '.join(WRITERS)}.")
+
+        self.path = path
+        self.format = format
+        if paginator is None:
+            paginator = AkeneoPaginator(page_size=100, attributes=attributes, locales=locales)
+        self.paginator = paginator
+        self.attributes = set(attributes) if attributes else None
+        self.locales = set(locales) if locales else None
+        self.format_locale = locales[0] if locales else None
+        self.formatted = formatted
+        self.resume = resume
+        self.queue_size = queue_size
+        self.progress_interval = progress_interval
+        self.progress_stream = progress_stream
+        self.checkpoint = PaginatorCheckpoint(path + '.checkpoint')
+        self.count = 0
+        self.initial_count = 0
+        self.started = None
+        self.errors = []
+
+    def project(self, product: AkeneoProduct) -> dict:
+        """
+        Returns the values of the product, limited to the requested attributes and locales.
+
+        Args:
+            product (AkeneoProduct): The product to project.
+
+        Returns:
+            dict: The projected values.
+        """
+        values = {}
+        for attribute, attribute_values in product.values.items():
+            if self.attributes is not None and attribute not in self.attributes:
+                continue
+
+            if self.locales is not None:
+                attribute_values = [
+                    value for value in attribute_values
+                    if value.get('locale') is None or value.get('locale') in self.locales
+                ]
+
+            if attribute_values:
+                values[attribute] = attribute_values
+
+        return values
+
+    def transform(self, product: AkeneoProduct | dict) -> dict:
+        """
+        Transforms a product into an output row.
+
+        JSONL rows keep Akeneo's nested value structure; CSV and Parquet rows get one
+        column per attribute, locale and scope.
+
+        Args:
+            product (AkeneoProduct): The product to transform.
+
+        Returns:
+            dict: The output row.
+        """
+        if isinstance(product, dict):
+            product = AkeneoProduct(product, connector=self.paginator.connector)
+
+        row = {
+            'identifier': product.identifier,
+            'family': product.family,
+            'parent': product.parent,
+            'enabled': product.enabled,
+            'categories': product.categories,
+            'created': product.created,
+            'updated': product.updated,
+        }
+        values = self.project(product)
+
+        # Keep the nested structure for JSONL without formatting
+        if self.format == 'jsonl' and not self.formatted:
+            row['values'] = values
+            return row
+
+        if self.format != 'jsonl':
+            row['categories'] = ','.join(product.categories)
+
+        flat = {}
+        for attribute, attribute_values in values.items():
+            for value in attribute_values:
+                locale = value.get('locale')
+                data = value.get('data')
+                if self.formatted:
+                    data = format_value(data, locale or self.format_locale, value.get('linked_data'), attribute, self.paginator.connector.option_cache)
+                elif self.format != 'jsonl' and not isinstance(data, str) and data is not None:
+                    data = json.dumps(data, ensure_ascii=False)
+                flat[value_column(attribute, locale, value.get('scope'))] = data
+
+        if self.format == 'jsonl':
+            row['values'] = flat
+        else:
+            row.update(flat)
+
+        return row
+
+    def position(self) -> dict:
+        """
+        Gets the position of the paginator once all items of its current page are exported.
+
+        Returns:
+            dict: The position, in the format of `AkeneoPaginator.state`, without the count.
+        """
+        paginator = self.paginator
+        done = paginator.links['next'] is None
+        return {
+            'url': None if done else paginator.page_url,
+            'offset': len(paginator.items),
+            'page_count': paginator.page_count,
+            'current_page': paginator.current_page,
+            'done': done,
+        }
+
+    def fetch_stage(self, pages: queue.Queue):
+        """
+        Fetches pages from the paginator and puts them on the queue.
+
+        Args:
+            pages (Queue): The queue to put (items, position) tuples on.
+        """
+        try:
+            while self.paginator.next():
+                # Skip the items exported before the export was interrupted
+                skip, self.paginator.resume_offset = self.paginator.resume_offset, 0
+                items = self.paginator.items[skip:]
+                pages.put((items, self.position()))
+                if not self.paginator.items or self.paginator.links['next'] is None:
+                    break
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            pages.put(_DONE)
+
+    def transform_stage(self, pages: queue.Queue, rows: queue.Queue):
+        """
+        Transforms fetched pages into rows.
+
+        Args:
+            pages (Queue): The queue to take fetched pages from.
+            rows (Queue): The queue to put (rows, position) tuples on.
+        """
+        try:
+            while (page := pages.get()) is not _DONE:
+                items, position = page
+                rows.put(([self.transform(item) for item in items], position))
+        except Exception as e:
+            self.errors.append(e)
+            # Drain the fetch stage so it does not block on a full queue
+            while pages.get() is not _DONE:
+                pass
+        finally:
+            rows.put(_DONE)
+
+    def report(self, final: bool = False):
+        """
+        Reports progress and throughput.
+
+        Args:
+            final (bool): Whether this is the final report.
+        """
+        if self.progress_stream is None:
+            return
+
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rate = (self.count - self.initial_count) / elapsed
+        prefix = 'Exported' if final else 'Exporting:'
+        print(f"{prefix} {self.count:,} products in {elapsed:.1f}s ({rate:,.1f}/s)", file=self.progress_stream)
+
+    def run(self) -> int:
+        """
+        Runs the export.
+
+        Returns:
+            int: The number of exported products.
+        """
+        # Continue after the last written page when resuming, and start over otherwise
+        state = self.checkpoint.load() if self.resume else None
+        append = state is not None
+        if state is None:
+            self.checkpoint.clear()
+        else:
+            if state.get('done') or state.get('url') is None:
+                print(f"Export to {self.path} is already complete", file=self.progress_stream or sys.stderr)
+                return state.get('count', 0)
+            if not WRITERS[self.format].supports_resume:
+                raise ValueError(f"{self.format} exports cannot be resumed")
+            self.paginator.restore(state)
+            self.count = state.get('count', 0)
+
+        writer = WRITERS[self.format](self.path, append=append)
+        pages = queue.Queue(maxsize=self.queue_size)
+        rows = queue.Queue(maxsize=self.queue_size)
+        stages = [
+            threading.Thread(target=self.fetch_stage, args=(pages,), daemon=True),
+            threading.Thread(target=self.transform_stage, args=(pages, rows), daemon=True),
+        ]
+
+        self.started = time.perf_counter()
+        last_report = self.started
+        self.initial_count = self.count
+        for stage in stages:
+            stage.start()
+
+        # Write stage
+        try:
+            while (batch := rows.get()) is not _DONE:
+                batch_rows, position = batch
+                writer.write(batch_rows)
+                writer.flush()
+                self.count += len(batch_rows)
+                self.checkpoint.save(dict(position, count=self.count))
+
+                if self.progress_interval and time.perf_counter() - last_report >= self.progress_interval:
+                    last_report = time.perf_counter()
+                    self.report()
+        finally:
+            writer.close()
+
+        for stage in stages:
+            stage.join()
+
+        if self.errors:
+            raise self.errors[0]
+
+        self.report(final=True)
+        return self.count - self.initial_count
@@ -0,0 +1,343 @@
+import codecs
+import json
+import re
+import sys
+from typing import Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """
+    The JsonCodec class decodes and encodes JSON with the standard library.
+
+    Attributes:
+        name (str): The name of the codec.
+    """
+    name = 'json'
+
+    def loads(self, data: bytes | str):
+        """
+        Decodes a JSON document.
+
+        Args:
+            data (bytes | str): The JSON document.
+
+        Returns:
+            any: The decoded document.
+        """
+        return json.loads(data)
+
+    def dumps(self, obj) -> bytes:
+        """
+        Encodes an object as a UTF-8 JSON document.
+
+        Args:
+            obj (any): The object to encode.
+
+        Returns:
+            bytes: The JSON document.
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def decoder(self) -> json.JSONDecoder:
+        """
+        Returns a decoder that can decode documents incrementally with `raw_decode`.
+
+        Returns:
+            JSONDecoder: The decoder.
+        """
+        return json.JSONDecoder()
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    The OrjsonCodec class decodes and encodes JSON with orjson.
+
+    Incremental decoding falls back to the standard library, as orjson can only
+    decode complete documents.
+    """
+    name = 'orjson'
+
+    def loads(self, data: bytes | str):
+        return orjson.loads(data)
+
+    def dumps(self, obj) -> bytes:
+        return orjson.dumps(obj)
+
+
+class InternTable:
+    """
+    The InternTable class deduplicates repeated strings in decoded documents.
+
+    All object keys (attribute codes, 'locale', 'data', ...) are interned, as are
+    the string values of `keys`, such as locale, scope and family codes. Every
+    duplicate is replaced with the string already in the table, so it can be freed.
+
+    Attributes:
+        keys (set): The object keys of which the string values are interned.
+        max_length (int): The maximum length of interned values.
+        strings (dict): The interned strings.
+        hits (int): The number of duplicates replaced.
+        saved_bytes (int): The estimated number of bytes saved by replacing duplicates.
+    """
+    KEYS = {'locale', 'scope', 'family', 'family_variant', 'parent', 'unit', 'currency', 'categories', 'groups', 'attribute', 'channel'}
+
+    def __init__(self, keys: set[str] | None = None, max_length: int = 64):
+        """
+        Initializes an instance of the InternTable class.
+
+        Args:
+            keys (set): The object keys of which the string values are interned.
+            max_length (int): The maximum length of interned values.
+        """
+        self.keys = self.KEYS if keys is None else set(keys)
+        self.max_length = max_length
+        self.strings = {}
+        self.hits = 0
+        self.saved_bytes = 0
+
+    def intern(self, string: str) -> str:
+        """
+        Returns the interned copy of a string.
+
+        Args:
+            string (str): The string to intern.
+
+        Returns:
+            str: The interned string.
+        """
+        interned = self.strings.setdefault(string, string)
+        if interned is not string:
+            self.hits += 1
+            self.saved_bytes += sys.getsizeof(string)
+        return interned
+
+    def object_pairs_hook(self, pairs: list[tuple]) -> dict:
+        """
+        Builds a decoded object with interned keys and values.
+
+        Args:
+            pairs (list): The key-value pairs of the object.
+
+        Returns:
+            dict: The object.
+        """
+        intern = self.intern
+        obj = {}
+        for key, value in pairs:
+            if key in self.keys:
+                if type(value) is str and len(value) <= self.max_length:
+                    value = intern(value)
+                elif type(value) is list:
+                    value = [intern(item) if type(item) is str and len(item) <= self.max_length else item for item in value]
+            obj[intern(key)] = value
+        return obj
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of the table.
+
+        Returns:
+            dict: The number of interned strings, replaced duplicates and saved bytes.
+        """
+        return {
+            'strings': len(self.strings),
+            'hits': self.hits,
+            'saved_bytes': self.saved_bytes,
+        }
+
+    def clear(self):
+        """
+        Empties the table and resets the statistics.
+        """
+        self.strings = {}
+        self.hits = 0
+        self.saved_bytes = 0
+
+
+# Shared by all interning codecs, so strings are deduplicated across connectors
+shared_intern_table = InternTable()
+
+
+class InternCodec(JsonCodec):
+    """
+    The InternCodec class decodes JSON with the standard library, interning repeated
+    strings through an InternTable.
+
+    Attributes:
+        table (InternTable): The table to intern strings with.
+    """
+    name = 'intern'
+
+    def __init__(self, table: InternTable | None = None):
+        """
+        Initializes an instance of the InternCodec class.
+
+        Args:
+            table (InternTable): The table to intern strings with. The shared table if None.
+        """
+        self.table = shared_intern_table if table is None else table
+
+    def loads(self, data: bytes | str):
+        return json.loads(data, object_pairs_hook=self.table.object_pairs_hook)
+
+    def decoder(self) -> json.JSONDecoder:
+        return json.JSONDecoder(object_pairs_hook=self.table.object_pairs_hook)
+
+
+CODECS = {
+    'json': JsonCodec,
+    'orjson': OrjsonCodec,
+    'intern': InternCodec,
+}
+
+
+def get_codec(codec: str | JsonCodec | None = None) -> JsonCodec:
+    """
+    Gets a JSON codec.
+
+    Args:
+        codec (str | JsonCodec): The name of the codec ('orjson', 'json' or 'intern'), or a codec instance. The fastest available codec if None.
+
+    Returns:
+        JsonCodec: The codec.
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    if codec is None:
+        codec = 'orjson' if orjson is not None else 'json'
+
+    if codec not in CODECS:
+        raise ValueError(f"Invalid JSON codec: {codec}. Choose one of {', '.join(CODECS)}.")
+
+    if codec == 'orjson' and orjson is None:
+        raise ImportError("orjson is not installed: pip install akeneo_connector[fast]")
+
+    return CODECS[codec]()
+
+
+def collection_results(data) -> list[dict] | None:
+    """
+    Splits the response of a collection PATCH request into the result of every line.
+
+    Args:
+        data (dict | list | str): The response, as returned by `AkeneoConnector.update`.
+
+    Returns:
+        list: The result of every line ({'line', 'identifier', 'status_code', 'message'}). None if the request failed.
+    """
+    if data is None:
+        return None
+
+    # Akeneo answers with one JSON object per line
+    if isinstance(data, dict):
+        return [data]
+    if isinstance(data, list):
+        return data
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+
+class PageStream:
+    """
+    The PageStream class decodes a paginated Akeneo response while it is downloaded.
+
+    Iterating yields the items of `_embedded.items` one at a time, so only a single
+    item is held in memory instead of the whole page. Once all items are yielded,
+    `envelope` holds the rest of the response (`_links`, `current_page`, ...) with
+    an empty items list.
+
+    Attributes:
+        envelope (dict): The response without its items. None until all items are yielded.
+        count (int): The number of items yielded so far.
+    """
+    ITEMS_START = re.compile(r'"_embedded"\s*:\s*\{\s*"items"\s*:\s*\[')
+    WHITESPACE = ' \t\n\r'
+
+    def __init__(self, chunks: Iterable[bytes], codec: JsonCodec | None = None):
+        """
+        Initializes an instance of the PageStream class.
+
+        Args:
+            chunks (Iterable): The chunks of the response body.
+            codec (JsonCodec): The codec to decode items with.
+        """
+        self.chunks = iter(chunks)
+        self.codec = get_codec(codec)
+        self.envelope = None
+        self.count = 0
+
+    def read(self, text_decoder) -> str | None:
+        """
+        Reads the next chunk of text from the response body.
+
+        Returns:
+            str: The next chunk. None at the end of the body.
+        """
+        for chunk in self.chunks:
+            if chunk:
+                return text_decoder.decode(chunk)
+        return None
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Yields the items of the page one at a time.
+
+        Returns:
+            iterator: An iterator for the items of the page.
+        """
+        text_decoder = codecs.getincrementaldecoder('utf-8')()
+        decoder = self.codec.decoder()
+        buffer = ''
+
+        # Read up to the start of the items array
+        while (match := self.ITEMS_START.search(buffer)) is None:
+            chunk = self.read(text_decoder)
+            if chunk is None:
+                # Not a paginated response: there are no items to stream
+                self.envelope = self.codec.loads(buffer + text_decoder.decode(b'', final=True))
+                return
+            buffer += chunk
+
+        prefix = buffer[:match.end()]
+        buffer = buffer[match.end():]
+        position = 0
+        finished = False
+
+        # Decode the items one by one, reading more of the body whenever an item is incomplete
+        while True:
+            while position < len(buffer) and buffer[position] in self.WHITESPACE + ',':
+                position += 1
+
+            if position < len(buffer) and buffer[position] == ']':
+                break
+
+            if position < len(buffer):
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if finished:
+                        raise
+                else:
+                    self.count += 1
+                    yield item
+                    continue
+            elif finished:
+                raise json.JSONDecodeError("Unterminated items array", buffer, position)
+
+            chunk = self.read(text_decoder)
+            if chunk is None:
+                finished = True
+                chunk = text_decoder.decode(b'', final=True)
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        # Decode the rest of the response around an empty items array
+        suffix = buffer[position:]
+        while (chunk := self.read(text_decoder)) is not None:
+            suffix += chunk
+        self.envelope = self.codec.loads(prefix + suffix + text_decoder.decode(b'', final=True))
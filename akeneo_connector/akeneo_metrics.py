@@ -0,0 +1,261 @@
+import bisect
+import re
+import threading
+from urllib.parse import urlparse
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+API_PATH = re.compile(r'^/api/rest/[^/]+/(.*)$')
+
+
+def endpoint_of(url: str) -> str:
+    """
+    Gets the endpoint of a URL, with identifiers and codes replaced by placeholders.
+
+    Args:
+        url (str): The URL of the request.
+
+    Returns:
+        str: The endpoint, e.g. 'products/{code}' or 'attributes/{code}/options'.
+    """
+    path = urlparse(url).path
+    match = API_PATH.match(path)
+    if match is None:
+        return 'token' if path.endswith('/token') else path
+
+    segments = match.group(1).strip('/').split('/')
+
+    # Media file codes contain slashes themselves
+    if segments[0] == 'media-files' and len(segments) > 1:
+        return 'media-files/{code}/download' if segments[-1] == 'download' else 'media-files/{code}'
+
+    # Resources and codes alternate: products/{code}, attributes/{code}/options/{code}
+    return '/'.join(segment if index % 2 == 0 else '{code}' for index, segment in enumerate(segments))
+
+
+class Histogram:
+    """
+    A latency histogram with cumulative buckets, as used by Prometheus.
+
+    Attributes:
+        buckets (tuple): The upper bounds of the buckets in seconds.
+        counts (list): The number of observations per bucket (not cumulative), plus one for +Inf.
+        count (int): The number of observations.
+        sum (float): The sum of all observations.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Adds an observation.
+
+        Args:
+            value (float): The observed value in seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q: float) -> float | None:
+        """
+        Estimates a percentile by interpolating within its bucket.
+
+        Args:
+            q (float): The percentile, between 0 and 1.
+
+        Returns:
+            float: The estimated value in seconds. None if there are no observations.
+        """
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+
+        return self.buckets[-1]
+
+
+class AkeneoMetrics:
+    """
+    The AkeneoMetrics class collects per-endpoint latency histograms and counters
+    from the request events of one or more connectors.
+
+    Attributes:
+        buckets (tuple): The upper bounds of the latency buckets in seconds.
+        latency (dict): The latency histogram by (method, endpoint).
+        requests (dict): The number of requests by (method, endpoint, status).
+        bytes_in (int): The number of bytes received.
+        bytes_out (int): The number of bytes sent.
+        retries (dict): The number of retries by endpoint.
+        errors (dict): The number of failed requests without a response by endpoint.
+        token_refreshes (int): The number of access token refreshes.
+    """
+    EVENTS = ['request_end', 'retry', 'error', 'token_refresh']
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Resets all histograms and counters.
+        """
+        self.latency = {}
+        self.requests = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = {}
+        self.errors = {}
+        self.token_refreshes = 0
+
+    def attach(self, connector):
+        """
+        Starts collecting the request events of a connector.
+
+        Args:
+            connector (AkeneoConnector): The connector to collect events from.
+        """
+        for event in self.EVENTS:
+            connector.add_hook(event, self.handle)
+
+    def detach(self, connector):
+        """
+        Stops collecting the request events of a connector.
+
+        Args:
+            connector (AkeneoConnector): The connector to stop collecting events from.
+        """
+        for event in self.EVENTS:
+            connector.remove_hook(event, self.handle)
+
+    def handle(self, event: dict):
+        """
+        Records a request event.
+
+        Args:
+            event (dict): The event.
+        """
+        with self.lock:
+            name = event['event']
+            endpoint = event.get('endpoint')
+
+            if name == 'request_end':
+                key = (event['method'], endpoint)
+                if key not in self.latency:
+                    self.latency[key] = Histogram(self.buckets)
+                self.latency[key].observe(event['elapsed'])
+
+                key = (event['method'], endpoint, event['status'])
+                self.requests[key] = self.requests.get(key, 0) + 1
+                self.bytes_in += event.get('bytes_in') or 0
+                self.bytes_out += event.get('bytes_out') or 0
+            elif name == 'retry':
+                self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+            elif name == 'error':
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            elif name == 'token_refresh':
+                self.token_refreshes += 1
+
+    def percentile(self, endpoint: str, q: float, method: str = 'GET') -> float | None:
+        """
+        Estimates a latency percentile of an endpoint.
+
+        Args:
+            endpoint (str): The endpoint, e.g. 'products/{code}'.
+            q (float): The percentile, between 0 and 1.
+            method (str): The HTTP method.
+
+        Returns:
+            float: The estimated latency in seconds. None if there are no observations.
+        """
+        with self.lock:
+            histogram = self.latency.get((method, endpoint))
+            return histogram.percentile(q) if histogram is not None else None
+
+    def summary(self) -> dict:
+        """
+        Summarizes the latency per endpoint.
+
+        Returns:
+            dict: The count, mean, p50, p90 and p99 latency in seconds by 'METHOD endpoint'.
+        """
+        with self.lock:
+            return {
+                f"{method} {endpoint}": {
+                    'count': histogram.count,
+                    'mean': histogram.sum / histogram.count,
+                    'p50': histogram.percentile(0.5),
+                    'p90': histogram.percentile(0.9),
+                    'p99': histogram.percentile(0.99),
+                }
+                for (method, endpoint), histogram in self.latency.items()
+            }
+
+    def to_prometheus(self, prefix: str = 'akeneo', labels: dict | None = None) -> str:
+        """
+        Exports all histograms and counters in the Prometheus text format.
+
+        Args:
+            prefix (str): The prefix of the metric names.
+            labels (dict): Extra labels to add to every sample, e.g. {'tenant': 'brand-a'}.
+
+        Returns:
+            str: The metrics in the Prometheus text format.
+        """
+        def format_labels(**values):
+            values = {**(labels or {}), **values}
+            escaped = (
+                f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                for key, value in values.items()
+            )
+            return '{' + ','.join(escaped) + '}' if values else ''
+
+        lines = []
+        with self.lock:
+            lines.append(f"# HELP {prefix}_request_duration_seconds Latency of Akeneo API requests.")
+            lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+            for (method, endpoint), histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{prefix}_request_duration_seconds_bucket{format_labels(method=method, endpoint=endpoint, le=bound)} {cumulative}")
+                lines.append(f"{prefix}_request_duration_seconds_sum{format_labels(method=method, endpoint=endpoint)} {histogram.sum}")
+                lines.append(f"{prefix}_request_duration_seconds_count{format_labels(method=method, endpoint=endpoint)} {histogram.count}")
+
+            lines.append(f"# HELP {prefix}_requests_total Akeneo API requests by response status.")
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            for (method, endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f"{prefix}_requests_total{format_labels(method=method, endpoint=endpoint, status=status)} {count}")
+
+            lines.append(f"# HELP {prefix}_request_bytes_total Bytes sent and received.")
+            lines.append(f"# TYPE {prefix}_request_bytes_total counter")
+            lines.append(f"{prefix}_request_bytes_total{format_labels(direction='in')} {self.bytes_in}")
+            lines.append(f"{prefix}_request_bytes_total{format_labels(direction='out')} {self.bytes_out}")
+
+            lines.append(f"# HELP {prefix}_retries_total Retried Akeneo API requests.")
+            lines.append(f"# TYPE {prefix}_retries_total counter")
+            for endpoint, count in sorted(self.retries.items()):
+                lines.append(f"{prefix}_retries_total{format_labels(endpoint=endpoint)} {count}")
+
+            lines.append(f"# HELP {prefix}_request_errors_total Akeneo API requests that failed without a response.")
+            lines.append(f"# TYPE {prefix}_request_errors_total counter")
+            for endpoint, count in sorted(self.errors.items()):
+                lines.append(f"{prefix}_request_errors_total{format_labels(endpoint=endpoint)} {count}")
+
+            lines.append(f"# HELP {prefix}_token_refreshes_total Access token refreshes.")
+            lines.append(f"# TYPE {prefix}_token_refreshes_total counter")
+            lines.append(f"{prefix}_token_refreshes_total{format_labels()} {self.token_refreshes}")
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,214 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AkeneoOptionCache:
+    """
+    The AkeneoOptionCache class keeps the labels of attribute options in memory, so
+    select and multi-select values can be formatted without `with_attribute_options`.
+
+    Options are loaded in bulk per attribute. An attribute is loaded the first time
+    one of its values is formatted, and loaded again when an unknown option shows up,
+    at most once per `refresh_interval`, so new options are picked up incrementally.
+
+    Attributes:
+        connector (AkeneoConnector): The Akeneo connector to use.
+        types (dict): The type of every known attribute, by code.
+        options (dict): The options by code, by attribute code.
+        loaded_at (dict): The time the options of every attribute were loaded, by code.
+        refresh_interval (float): The minimum seconds between two loads of the same attribute.
+        page_size (int): The number of options per page.
+        loads (int): The number of attributes loaded from Akeneo.
+    """
+    SELECT_TYPES = ['pim_catalog_simpleselect', 'pim_catalog_multiselect']
+
+    def __init__(self, connector, catalog = None, refresh_interval: float = 300.0, page_size: int = 100):
+        """
+        Initializes an instance of the AkeneoOptionCache class.
+
+        Args:
+            connector (AkeneoConnector): The Akeneo connector to use.
+            catalog (AkeneoCatalog): A loaded catalog to take the attribute types and options from.
+            refresh_interval (float): The minimum seconds between two loads of the same attribute.
+            page_size (int): The number of options per page.
+        """
+        self.connector = connector
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        self.types = {}
+        self.options = {}
+        self.loaded_at = {}
+        self.loads = 0
+
+        if catalog is not None:
+            self.update_types({code: attribute.get('type') for code, attribute in catalog.attributes.items()})
+            for attribute, options in catalog.options.items():
+                self.update(attribute, options.values())
+
+    def update_types(self, types: dict):
+        """
+        Registers the types of attributes.
+
+        Args:
+            types (dict): The type by attribute code.
+        """
+        with self.lock:
+            self.types.update(types)
+
+    def update(self, attribute: str, options):
+        """
+        Adds or replaces options of an attribute.
+
+        Args:
+            attribute (str): The code of the attribute.
+            options (iterable): The options, as returned by Akeneo.
+        """
+        with self.lock:
+            known = self.options.setdefault(attribute, {})
+            for option in options:
+                known[option['code']] = option
+            self.loaded_at.setdefault(attribute, time.monotonic())
+
+    def fetch(self, attribute: str) -> list[dict]:
+        """
+        Fetches all options of an attribute from Akeneo.
+
+        Args:
+            attribute (str): The code of the attribute.
+
+        Returns:
+            list: The options.
+        """
+        from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+        url = self.connector.attribute_options_url.format(attribute=attribute)
+        return list(AkeneoPaginator(url, page_size=self.page_size, connector=self.connector))
+
+    def load(self, attributes: list[str], workers: int = 8):
+        """
+        Loads the options of attributes from Akeneo, several attributes at the same time.
+
+        Args:
+            attributes (list): The codes of the attributes.
+            workers (int): The number of attributes loaded at the same time.
+
+        Returns:
+            AkeneoOptionCache: The cache itself.
+        """
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='akeneo-options') as executor:
+            for attribute, options in zip(attributes, executor.map(self.fetch, attributes)):
+                with self.lock:
+                    self.options[attribute] = {option['code']: option for option in options}
+                    self.loaded_at[attribute] = time.monotonic()
+                    self.loads += 1
+        return self
+
+    def load_all(self, workers: int = 8):
+        """
+        Loads the attribute types, and the options of all select attributes.
+
+        Args:
+            workers (int): The number of attributes loaded at the same time.
+
+        Returns:
+            AkeneoOptionCache: The cache itself.
+        """
+        from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+        attributes = AkeneoPaginator(self.connector.attributes_url, page_size=100, connector=self.connector)
+        self.update_types({attribute['code']: attribute.get('type') for attribute in attributes})
+        return self.load_selects(workers=workers)
+
+    def load_selects(self, workers: int = 8):
+        """
+        Loads the options of all select attributes whose type is known.
+
+        Args:
+            workers (int): The number of attributes loaded at the same time.
+
+        Returns:
+            AkeneoOptionCache: The cache itself.
+        """
+        return self.load([code for code, type in self.types.items() if type in self.SELECT_TYPES], workers=workers)
+
+    def is_select(self, attribute: str) -> bool:
+        """
+        Checks whether an attribute is a select attribute, fetching its type once if it is unknown.
+
+        Args:
+            attribute (str): The code of the attribute.
+
+        Returns:
+            bool: True if the attribute is a simple or multi select.
+        """
+        if attribute not in self.types:
+            data = self.connector.get_attribute(attribute)
+            self.update_types({attribute: data.get('type') if isinstance(data, dict) else None})
+        return self.types[attribute] in self.SELECT_TYPES
+
+    def option(self, attribute: str, code: str) -> dict | None:
+        """
+        Gets an option, loading the options of its attribute when it is unknown.
+
+        Args:
+            attribute (str): The code of the attribute.
+            code (str): The code of the option.
+
+        Returns:
+            dict: The option. None if not found.
+        """
+        option = self.options.get(attribute, {}).get(code)
+        if option is not None:
+            return option
+
+        # Load the attribute the first time, and again for new options once the interval has passed
+        loaded_at = self.loaded_at.get(attribute)
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_interval:
+            if loaded_at is None and not self.is_select(attribute):
+                return None
+            self.load([attribute], workers=1)
+
+        return self.options.get(attribute, {}).get(code)
+
+    def label(self, attribute: str, code: str, locale: str | None = None) -> str | None:
+        """
+        Gets the label of an option.
+
+        Args:
+            attribute (str): The code of the attribute.
+            code (str): The code of the option.
+            locale (str): The locale of the label.
+
+        Returns:
+            str: The label. None if the option or its label is not found.
+        """
+        return ((self.option(attribute, code) or {}).get('labels') or {}).get(locale)
+
+    def linked_data(self, attribute: str, value) -> dict:
+        """
+        Builds the linked data Akeneo returns with `with_attribute_options` for a value.
+
+        Args:
+            attribute (str): The code of the attribute.
+            value (str | list): The option code of a simple select, or the option codes of a multi-select.
+
+        Returns:
+            dict: The linked data, as used by `format_value`. Empty if the value is not a select value.
+        """
+        if isinstance(value, str):
+            option = self.option(attribute, value)
+            if option is None:
+                return {}
+            return {'attribute': attribute, 'code': value, 'labels': option.get('labels') or {}}
+
+        if isinstance(value, list) and value and all(isinstance(code, str) for code in value):
+            linked_data = {}
+            for code in value:
+                option = self.option(attribute, code)
+                if option is not None:
+                    linked_data[code] = {'attribute': attribute, 'code': code, 'labels': option.get('labels') or {}}
+            return linked_data
+
+        return {}
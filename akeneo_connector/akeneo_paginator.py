@@ -1,5 +1,12 @@
+import time
+from urllib.parse import quote, urlencode
+
+from akeneo_connector.akeneo_checkpoint import PaginatorCheckpoint
 from akeneo_connector.akeneo_connector import AkeneoConnector
 from akeneo_connector.akeneo_product import AkeneoProduct
+from akeneo_connector.akeneo_product_model import AkeneoModelCache, AkeneoProductModel
+from akeneo_connector.akeneo_profiler import AkeneoProfiler
+from akeneo_connector.akeneo_search import AkeneoSearch, validate_codes
 
 
 
@@ -13,27 +20,117 @@ class AkeneoPaginator:
         links (dict): The links for the response.
         current_page (int): The current page of the response.
         page_size (int): The page size of the response.
+        page_count (int): The number of pages fetched.
+        items_count (int): The total number of items. Only known when requested with `with_count`.
         connector (AkeneoConnector): The Akeneo connector to use.
+        stream (bool): Whether iterating decodes items while each page is downloaded.
+        query (dict): The query parameters sent with the first page.
+        page_url (str): The link of the current page.
+        offset (int): The number of items of the current page consumed by iterating.
+        count (int): The total number of items consumed by iterating.
+        checkpoint (PaginatorCheckpoint): The checkpoint to save the position to while iterating.
+        profiler (AkeneoProfiler): The profiler recording time per phase. None if not profiling.
+        model_cache (AkeneoModelCache): The cache the parent product models are fetched into. None if not fetching parents.
     """
-    def __init__(self, url: str | None = None, page_size: int = 10, version='v1'):
+    PAGINATION_TYPES = ['page', 'search_after']
+
+    def __init__(
+            self,
+            url: str | None = None,
+            page_size: int = 10,
+            version='v1',
+            connector: AkeneoConnector | None = None,
+            stream: bool = False,
+            search: AkeneoSearch | dict | None = None,
+            attributes: list[str] | None = None,
+            locales: list[str] | None = None,
+            scope: str | None = None,
+            search_locale: str | None = None,
+            search_scope: str | None = None,
+            with_count: bool = False,
+            pagination_type: str = 'page',
+            checkpoint: PaginatorCheckpoint | str | None = None,
+            profile: bool = False,
+            model_cache: AkeneoModelCache | None = None
+        ):
         """
         Initializes an instance of the AkeneoPaginator class.
 
+        The search and projection parameters are sent to Akeneo, so only the matching
+        products and requested values are returned.
+
         Args:
-            response (dict): The response from the Akeneo API.
+            url (str): The URL to paginate through: the products URL (the default), or the URL of the families,
+                attributes, attribute options, channels, locales or categories. Other items than products are
+                yielded as dictionaries.
+            page_size (int): The number of items per page (1 to 100).
+            version (str): The version of the API to use.
+            connector (AkeneoConnector): The Akeneo connector to use.
+            stream (bool): Whether iterating decodes items while each page is downloaded, instead of holding whole pages.
+            search (AkeneoSearch | dict): The filters to apply.
+            attributes (list): The attributes to return values for. All attributes if None.
+            locales (list): The locales to return localizable values for. All locales if None.
+            scope (str): The channel to return scopable values for. All channels if None.
+            search_locale (str): The default locale of localizable attribute filters.
+            search_scope (str): The default channel of scopable attribute filters.
+            with_count (bool): Whether to return the total number of items.
+            pagination_type (str): 'page', or 'search_after' for fast and stable deep pagination.
+            checkpoint (PaginatorCheckpoint | str): The checkpoint (or checkpoint file) to save the position to while
+                iterating. A saved position is restored, so the iteration continues where it stopped.
+            profile (bool): Whether to record the time spent per phase (network, decoding, building products and
+                the caller's own code), available through `profiler`.
+            model_cache (AkeneoModelCache): The cache to fetch the parent product models of every page into, in bulk.
+                Streamed pages are not held in memory, so their parents are fetched when they are resolved.
         """
         # Initialize the AkeneoPaginator class
-        self.connector = AkeneoConnector(version=version)
+        if connector is None:
+            self.connector = AkeneoConnector(version=version)
+        else:
+            self.connector = connector
 
         if url is None:
             url = self.connector.products_url
 
+        # Validate and build the query parameters
+        if not 1 <= page_size <= 100:
+            raise ValueError(f'Invalid page size: {page_size}. Must be between 1 and 100.')
+
+        if pagination_type not in self.PAGINATION_TYPES:
+            raise ValueError(f"Invalid pagination type: {pagination_type}. Choose one of {', '.join(self.PAGINATION_TYPES)}.")
+
+        if isinstance(search, dict):
+            search = AkeneoSearch(search)
+
+        attributes = validate_codes('attribute', attributes)
+        locales = validate_codes('locale', locales)
+        for name, code in [('scope', scope), ('search locale', search_locale), ('search scope', search_scope)]:
+            if code is not None:
+                validate_codes(name, [code])
+
+        self.query = {'limit': page_size}
+        if pagination_type != 'page':
+            self.query['pagination_type'] = pagination_type
+        if search:
+            self.query['search'] = search.to_json()
+        if attributes:
+            self.query['attributes'] = ','.join(attributes)
+        if locales:
+            self.query['locales'] = ','.join(locales)
+        if scope is not None:
+            self.query['scope'] = scope
+        if search_locale is not None:
+            self.query['search_locale'] = search_locale
+        if search_scope is not None:
+            self.query['search_scope'] = search_scope
+        if with_count:
+            self.query['with_count'] = 'true'
+
         # Initialize the AkeneoPaginator class
         self.response = None
         self.items: list[AkeneoProduct] | list[dict] = []
         self.initial_url = url
         self.links = {
-            'self': url + f'?limit={page_size}',
+            'self': url + '?' + urlencode(self.query, quote_via=quote),
             'first': None,
             'previous': None,
             'next': None,
@@ -41,13 +138,96 @@ class AkeneoPaginator:
         }
         self.page_size = page_size
         self.current_page = 1
-        self.page_size = page_size
-        
-        if url not in [
-            self.connector.products_url,
-        ]:
+        self.page_count = 0
+        self.items_count = None
+        self.stream = stream
+        self.page_url = None
+        self.offset = 0
+        self.resume_offset = 0
+        self.count = 0
+        self.finished = False
+        self.model_cache = model_cache
+
+        options_prefix, options_suffix = self.connector.attribute_options_url.split('{attribute}')
+        is_options_url = url.startswith(options_prefix) and url.endswith(options_suffix) and '/' not in url[len(options_prefix):-len(options_suffix)]
+        if url not in self.connector.list_urls() and not is_options_url:
             raise ValueError(f'Invalid URL: {url}.')
 
+        if pagination_type == 'search_after' and url not in [self.connector.products_url, self.connector.product_models_url]:
+            raise ValueError('search_after pagination is only supported for products and product models.')
+
+        # Profile the connector along with the paginator
+        if profile and self.connector.profiler is None:
+            AkeneoProfiler().attach(self.connector)
+        self.profiler = self.connector.profiler
+
+        # Continue from the saved position, if any
+        self.checkpoint = PaginatorCheckpoint(checkpoint) if isinstance(checkpoint, str) else checkpoint
+        if self.checkpoint is not None:
+            state = self.checkpoint.load()
+            if state is not None:
+                self.restore(state)
+
+    def state(self) -> dict:
+        """
+        Returns the position of the iteration.
+
+        An item counts as consumed once the next item is requested, so the item that
+        was being processed when a crawl stopped is yielded again on resume. Page-based
+        pagination can skip or repeat items when products are changed during a crawl,
+        so use search_after pagination for exact resumption.
+
+        Returns:
+            dict: The link of the current page, the number of consumed items on it and the counters.
+        """
+        return {
+            'url': None if self.finished else (self.page_url or self.links['self']),
+            'offset': self.offset,
+            'count': self.count,
+            'page_count': self.page_count,
+            'current_page': self.current_page,
+            'done': self.finished,
+        }
+
+    def restore(self, state: dict):
+        """
+        Restores the position of the iteration, so iterating continues with the first item not yet consumed.
+
+        Args:
+            state (dict): The position, as returned by `state`.
+        """
+        self.response = None
+        self.items = []
+        self.links = dict.fromkeys(self.links)
+        self.links['self'] = state.get('url')
+        self.page_url = state.get('url')
+        self.offset = state.get('offset', 0)
+        self.resume_offset = self.offset
+        self.count = state.get('count', 0)
+        self.page_count = max(state.get('page_count', 1) - 1, 0)
+        self.current_page = state.get('current_page', 1)
+        self.finished = state.get('done', False) or state.get('url') is None
+
+    def consumed(self, offset: int):
+        """
+        Registers a consumed item and saves the position when the checkpoint is due.
+
+        Args:
+            offset (int): The number of items of the current page consumed.
+        """
+        self.offset = offset
+        self.count += 1
+        if self.checkpoint is not None and self.checkpoint.due(self.count):
+            self.checkpoint.save(self.state())
+
+    def complete(self):
+        """
+        Marks the iteration as complete and saves the final position.
+        """
+        self.finished = True
+        if self.checkpoint is not None:
+            self.checkpoint.save(self.state())
+
     def set(self, response):
         """
         Sets the response of the paginator.
@@ -57,16 +237,45 @@ class AkeneoPaginator:
         """
         # Set the response
         self.response = response
+        self.page_count += 1
+        self.offset = 0
 
         # Get the items for the response
-        self.items = []
-        for item in response.get('_embedded').get('items'):
-            if 'identifier' in item:
-                self.items.append(AkeneoProduct(item, connector=self.connector))
-            else:
-                self.items.append(item)
-        
-        # Get the links from the response
+        started = time.perf_counter() if self.profiler is not None else None
+        self.items = [self.wrap(item) for item in response.get('_embedded').get('items')]
+        if started is not None:
+            self.profiler.add('construct', time.perf_counter() - started)
+
+        # Fetch the parents of the page at once, instead of one by one later
+        if self.model_cache is not None:
+            self.model_cache.prefetch(item.parent for item in self.items if isinstance(item, AkeneoProduct))
+
+        # Get the links and current page from the response
+        self.set_links(response)
+
+    def wrap(self, item: dict) -> AkeneoProduct | dict:
+        """
+        Wraps an item of the response.
+
+        Args:
+            item (dict): The item from the response.
+
+        Returns:
+            AkeneoProduct | dict: The product or product model, or the item itself for other resources.
+        """
+        if 'identifier' in item:
+            return AkeneoProduct(item, connector=self.connector)
+        if 'family_variant' in item and 'code' in item:
+            return AkeneoProductModel(item, connector=self.connector)
+        return item
+
+    def set_links(self, response: dict):
+        """
+        Sets the links and current page from a response.
+
+        Args:
+            response (dict): The response from the Akeneo API.
+        """
         links = response.get('_links')
         self.links = {
             'self': links.get('self').get('href') if 'self' in links else None,
@@ -76,8 +285,12 @@ class AkeneoPaginator:
             'last': links.get('last').get('href') if 'last' in links else None
         }
 
-        # Get the current page
-        self.current_page = int(response.get('current_page'))
+        # Get the current page, which search_after responses do not include
+        self.items_count = response.get('items_count', self.items_count)
+        if response.get('current_page') is not None:
+            self.current_page = int(response.get('current_page'))
+        else:
+            self.current_page = self.page_count
 
     def init(self):
         """
@@ -86,12 +299,29 @@ class AkeneoPaginator:
         Returns:
             None
         """
-        # Get the next page of items
-        response = self.connector.get(self.initial_url)
+        # Get the first page of items
+        self.page_url = self.links['self']
+        response = self.connector.get(self.page_url)
+        if not isinstance(response, dict):
+            self.fail(self.page_url)
 
         # Set the response for the paginator
         self.set(response)
 
+    def fail(self, url: str):
+        """
+        Saves the position and raises, when a page could not be fetched, so the crawl can be resumed.
+
+        Args:
+            url (str): The link of the page.
+
+        Raises:
+            RuntimeError: Always.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.save(self.state())
+        raise RuntimeError(f"Failed to fetch {url}")
+
     def next(self):
         """
         Gets the next page of items.
@@ -109,8 +339,11 @@ class AkeneoPaginator:
         if url is None:
             return False
         
-        # Get the next page of items
+        # Get the next page of items, keeping the position on the current page until it arrives
         response = self.connector.get(url)
+        if not isinstance(response, dict):
+            self.fail(url)
+        self.page_url = url
 
         # Set the response for the paginator
         self.set(response)
@@ -125,16 +358,112 @@ class AkeneoPaginator:
         Returns:
             iterator: An iterator for the items in the response.
         """
+        if self.finished:
+            return
+
+        if self.stream:
+            yield from self.iter_stream()
+            return
+
         if len(self.items) == 0:
             self.init()
 
-        index = 0
+        # Skip the items consumed before the position was restored
+        index = self.offset = self.resume_offset
+        self.resume_offset = 0
+        if index > 0 and index >= len(self.items) and self.next():
+            index = 0
+
+        profiler = self.profiler
         while index < len(self.items):
-            yield self.items[index]
+            if profiler is None:
+                yield self.items[index]
+            else:
+                mark = profiler.mark()
+                yield self.items[index]
+                profiler.add_caller(mark)
+
             index += 1
-            if index == len(self.items) and self.next():
-                index = 0
+            self.consumed(index)
+            if index == len(self.items):
+                if profiler is not None:
+                    profiler.page_done()
+                if self.next():
+                    index = 0
+
+        self.complete()
     
+    def iter_stream(self):
+        """
+        Yields the items page by page, decoding each item while the page is downloaded.
+
+        Returns:
+            iterator: An iterator for the items.
+        """
+        url = self.links['self']
+        while url is not None:
+            self.page_url = url
+            page = self.connector.get_stream(url)
+            if page is None:
+                self.fail(url)
+            self.page_count += 1
+
+            # Skip the items consumed before the position was restored
+            skip = self.offset = self.resume_offset
+            self.resume_offset = 0
+            if self.profiler is None:
+                for index, item in enumerate(page, start=1):
+                    if index <= skip:
+                        continue
+                    yield self.wrap(item)
+                    self.consumed(index)
+            else:
+                yield from self.iter_profiled(page, skip)
+
+            # Move on to the next page
+            self.response = page.envelope
+            self.set_links(page.envelope)
+            self.offset = 0
+            url = self.links['next']
+
+        self.complete()
+
+    def iter_profiled(self, page, skip: int):
+        """
+        Yields the items of a streamed page, recording the time spent per phase.
+
+        Args:
+            page (PageStream): The streamed page.
+            skip (int): The number of items to skip.
+
+        Returns:
+            iterator: An iterator for the items.
+        """
+        profiler = self.profiler
+        items = iter(page)
+        index = 0
+        while True:
+            started = time.perf_counter()
+            item = next(items, None)
+            profiler.add('stream', time.perf_counter() - started)
+            if item is None:
+                break
+
+            index += 1
+            if index <= skip:
+                continue
+
+            started = time.perf_counter()
+            item = self.wrap(item)
+            profiler.add('construct', time.perf_counter() - started)
+
+            mark = profiler.mark()
+            yield item
+            profiler.add_caller(mark)
+            self.consumed(index)
+
+        profiler.page_done()
+
     def __len__(self):
         """
         Returns the number of items in the response.
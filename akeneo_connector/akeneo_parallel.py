@@ -0,0 +1,164 @@
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_product import AkeneoProduct
+
+
+class MapResult:
+    """
+    The outcome of applying a function to one product.
+
+    Attributes:
+        index (int): The position of the item in the input.
+        identifier (str): The identifier of the product.
+        value (any): The return value of the function. None if it failed.
+        error (Exception): The exception raised while fetching or processing the product. None if it succeeded.
+        elapsed (float): The seconds spent fetching and processing the product.
+    """
+
+    def __init__(self, index: int, identifier: str | None, value = None, error: Exception | None = None, elapsed: float = 0.0):
+        self.index = index
+        self.identifier = identifier
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        outcome = f"error={self.error!r}" if self.error is not None else f"value={self.value!r}"
+        return f"MapResult({self.identifier!r}, {outcome})"
+
+
+def _identifier_of(item) -> str | None:
+    """
+    Gets the identifier of an input item.
+    """
+    if isinstance(item, AkeneoProduct):
+        return item.identifier
+    if isinstance(item, dict):
+        return item.get('identifier')
+    return item
+
+
+def _apply(fn: Callable, item, index: int, connector: AkeneoConnector) -> MapResult:
+    """
+    Fetches a product if needed and applies the function to it, capturing any error.
+    """
+    identifier = _identifier_of(item)
+    started = time.perf_counter()
+    try:
+        if isinstance(item, AkeneoProduct):
+            product = item
+        elif isinstance(item, dict):
+            product = AkeneoProduct(item, connector=connector)
+        else:
+            product = AkeneoProduct(connector=connector).get(item)
+            if product is None:
+                raise LookupError(f"Product not found: {item}")
+
+        return MapResult(index, identifier, value=fn(product), elapsed=time.perf_counter() - started)
+    except Exception as e:
+        return MapResult(index, identifier, error=e, elapsed=time.perf_counter() - started)
+
+
+def imap_products(
+        fn: Callable[[AkeneoProduct], any],
+        items: Iterable,
+        workers: int = 8,
+        connector: AkeneoConnector | None = None,
+        max_in_flight: int | None = None,
+        ordered: bool = True
+    ) -> Iterator[MapResult]:
+    """
+    Applies a function to products in a pool of threads, yielding a result per product.
+
+    Identifiers are fetched with `AkeneoProduct.get` in the worker threads, while
+    products and raw items (e.g. from an AkeneoPaginator) are passed on as they are.
+    All workers share one connector and its connection pool. The input is consumed
+    lazily and at most `max_in_flight` items are queued or running, so a slow
+    function holds back the paginator instead of filling memory.
+
+    Errors are captured per item, so one failing product does not stop the others.
+    Formatting sets the process locale, so format values in a single locale per map.
+
+    Args:
+        fn (callable): Called with an AkeneoProduct. Its return value is the value of the result.
+        items (iterable): Identifiers, AkeneoProduct objects, raw product dictionaries, or an AkeneoPaginator.
+        workers (int): The number of worker threads. Keep it at most the connection pool size of the transport.
+        connector (AkeneoConnector): The connector to fetch products with. The paginator's connector, or a new one, if None.
+        max_in_flight (int): The maximum number of items queued or running. Twice the number of workers if None.
+        ordered (bool): Whether to yield results in input order, rather than as they complete.
+
+    Returns:
+        iterator: An iterator for the MapResult of every item.
+    """
+    if workers < 1:
+        raise ValueError(f"Invalid number of workers: {workers}. Must be at least 1.")
+
+    if connector is None:
+        connector = getattr(items, 'connector', None) or AkeneoConnector()
+    max_in_flight = max(max_in_flight or workers * 2, workers)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='akeneo-map')
+    pending = deque()
+
+    def collect():
+        # Yield the next result in input order, or the results that completed first
+        if ordered:
+            yield pending.popleft().result()
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield future.result()
+
+    try:
+        for index, item in enumerate(items):
+            # Wait for room before taking the next item
+            if len(pending) >= max_in_flight:
+                yield from collect()
+
+            pending.append(executor.submit(_apply, fn, item, index, connector))
+
+        while pending:
+            yield from collect()
+    finally:
+        # Drop queued items when the caller stops early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def map_products(
+        fn: Callable[[AkeneoProduct], any],
+        items: Iterable,
+        workers: int = 8,
+        connector: AkeneoConnector | None = None,
+        max_in_flight: int | None = None
+    ) -> list[MapResult]:
+    """
+    Applies a function to products in a pool of threads, see `imap_products`.
+
+    Example:
+        def rename(product):
+            product.set_value('name', 'en_US', data=product.get_value('name', 'en_US').title())
+            return product.update()
+
+        results = map_products(rename, ['1001', '1002', '1003'], workers=8)
+        failed = [result for result in results if not result.ok]
+
+    Args:
+        fn (callable): Called with an AkeneoProduct. Its return value is the value of the result.
+        items (iterable): Identifiers, AkeneoProduct objects, raw product dictionaries, or an AkeneoPaginator.
+        workers (int): The number of worker threads.
+        connector (AkeneoConnector): The connector to fetch products with.
+        max_in_flight (int): The maximum number of items queued or running.
+
+    Returns:
+        list: The MapResult of every item, in input order.
+    """
+    return list(imap_products(fn, items, workers=workers, connector=connector, max_in_flight=max_in_flight))
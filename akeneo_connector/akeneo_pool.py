@@ -0,0 +1,244 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_parallel import MapResult
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_resilience import RateLimitedTransport
+from akeneo_connector.akeneo_transport import RequestsTransport
+
+
+def tenant_prefix(tenant: str) -> str:
+    """
+    Builds the environment variable prefix of a tenant, e.g. 'AKENEO_BRAND_A_' for 'brand-a'.
+    """
+    return 'AKENEO_' + re.sub(r'[^A-Za-z0-9]+', '_', tenant).upper().strip('_') + '_'
+
+
+class AkeneoConnectorPool:
+    """
+    The AkeneoConnectorPool class keeps a connector per tenant, for services that
+    sync several Akeneo instances (e.g. one per brand) from one process.
+
+    Every tenant has its own credentials, read from its own environment variables
+    (AKENEO_<TENANT>_ORIGIN, ...) unless given, its own access token, connection
+    pool, rate limit and metrics. Connectors are created on first use. `fan_out`
+    runs the same crawl or update for all tenants at the same time.
+
+    The unprefixed AKENEO_* variables are never used for a tenant, so a tenant that
+    is not fully configured fails instead of talking to another tenant's server.
+
+    Attributes:
+        tenants (dict): The connector options by tenant.
+        connectors (dict): The connectors created so far, by tenant.
+        defaults (dict): The connector options shared by all tenants.
+    """
+
+    def __init__(self, tenants: dict | list[str] | None = None, rate_limit: float | None = None, pool_size: int = 32, **defaults):
+        """
+        Initializes an instance of the AkeneoConnectorPool class.
+
+        Args:
+            tenants (dict | list): The connector options by tenant, or the names of tenants configured with environment
+                variables. The comma-separated AKENEO_TENANTS variable if None.
+            rate_limit (float): The maximum number of requests per second per tenant. Unlimited if None.
+            pool_size (int): The maximum number of connections kept open per tenant.
+            **defaults: Connector options shared by all tenants, e.g. `retries` or `log_requests`.
+        """
+        if tenants is None:
+            tenants = [name.strip() for name in os.getenv('AKENEO_TENANTS', '').split(',') if name.strip()]
+        if not isinstance(tenants, dict):
+            tenants = {name: {} for name in tenants}
+
+        defaults.setdefault('metrics', True)
+        defaults['rate_limit'] = rate_limit
+        defaults['pool_size'] = pool_size
+        self.defaults = defaults
+        self.lock = threading.Lock()
+        self.tenants = {}
+        self.connectors = {}
+        self.tenant_locks = {}
+        for name, options in tenants.items():
+            self.add(name, **options)
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def __contains__(self, tenant: str):
+        return tenant in self.tenants
+
+    def __iter__(self):
+        return iter(list(self.tenants))
+
+    def __getitem__(self, tenant: str) -> AkeneoConnector:
+        return self.get(tenant)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, tenant: str, connector: AkeneoConnector | None = None, **options):
+        """
+        Registers a tenant.
+
+        Args:
+            tenant (str): The name of the tenant.
+            connector (AkeneoConnector): A connector to use for the tenant, instead of creating one.
+            **options: AkeneoConnector options replacing the shared ones, plus 'prefix' (the environment variable
+                prefix, AKENEO_<TENANT>_ by default), 'rate_limit' and 'pool_size'.
+        """
+        with self.lock:
+            self.tenants[tenant] = options
+            if connector is not None:
+                self.connectors[tenant] = connector
+
+    def get(self, tenant: str) -> AkeneoConnector:
+        """
+        Gets the connector of a tenant, creating it the first time.
+
+        Args:
+            tenant (str): The name of the tenant.
+
+        Returns:
+            AkeneoConnector: The connector.
+        """
+        if tenant not in self.tenants:
+            raise KeyError(f"Unknown tenant: {tenant}. Choose one of {', '.join(self.tenants)}.")
+
+        with self.lock:
+            if tenant in self.connectors:
+                return self.connectors[tenant]
+            tenant_lock = self.tenant_locks.setdefault(tenant, threading.Lock())
+
+        # Authenticate one tenant at a time, without holding up the other tenants
+        with tenant_lock:
+            if tenant not in self.connectors:
+                connector = self.create(tenant)
+                with self.lock:
+                    self.connectors[tenant] = connector
+            return self.connectors[tenant]
+
+    def create(self, tenant: str) -> AkeneoConnector:
+        """
+        Creates the connector of a tenant, with its own transport and rate limit.
+
+        Args:
+            tenant (str): The name of the tenant.
+
+        Returns:
+            AkeneoConnector: The connector.
+        """
+        options = dict(self.defaults, **self.tenants[tenant])
+        prefix = options.pop('prefix', None) or tenant_prefix(tenant)
+        rate_limit = options.pop('rate_limit')
+        pool_size = options.pop('pool_size')
+
+        if options.get('transport') is None:
+            options['transport'] = RequestsTransport(pool_size=pool_size)
+        if rate_limit is not None:
+            options['transport'] = RateLimitedTransport(options['transport'], rate=rate_limit)
+
+        return AkeneoConnector.from_env(prefix, **options)
+
+    def paginator(self, tenant: str, url: str | None = None, **options) -> AkeneoPaginator:
+        """
+        Creates a paginator for a tenant.
+
+        Args:
+            tenant (str): The name of the tenant.
+            url (str): The URL to paginate through. The products URL of the tenant if None.
+            **options: Other AkeneoPaginator options.
+
+        Returns:
+            AkeneoPaginator: The paginator.
+        """
+        return AkeneoPaginator(url, connector=self.get(tenant), **options)
+
+    def fan_out(self, fn: Callable[[str, AkeneoConnector], any], tenants: list[str] | None = None, workers: int | None = None) -> dict[str, MapResult]:
+        """
+        Runs a function for several tenants at the same time, e.g. the same crawl or update.
+
+        Example:
+            def count_products(tenant, connector):
+                return sum(1 for _ in AkeneoPaginator(connector=connector, page_size=100))
+
+            results = pool.fan_out(count_products)
+            counts = {tenant: result.value for tenant, result in results.items() if result.ok}
+
+        Args:
+            fn (callable): Called with the name and the connector of every tenant.
+            tenants (list): The tenants to run the function for. All tenants if None.
+            workers (int): The number of tenants run at the same time. All at once if None.
+
+        Returns:
+            dict: The MapResult by tenant, with the return value or the error (including connection errors).
+        """
+        tenants = list(self.tenants) if tenants is None else tenants
+
+        def run(index: int, tenant: str) -> MapResult:
+            started = time.perf_counter()
+            try:
+                return MapResult(index, tenant, value=fn(tenant, self.get(tenant)), elapsed=time.perf_counter() - started)
+            except Exception as e:
+                return MapResult(index, tenant, error=e, elapsed=time.perf_counter() - started)
+
+        if not tenants:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=workers or len(tenants), thread_name_prefix='akeneo-tenant') as executor:
+            futures = [executor.submit(run, index, tenant) for index, tenant in enumerate(tenants)]
+            return {tenant: future.result() for tenant, future in zip(tenants, futures)}
+
+    def metrics(self) -> dict:
+        """
+        Returns the metrics of every tenant with a connector.
+
+        Returns:
+            dict: The metrics summary by tenant.
+        """
+        with self.lock:
+            connectors = dict(self.connectors)
+        return {tenant: connector.metrics.summary() for tenant, connector in connectors.items() if connector.metrics is not None}
+
+    def to_prometheus(self, prefix: str = 'akeneo') -> str:
+        """
+        Returns the metrics of all tenants in the Prometheus text format, labeled by tenant.
+
+        Args:
+            prefix (str): The prefix of the metric names.
+
+        Returns:
+            str: The metrics.
+        """
+        with self.lock:
+            connectors = dict(self.connectors)
+
+        # Every export lists the same metrics in the same order: merge the samples of every metric
+        families = []
+        for tenant, connector in connectors.items():
+            if connector.metrics is None:
+                continue
+            blocks = connector.metrics.to_prometheus(prefix=prefix, labels={'tenant': tenant}).strip('\n').split('# HELP ')[1:]
+            for index, block in enumerate(blocks):
+                help, type, *samples = block.split('\n')
+                if index == len(families):
+                    families.append(['# HELP ' + help, type])
+                families[index].extend(sample for sample in samples if sample)
+
+        return ''.join(line + '\n' for family in families for line in family)
+
+    def close(self):
+        """
+        Closes the connectors of all tenants.
+        """
+        with self.lock:
+            connectors = list(self.connectors.values())
+            self.connectors = {}
+        for connector in connectors:
+            connector.close()
@@ -1,3 +1,4 @@
+import time
 from typing import TypedDict, Optional
 
 from akeneo_connector.akeneo_connector import AkeneoConnector
@@ -244,8 +245,16 @@ class AkeneoProduct:
         # Get linked data
         linked_data = self.get_linked_data(attribute, locale, scope, with_fallback=True)
 
-        # Return formatted value
-        return format_value(value, locale, linked_data)
+        # Return formatted value, resolving option labels through the option cache of the connector
+        option_cache = self.connector.option_cache
+        profiler = self.connector.profiler
+        if profiler is None:
+            return format_value(value, locale, linked_data, attribute, option_cache)
+
+        started = time.perf_counter()
+        formatted = format_value(value, locale, linked_data, attribute, option_cache)
+        profiler.add('format', time.perf_counter() - started)
+        return formatted
             
     def get_href(self, attribute: str, locale: str | None = None, scope: str | None = None) -> str | None:
         """
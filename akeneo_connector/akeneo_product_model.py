@@ -0,0 +1,260 @@
+import threading
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_product import AkeneoProduct
+
+
+class AkeneoProductModel(AkeneoProduct):
+    """
+    A class to represent an Akeneo product model, the root or sub-model a variant product inherits values from.
+
+    Attributes:
+        code (str): The code of the product model.
+        family_variant (str): The family variant of the product model.
+        parent (str): The code of the parent product model. Empty for root product models.
+        values (dict): The values set on this level of the product model.
+    """
+
+    def set(self, data: dict):
+        """
+        Sets the data of the product model.
+
+        Args:
+            data (dict): The data of the product model.
+        """
+        super().set(data)
+        self.code = data.get('code')
+        self.family_variant = data.get('family_variant')
+
+    def payload(self):
+        """
+        Returns a dictionary representation of the product model.
+
+        Returns:
+            dict: A dictionary representation of the product model.
+        """
+        return {
+            'code': self.code,
+            'values': self.updated_values,
+        }
+
+    def get(self, code: str | None = None, with_attribute_options: bool = False):
+        """
+        Retrieves the product model data.
+
+        Args:
+            code (str): The code of the product model.
+
+        Returns:
+            AkeneoProductModel: The product model with data. None if not found.
+        """
+        # Use the code if provided
+        if code is None:
+            code = self.code
+
+        # Failsafe
+        if code is None:
+            return None
+
+        # Build the URL
+        url = self.connector.product_model_url.format(code=code)
+        if with_attribute_options:
+            url += "?with_attribute_options=true"
+
+        # Get the product model
+        data = self.connector.get(url)
+        if isinstance(data, dict):
+            self.set(data)
+            return self
+
+        return None
+
+    def update(self, is_new = False):
+        """
+        Updates the product model.
+
+        Returns:
+            bool: JSON response if successful, None otherwise.
+        """
+        url = self.connector.product_model_url.format(code=self.code)
+        return self.connector.update(url, self.payload(), is_new=is_new)
+
+
+class AkeneoModelCache:
+    """
+    The AkeneoModelCache class keeps the product models that products inherit values
+    from, so every model is fetched only once, however many variants share it.
+
+    Parents seen during a crawl are fetched in bulk, 100 per request, together with
+    their own parents. `merged_values` combines the values of a product with the
+    values it inherits from its sub-model and root model.
+
+    Attributes:
+        connector (AkeneoConnector): The Akeneo connector to use.
+        models (dict): The product models by code. None for codes that were not found.
+        page_size (int): The number of product models per bulk request.
+        requests (int): The number of requests made to fetch product models.
+    """
+
+    def __init__(self, connector: AkeneoConnector | None = None, page_size: int = 100):
+        """
+        Initializes an instance of the AkeneoModelCache class.
+
+        Args:
+            connector (AkeneoConnector): The Akeneo connector to use.
+            page_size (int): The number of product models per bulk request (1 to 100).
+        """
+        if connector is None:
+            self.connector = AkeneoConnector()
+        else:
+            self.connector = connector
+
+        self.page_size = page_size
+        self.models = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.code_locks = {}
+
+    def __len__(self):
+        return sum(1 for model in self.models.values() if model is not None)
+
+    def __contains__(self, code: str):
+        return code in self.models
+
+    def add(self, model: AkeneoProductModel | dict):
+        """
+        Adds a product model, e.g. one seen while crawling the product models.
+
+        Args:
+            model (AkeneoProductModel | dict): The product model.
+        """
+        if isinstance(model, dict):
+            model = AkeneoProductModel(model, connector=self.connector)
+        with self.lock:
+            self.models[model.code] = model
+
+    def get(self, code: str | None) -> AkeneoProductModel | None:
+        """
+        Gets a product model, fetching it once if it is not cached.
+
+        Args:
+            code (str): The code of the product model.
+
+        Returns:
+            AkeneoProductModel: The product model. None if not found.
+        """
+        if not code:
+            return None
+
+        with self.lock:
+            if code in self.models:
+                return self.models[code]
+            code_lock = self.code_locks.setdefault(code, threading.Lock())
+
+        # Let one thread fetch the model while the others wait for it
+        with code_lock:
+            if code in self.models:
+                return self.models[code]
+
+            model = AkeneoProductModel(connector=self.connector).get(code)
+            with self.lock:
+                self.models[code] = model
+                self.requests += 1
+                self.code_locks.pop(code, None)
+            return model
+
+    def prefetch(self, codes):
+        """
+        Fetches the product models that are not cached yet, and their parents, in bulk.
+
+        Args:
+            codes (iterable): The codes of the product models, e.g. the parents of a page of products.
+        """
+        from akeneo_connector.akeneo_paginator import AkeneoPaginator
+        from akeneo_connector.akeneo_search import AkeneoSearch
+
+        missing = sorted({code for code in codes if code and code not in self.models})
+        while missing:
+            parents = set()
+            for start in range(0, len(missing), self.page_size):
+                chunk = missing[start:start + self.page_size]
+                search = AkeneoSearch().add('code', 'IN', chunk)
+                paginator = AkeneoPaginator(self.connector.product_models_url, page_size=self.page_size, search=search, connector=self.connector)
+
+                found = {}
+                for model in paginator:
+                    found[model.code] = model
+                    if model.parent:
+                        parents.add(model.parent)
+
+                with self.lock:
+                    self.requests += paginator.page_count
+                    self.models.update(found)
+                    # Remember models that do not exist, so they are not fetched again
+                    for code in chunk:
+                        self.models.setdefault(code, None)
+
+            missing = sorted(code for code in parents if code not in self.models)
+
+    def ancestors(self, item: AkeneoProduct) -> list[AkeneoProductModel]:
+        """
+        Gets the product models a product or product model inherits from.
+
+        Args:
+            item (AkeneoProduct): The product or product model.
+
+        Returns:
+            list: The parent first, then its parent.
+        """
+        ancestors = []
+        seen = set()
+        code = item.parent
+        while code and code not in seen:
+            seen.add(code)
+            model = self.get(code)
+            if model is None:
+                break
+            ancestors.append(model)
+            code = model.parent
+
+        return ancestors
+
+    def merged_values(self, item: AkeneoProduct) -> dict:
+        """
+        Merges the values of a product or product model with the values it inherits.
+
+        Values are merged per attribute, locale and scope, so values of the item
+        take precedence over values of its sub-model, which take precedence over
+        values of the root model.
+
+        Args:
+            item (AkeneoProduct): The product or product model.
+
+        Returns:
+            dict: The merged values by attribute code.
+        """
+        merged = {}
+        for level in reversed([item] + self.ancestors(item)):
+            for attribute, values in level.values.items():
+                by_key = {(value.get('locale'), value.get('scope')): value for value in merged.get(attribute, [])}
+                for value in values:
+                    by_key[(value.get('locale'), value.get('scope'))] = value
+                merged[attribute] = list(by_key.values())
+
+        return merged
+
+    def resolve(self, item: AkeneoProduct) -> AkeneoProduct:
+        """
+        Returns a copy of a product or product model with all inherited values.
+
+        Args:
+            item (AkeneoProduct): The product or product model.
+
+        Returns:
+            AkeneoProduct: The copy, with the merged values.
+        """
+        resolved = type(item)({}, connector=item.connector)
+        resolved.__dict__.update(item.__dict__)
+        resolved.values = self.merged_values(item)
+        resolved.updated_values = {}
+        return resolved
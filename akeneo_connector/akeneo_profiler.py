@@ -0,0 +1,174 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AkeneoProfiler:
+    """
+    The AkeneoProfiler class records the wall time spent per phase of a crawl or sync.
+
+    Phases:
+        network: Sending requests and downloading responses.
+        decode: Decoding JSON responses.
+        stream: Downloading and decoding streamed pages, which are interleaved.
+        construct: Building AkeneoProduct objects from the decoded items.
+        format: Formatting values with `get_formatted_value`.
+        caller: The caller's own code, between two items of an iteration, excluding formatting.
+
+    Attributes:
+        totals (dict): The seconds spent per phase.
+        counts (dict): The number of measurements per phase.
+        pages (list): The seconds spent per phase for every completed page.
+        started (float): The time the profiler was started.
+    """
+    PHASES = ['network', 'decode', 'stream', 'construct', 'format', 'caller']
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Resets all measurements.
+        """
+        self.totals = dict.fromkeys(self.PHASES, 0.0)
+        self.counts = dict.fromkeys(self.PHASES, 0)
+        self.pages = []
+        self.page_start = dict(self.totals)
+        self.started = time.perf_counter()
+
+    def attach(self, connector):
+        """
+        Starts profiling the requests and decoding of a connector.
+
+        Args:
+            connector (AkeneoConnector): The connector to profile.
+        """
+        connector.profiler = self
+        connector.add_hook('request_end', self.handle)
+
+    def detach(self, connector):
+        """
+        Stops profiling a connector.
+
+        Args:
+            connector (AkeneoConnector): The connector to stop profiling.
+        """
+        connector.profiler = None
+        connector.remove_hook('request_end', self.handle)
+
+    def handle(self, event: dict):
+        """
+        Records the network time of a request.
+
+        Args:
+            event (dict): The 'request_end' event.
+        """
+        self.add('network', event['elapsed'])
+
+    def add(self, phase: str, seconds: float):
+        """
+        Adds time to a phase.
+
+        Args:
+            phase (str): The phase.
+            seconds (float): The seconds spent.
+        """
+        with self.lock:
+            self.totals[phase] += seconds
+            self.counts[phase] += 1
+
+    def mark(self) -> tuple[float, float]:
+        """
+        Marks the moment control is handed to the caller.
+
+        Returns:
+            tuple: The current time and the time spent formatting so far.
+        """
+        return time.perf_counter(), self.totals['format']
+
+    def add_caller(self, mark: tuple[float, float]):
+        """
+        Adds the time spent in the caller's code since a mark, excluding the formatting it did.
+
+        Args:
+            mark (tuple): The mark returned by `mark`.
+        """
+        started, formatted = mark
+        self.add('caller', time.perf_counter() - started - (self.totals['format'] - formatted))
+
+    @contextmanager
+    def phase(self, phase: str):
+        """
+        Measures the time spent in a block of code.
+
+        Args:
+            phase (str): The phase to add the time to.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def page_done(self):
+        """
+        Records the time spent per phase since the previous page was completed.
+        """
+        with self.lock:
+            self.pages.append({phase: self.totals[phase] - self.page_start[phase] for phase in self.PHASES})
+            self.page_start = dict(self.totals)
+
+    def report(self) -> dict:
+        """
+        Summarizes the measurements, overall and per page.
+
+        Returns:
+            dict: The wall time, the seconds and share per phase, and the mean and maximum seconds per page.
+        """
+        with self.lock:
+            wall = time.perf_counter() - self.started
+            measured = sum(self.totals.values())
+            phases = {
+                phase: {
+                    'seconds': self.totals[phase],
+                    'share': self.totals[phase] / wall if wall else 0.0,
+                    'count': self.counts[phase],
+                }
+                for phase in self.PHASES
+            }
+            per_page = {
+                phase: {
+                    'mean': sum(page[phase] for page in self.pages) / len(self.pages),
+                    'max': max(page[phase] for page in self.pages),
+                }
+                for phase in self.PHASES
+            } if self.pages else {}
+
+            return {
+                'wall': wall,
+                'unaccounted': max(wall - measured, 0.0),
+                'pages': len(self.pages),
+                'phases': phases,
+                'per_page': per_page,
+            }
+
+    def format_report(self) -> str:
+        """
+        Formats the summary as a table.
+
+        Returns:
+            str: The formatted summary.
+        """
+        report = self.report()
+        lines = [
+            f"Wall time: {report['wall']:.3f}s over {report['pages']} pages",
+            f"{'phase':<10} {'total (s)':>10} {'share':>7} {'page mean (s)':>14} {'page max (s)':>13}",
+        ]
+        for phase, stats in report['phases'].items():
+            if not stats['count']:
+                continue
+            page = report['per_page'].get(phase, {'mean': 0.0, 'max': 0.0})
+            lines.append(f"{phase:<10} {stats['seconds']:>10.3f} {stats['share']:>7.1%} {page['mean']:>14.4f} {page['max']:>13.4f}")
+        lines.append(f"{'other':<10} {report['unaccounted']:>10.3f} {report['unaccounted'] / report['wall'] if report['wall'] else 0:>7.1%}")
+        return '\n'.join(lines)
@@ -0,0 +1,412 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Iterable
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_json import collection_results
+from akeneo_connector.akeneo_product import AkeneoProduct
+
+
+# The product properties that are reconciled next to the values
+PROPERTIES = ['enabled', 'family', 'categories', 'groups', 'parent']
+
+
+def normalize(data):
+    """
+    Normalizes value data, so equal values hash the same however they were written.
+
+    Amounts are compared as numbers ('1.2500' equals 1.25), prices are sorted by
+    currency and lists of codes (multi-selects, categories) are sorted.
+
+    Args:
+        data (any): The data of a value or a property.
+
+    Returns:
+        any: The normalized data.
+    """
+    if isinstance(data, dict):
+        normalized = {key: normalize(value) for key, value in data.items()}
+        if 'amount' in normalized and normalized['amount'] is not None:
+            try:
+                normalized['amount'] = format(Decimal(str(normalized['amount'])).normalize(), 'f')
+            except InvalidOperation:
+                pass
+        return normalized
+
+    if isinstance(data, list):
+        items = [normalize(item) for item in data]
+        if all(isinstance(item, str) for item in items):
+            return sorted(items)
+        if all(isinstance(item, dict) and 'currency' in item for item in items):
+            return sorted(items, key=lambda item: str(item.get('currency')))
+        return items
+
+    if data == '':
+        return None
+
+    return data
+
+
+def digest(data) -> str:
+    """
+    Hashes normalized data.
+
+    Args:
+        data (any): The data.
+
+    Returns:
+        str: The hash.
+    """
+    encoded = json.dumps(normalize(data), sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def field_key(attribute: str, locale: str | None, scope: str | None) -> str:
+    """
+    Builds the key of a value: the attribute, locale and scope.
+    """
+    return f"{attribute}|{locale or ''}|{scope or ''}"
+
+
+def fingerprint(item: AkeneoProduct | dict) -> dict:
+    """
+    Hashes every value (per attribute, locale and scope) and property of a product.
+
+    Args:
+        item (AkeneoProduct | dict): The product, or a product payload with only the fields to compare.
+
+    Returns:
+        dict: The hash by field key. Properties are keyed as '@family', '@categories', ...
+    """
+    data = item if isinstance(item, dict) else item.__dict__
+    hashes = {}
+    for property in PROPERTIES:
+        if property in data:
+            hashes['@' + property] = digest(data[property] if data[property] != [] else None)
+
+    for attribute, values in (data.get('values') or {}).items():
+        for value in values:
+            hashes[field_key(attribute, value.get('locale'), value.get('scope'))] = digest(value.get('data'))
+
+    return hashes
+
+
+class FingerprintStore:
+    """
+    The FingerprintStore class keeps the last known hash of every value of every
+    product in a SQLite database.
+
+    Attributes:
+        path (str): The path of the database. ':memory:' for a temporary store.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        Initializes an instance of the FingerprintStore class.
+
+        Args:
+            path (str): The path of the database. ':memory:' for a temporary store.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints ('
+            'identifier TEXT NOT NULL, field TEXT NOT NULL, hash TEXT NOT NULL, '
+            'PRIMARY KEY (identifier, field)) WITHOUT ROWID'
+        )
+        self.db.commit()
+
+    def get_many(self, identifiers: list[str]) -> dict:
+        """
+        Gets the hashes of products.
+
+        Args:
+            identifiers (list): The identifiers of the products.
+
+        Returns:
+            dict: The hash by field, by identifier. Unknown products are left out.
+        """
+        hashes = {}
+        with self.lock:
+            for start in range(0, len(identifiers), 500):
+                chunk = identifiers[start:start + 500]
+                rows = self.db.execute(
+                    f"SELECT identifier, field, hash FROM fingerprints WHERE identifier IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for identifier, field, hash in rows:
+                    hashes.setdefault(identifier, {})[field] = hash
+        return hashes
+
+    def get(self, identifier: str) -> dict | None:
+        """
+        Gets the hashes of a product.
+
+        Args:
+            identifier (str): The identifier of the product.
+
+        Returns:
+            dict: The hash by field. None if the product is unknown.
+        """
+        return self.get_many([identifier]).get(identifier)
+
+    def replace(self, fingerprints: dict):
+        """
+        Replaces all hashes of products, e.g. with the products seen in a crawl.
+
+        Args:
+            fingerprints (dict): The hash by field, by identifier.
+        """
+        with self.lock, self.db:
+            self.db.executemany('DELETE FROM fingerprints WHERE identifier = ?', [(identifier,) for identifier in fingerprints])
+            self.db.executemany(
+                'INSERT INTO fingerprints (identifier, field, hash) VALUES (?, ?, ?)',
+                [(identifier, field, hash) for identifier, hashes in fingerprints.items() for field, hash in hashes.items()],
+            )
+
+    def update(self, fingerprints: dict):
+        """
+        Updates some hashes of products, e.g. with the values of a successful update.
+
+        Args:
+            fingerprints (dict): The hash by field, by identifier.
+        """
+        with self.lock, self.db:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO fingerprints (identifier, field, hash) VALUES (?, ?, ?)',
+                [(identifier, field, hash) for identifier, hashes in fingerprints.items() for field, hash in hashes.items()],
+            )
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(DISTINCT identifier) FROM fingerprints').fetchone()[0]
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        self.db.close()
+
+
+class ReconcileReport:
+    """
+    The outcome of a reconciliation.
+
+    Attributes:
+        seen (int): The number of desired products.
+        unchanged (int): The number of products without changes.
+        changed (int): The number of known products with changes.
+        unknown (int): The number of products without fingerprints, sent in full.
+        updated (int): The number of products Akeneo accepted.
+        failed (int): The number of products Akeneo rejected, or that could not be sent.
+        requests (int): The number of bulk requests.
+        errors (list): The identifier and message of every rejected product.
+    """
+
+    def __init__(self):
+        self.seen = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.unknown = 0
+        self.updated = 0
+        self.failed = 0
+        self.requests = 0
+        self.errors = []
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"ReconcileReport(seen={self.seen}, unchanged={self.unchanged}, changed={self.changed}, unknown={self.unknown}, updated={self.updated}, failed={self.failed})"
+
+
+class AkeneoReconciler:
+    """
+    The AkeneoReconciler class pushes a desired product state into Akeneo, sending
+    only the values that differ from the last known state.
+
+    The last known state is a hash per product value in a FingerprintStore, fed by
+    crawls (`observe`) and by successful updates, so deciding what changed needs no
+    request at all. Changes are sent with collection PATCH requests.
+
+    Attributes:
+        connector (AkeneoConnector): The Akeneo connector to use.
+        store (FingerprintStore): The last known hashes.
+        batch_size (int): The number of products per bulk request.
+        sink (callable): Sends a batch of payloads and returns the per-line results.
+    """
+
+    def __init__(
+            self,
+            connector: AkeneoConnector | None = None,
+            store: FingerprintStore | str | None = None,
+            batch_size: int = 100,
+            sink: Callable[[list[dict]], list[dict] | None] | None = None
+        ):
+        """
+        Initializes an instance of the AkeneoReconciler class.
+
+        Args:
+            connector (AkeneoConnector): The Akeneo connector to use.
+            store (FingerprintStore | str): The fingerprint store, or the path of its database. Temporary if None.
+            batch_size (int): The number of products per bulk request (at most 100).
+            sink (callable): Called with every batch of payloads instead of the collection PATCH of the connector.
+                Returns the per-line results ({'identifier', 'status_code', 'message'}), or None if the batch failed.
+        """
+        if connector is None and sink is None:
+            connector = AkeneoConnector()
+
+        self.connector = connector
+        self.store = store if isinstance(store, FingerprintStore) else FingerprintStore(store or ':memory:')
+        self.batch_size = batch_size
+        self.sink = sink if sink is not None else self.send
+
+    def observe(self, products: Iterable) -> int:
+        """
+        Records the current state of products, e.g. while crawling the catalog.
+
+        Args:
+            products (iterable): AkeneoProduct objects or raw products.
+
+        Returns:
+            int: The number of recorded products.
+        """
+        count = 0
+        batch = {}
+        for product in products:
+            identifier = product.get('identifier') if isinstance(product, dict) else product.identifier
+            batch[identifier] = fingerprint(product)
+            if len(batch) >= 1000:
+                self.store.replace(batch)
+                count += len(batch)
+                batch = {}
+
+        if batch:
+            self.store.replace(batch)
+            count += len(batch)
+        return count
+
+    def diff(self, desired: dict, known: dict | None) -> dict | None:
+        """
+        Computes the payload that changes a product into its desired state.
+
+        Args:
+            desired (dict): The desired product, with an 'identifier' and the properties and values to set.
+            known (dict): The last known hash by field. None if the product is unknown.
+
+        Returns:
+            dict: The payload with only the changed properties and values. None if nothing changed.
+        """
+        if known is None:
+            return desired
+
+        payload = {}
+        for property in PROPERTIES:
+            if property in desired and known.get('@' + property) != digest(desired[property] if desired[property] != [] else None):
+                payload[property] = desired[property]
+
+        values = {}
+        for attribute, entries in (desired.get('values') or {}).items():
+            changed = [
+                entry for entry in entries
+                if known.get(field_key(attribute, entry.get('locale'), entry.get('scope'))) != digest(entry.get('data'))
+            ]
+            if changed:
+                values[attribute] = changed
+        if values:
+            payload['values'] = values
+
+        if not payload:
+            return None
+
+        payload['identifier'] = desired['identifier']
+        return payload
+
+    def send(self, batch: list[dict]) -> list[dict] | None:
+        """
+        Sends a batch of payloads with a collection PATCH request.
+
+        Args:
+            batch (list): The payloads.
+
+        Returns:
+            list: The result of every line. None if the request failed.
+        """
+        return collection_results(self.connector.update(self.connector.products_url, batch))
+
+    def reconcile(self, desired: Iterable[dict], dry_run: bool = False) -> ReconcileReport:
+        """
+        Pushes the desired state of products, sending only what changed.
+
+        Args:
+            desired (iterable): The desired products, each with an 'identifier' and the properties and values to set.
+            dry_run (bool): Whether to only count the changes, without sending them.
+
+        Returns:
+            ReconcileReport: The outcome.
+        """
+        report = ReconcileReport()
+        pending = []
+
+        def flush():
+            # Look the batch up in the store at once, and send what changed
+            known = self.store.get_many([item['identifier'] for item in pending])
+            payloads = []
+            for item in pending:
+                payload = self.diff(item, known.get(item['identifier']))
+                if payload is None:
+                    report.unchanged += 1
+                    continue
+                if item['identifier'] in known:
+                    report.changed += 1
+                else:
+                    report.unknown += 1
+                payloads.append(payload)
+            pending.clear()
+
+            if not dry_run:
+                for start in range(0, len(payloads), self.batch_size):
+                    self.write(payloads[start:start + self.batch_size], report)
+
+        for item in desired:
+            report.seen += 1
+            pending.append(item)
+            if len(pending) >= self.batch_size * 10:
+                flush()
+        flush()
+
+        return report
+
+    def write(self, batch: list[dict], report: ReconcileReport):
+        """
+        Sends a batch of payloads and records the values Akeneo accepted.
+
+        Args:
+            batch (list): The payloads.
+            report (ReconcileReport): The report to count the outcome in.
+        """
+        report.requests += 1
+        results = self.sink(batch)
+        if results is None:
+            report.failed += len(batch)
+            report.errors.extend((payload['identifier'], 'Request failed') for payload in batch)
+            return
+
+        accepted = {}
+        by_identifier = {payload['identifier']: payload for payload in batch}
+        for result in results:
+            identifier = result.get('identifier')
+            if 200 <= int(result.get('status_code', 0)) < 300 and identifier in by_identifier:
+                accepted[identifier] = fingerprint(by_identifier[identifier])
+                report.updated += 1
+            else:
+                report.failed += 1
+                report.errors.append((identifier, result.get('message') or result.get('errors')))
+
+        self.store.update(accepted)
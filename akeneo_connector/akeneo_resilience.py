@@ -0,0 +1,350 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from akeneo_connector.akeneo_metrics import Histogram, endpoint_of
+from akeneo_connector.akeneo_transport import AkeneoTransport, get_transport
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to an endpoint whose circuit is open.
+
+    It is not one of the transport errors, so the connector does not retry it.
+    """
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_in:.1f}s.")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def _close_response(future):
+    """
+    Closes the response of a request that lost the race, releasing its connection.
+    """
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class HedgedTransport(AkeneoTransport):
+    """
+    The HedgedTransport class cuts tail latency of GET requests by sending a backup
+    request when the first one is slower than usual, keeping whichever answers first.
+
+    The backup is sent after a fixed `delay`, or after the `percentile` latency of
+    the endpoint once `min_samples` requests were observed, so only the slowest few
+    percent of requests are hedged. Hedging is limited to a `budget` share of the
+    requests, so a degraded server does not get twice the load. Other methods are
+    not idempotent and are sent once.
+
+    Attributes:
+        transport (AkeneoTransport): The transport that sends the requests.
+        delay (float): The fixed seconds to wait before hedging. None to use the percentile.
+        percentile (float): The latency percentile to wait before hedging, between 0 and 1.
+        initial_delay (float): The seconds to wait before hedging until enough requests were observed.
+        min_samples (int): The number of requests per endpoint to observe before using the percentile.
+        budget (float): The maximum share of requests that are hedged.
+        latencies (dict): The latency histogram by endpoint.
+        requests (int): The number of GET requests.
+        hedged (int): The number of backup requests sent.
+        hedge_wins (int): The number of times the backup answered first.
+    """
+    name = 'hedged'
+
+    def __init__(
+            self,
+            transport: str | AkeneoTransport | None = None,
+            delay: float | None = None,
+            percentile: float = 0.95,
+            initial_delay: float = 0.25,
+            min_samples: int = 20,
+            budget: float = 0.1,
+            max_workers: int = 64
+        ):
+        """
+        Initializes an instance of the HedgedTransport class.
+
+        Args:
+            transport (str | AkeneoTransport): The transport that sends the requests. A pooled RequestsTransport if None.
+            delay (float): The fixed seconds to wait before hedging. None to use the percentile.
+            percentile (float): The latency percentile to wait before hedging, between 0 and 1.
+            initial_delay (float): The seconds to wait before hedging until enough requests were observed.
+            min_samples (int): The number of requests per endpoint to observe before using the percentile.
+            budget (float): The maximum share of requests that are hedged.
+            max_workers (int): The maximum number of requests in flight. Keep it at most the connection pool size.
+        """
+        self.transport = get_transport(transport)
+        self.errors = self.transport.errors
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='akeneo-hedge')
+
+    def hedge_delay(self, endpoint: str) -> float:
+        """
+        Gets the seconds to wait for a request to an endpoint before hedging it.
+
+        Args:
+            endpoint (str): The endpoint, as returned by `endpoint_of`.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        if self.delay is not None:
+            return self.delay
+
+        histogram = self.latencies.get(endpoint)
+        if histogram is None or histogram.count < self.min_samples:
+            return self.initial_delay
+        return histogram.percentile(self.percentile)
+
+    def timed(self, endpoint: str, method: str, url: str, headers: dict | None, data, stream: bool):
+        """
+        Sends a request and records its latency.
+        """
+        started = time.perf_counter()
+        response = self.transport.request(method, url, headers=headers, data=data, stream=stream)
+        with self.lock:
+            self.latencies.setdefault(endpoint, Histogram()).observe(time.perf_counter() - started)
+        return response
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        if method.upper() != 'GET':
+            return self.transport.request(method, url, headers=headers, data=data, stream=stream)
+
+        endpoint = endpoint_of(url)
+        with self.lock:
+            self.requests += 1
+        primary = self.executor.submit(self.timed, endpoint, method, url, headers, data, stream)
+
+        # Most requests answer before the delay and are never hedged
+        done, _ = wait([primary], timeout=self.hedge_delay(endpoint))
+        if done:
+            return primary.result()
+
+        with self.lock:
+            allowed = self.hedged < self.budget * self.requests
+            if allowed:
+                self.hedged += 1
+        if not allowed:
+            return primary.result()
+
+        backup = self.executor.submit(self.timed, endpoint, method, url, headers, data, stream)
+        pending = [primary, backup]
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+
+                # Keep the first answer, and close the other once it arrives
+                for loser in pending:
+                    loser.add_done_callback(_close_response)
+                if future is backup:
+                    with self.lock:
+                        self.hedge_wins += 1
+                return future.result()
+
+        raise error
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.transport.close()
+
+
+class CircuitBreakerTransport(AkeneoTransport):
+    """
+    The CircuitBreakerTransport class fails fast on endpoints that are degraded,
+    instead of letting more callers block on them.
+
+    Every endpoint (e.g. 'products/{code}') has its own circuit. After
+    `failure_threshold` consecutive failures (transport errors, 5xx responses, or
+    calls slower than `slow_call`) the circuit opens and requests raise
+    CircuitOpenError without being sent. After `reset_timeout` seconds one trial
+    request is let through: the circuit closes if it succeeds, and opens again if
+    it fails.
+
+    Attributes:
+        transport (AkeneoTransport): The transport that sends the requests.
+        failure_threshold (int): The number of consecutive failures that opens a circuit.
+        reset_timeout (float): The seconds a circuit stays open before a trial request.
+        slow_call (float): The seconds after which a call counts as a failure. None to ignore latency.
+        failure_statuses (tuple): The response statuses that count as failures.
+        circuits (dict): The state of every endpoint: 'state', 'failures', 'opened_at' and 'trial'.
+        rejected (int): The number of requests that failed fast.
+    """
+    name = 'circuit'
+    FAILURE_STATUSES = (500, 502, 503, 504)
+
+    def __init__(
+            self,
+            transport: str | AkeneoTransport | None = None,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            slow_call: float | None = None,
+            failure_statuses: tuple = FAILURE_STATUSES
+        ):
+        """
+        Initializes an instance of the CircuitBreakerTransport class.
+
+        Args:
+            transport (str | AkeneoTransport): The transport that sends the requests. A pooled RequestsTransport if None.
+            failure_threshold (int): The number of consecutive failures that opens a circuit.
+            reset_timeout (float): The seconds a circuit stays open before a trial request.
+            slow_call (float): The seconds after which a call counts as a failure. None to ignore latency.
+            failure_statuses (tuple): The response statuses that count as failures.
+        """
+        self.transport = get_transport(transport)
+        self.errors = self.transport.errors
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.failure_statuses = failure_statuses
+        self.lock = threading.Lock()
+        self.circuits = {}
+        self.rejected = 0
+
+    def state(self, endpoint: str) -> str:
+        """
+        Gets the state of the circuit of an endpoint.
+
+        Args:
+            endpoint (str): The endpoint, as returned by `endpoint_of`.
+
+        Returns:
+            str: 'closed', 'open' or 'half_open'.
+        """
+        circuit = self.circuits.get(endpoint)
+        if circuit is None:
+            return 'closed'
+        if circuit['state'] == 'open' and time.monotonic() - circuit['opened_at'] >= self.reset_timeout:
+            return 'half_open'
+        return circuit['state']
+
+    def acquire(self, endpoint: str):
+        """
+        Checks that a request may be sent to an endpoint.
+
+        Raises:
+            CircuitOpenError: When the circuit is open, or another trial request is in flight.
+        """
+        with self.lock:
+            circuit = self.circuits.setdefault(endpoint, {'state': 'closed', 'failures': 0, 'opened_at': None, 'trial': False})
+            if circuit['state'] == 'closed':
+                return
+
+            # Let a single trial request through once the timeout has passed
+            retry_in = circuit['opened_at'] + self.reset_timeout - time.monotonic()
+            if retry_in <= 0 and not circuit['trial']:
+                circuit['trial'] = True
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError(endpoint, max(retry_in, 0.0))
+
+    def record(self, endpoint: str, failed: bool):
+        """
+        Records the outcome of a request to an endpoint, opening or closing its circuit.
+        """
+        with self.lock:
+            circuit = self.circuits[endpoint]
+            trial = circuit['trial']
+            circuit['trial'] = False
+            if not failed:
+                circuit.update(state='closed', failures=0, opened_at=None)
+                return
+
+            circuit['failures'] += 1
+            if trial or circuit['failures'] >= self.failure_threshold:
+                circuit.update(state='open', opened_at=time.monotonic())
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        endpoint = endpoint_of(url)
+        self.acquire(endpoint)
+
+        started = time.perf_counter()
+        try:
+            response = self.transport.request(method, url, headers=headers, data=data, stream=stream)
+        except BaseException:
+            self.record(endpoint, failed=True)
+            raise
+
+        slow = self.slow_call is not None and time.perf_counter() - started > self.slow_call
+        self.record(endpoint, failed=slow or response.status_code in self.failure_statuses)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class RateLimitedTransport(AkeneoTransport):
+    """
+    The RateLimitedTransport class keeps the request rate of a connector under a
+    limit with a token bucket, so one busy client does not exhaust the API quota.
+
+    Requests over the limit wait for their turn instead of failing, in the order
+    they arrive. Bursts of up to `burst` requests are sent without waiting.
+
+    Attributes:
+        transport (AkeneoTransport): The transport that sends the requests.
+        rate (float): The maximum number of requests per second.
+        burst (float): The maximum number of requests sent at once after an idle period.
+        waited (float): The total seconds requests waited for the limit.
+    """
+    name = 'rate_limited'
+
+    def __init__(self, transport: str | AkeneoTransport | None = None, rate: float = 10.0, burst: float | None = None):
+        """
+        Initializes an instance of the RateLimitedTransport class.
+
+        Args:
+            transport (str | AkeneoTransport): The transport that sends the requests. A pooled RequestsTransport if None.
+            rate (float): The maximum number of requests per second.
+            burst (float): The maximum number of requests sent at once after an idle period. The rate if None.
+        """
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}. Must be positive.")
+
+        self.transport = get_transport(transport)
+        self.errors = self.transport.errors
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.lock = threading.Lock()
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.waited = 0.0
+
+    def acquire(self):
+        """
+        Takes a token from the bucket, waiting until one is available.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            # Reserve the token now, and wait for it outside the lock
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+
+        if wait:
+            time.sleep(wait)
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        self.acquire()
+        return self.transport.request(method, url, headers=headers, data=data, stream=stream)
+
+    def close(self):
+        self.transport.close()
@@ -0,0 +1,165 @@
+import json
+import re
+
+
+CODE_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+def validate_codes(name: str, codes: list[str] | str | None) -> list[str] | None:
+    """
+    Validates a list of attribute, locale or channel codes.
+
+    Args:
+        name (str): The name of the parameter, used in error messages.
+        codes (list | str): The codes, as a list or a comma-separated string.
+
+    Returns:
+        list: The validated codes. None if no codes were given.
+    """
+    if codes is None:
+        return None
+
+    if isinstance(codes, str):
+        codes = codes.split(',')
+
+    codes = [code.strip() if isinstance(code, str) else code for code in codes]
+    for code in codes:
+        if not isinstance(code, str) or not CODE_PATTERN.match(code):
+            raise ValueError(f"Invalid {name}: {code!r}.")
+
+    if not codes:
+        raise ValueError(f"Empty {name} list.")
+
+    return codes
+
+
+class AkeneoSearch:
+    """
+    The AkeneoSearch class builds the `search` filter of Akeneo list endpoints.
+
+    Filters are keyed by property or attribute code, each with a list of conditions:
+    {"family": [{"operator": "IN", "value": ["shoes"]}]}. Conditions on different
+    properties, or several conditions on the same property, are all combined with AND.
+
+    Attributes:
+        filters (dict): The filters by property.
+    """
+    OPERATORS = {
+        '=', '!=', '<', '<=', '>', '>=',
+        'IN', 'NOT IN', 'IN OR UNCLASSIFIED', 'IN CHILDREN', 'NOT IN CHILDREN', 'UNCLASSIFIED',
+        'BETWEEN', 'NOT BETWEEN', 'SINCE LAST N DAYS',
+        'EMPTY', 'NOT EMPTY', 'CONTAINS', 'DOES NOT CONTAIN', 'STARTS WITH',
+        'GREATER THAN ON ALL LOCALES', 'GREATER OR EQUALS THAN ON ALL LOCALES',
+        'LOWER THAN ON ALL LOCALES', 'LOWER OR EQUALS THAN ON ALL LOCALES',
+    }
+    NO_VALUE_OPERATORS = {'EMPTY', 'NOT EMPTY', 'UNCLASSIFIED'}
+
+    def __init__(self, filters: dict | None = None):
+        """
+        Initializes an instance of the AkeneoSearch class.
+
+        Args:
+            filters (dict): The initial filters by property.
+        """
+        self.filters = {}
+        if filters is not None:
+            self.validate(filters)
+            for property, conditions in filters.items():
+                self.filters[property] = [dict(condition) for condition in conditions]
+
+    def add(self, property: str, operator: str, value = None, locale: str | None = None, scope: str | None = None, locales: list[str] | None = None):
+        """
+        Adds a condition on a property.
+
+        Args:
+            property (str): The property or attribute code to filter on.
+            operator (str): The operator, e.g. 'IN' or '>'.
+            value (any): The value to compare with. Not used by 'EMPTY' and 'NOT EMPTY'.
+            locale (str): The locale of a localizable attribute.
+            scope (str): The scope of a scopable attribute.
+            locales (list): The locales of the 'completeness' property.
+
+        Returns:
+            AkeneoSearch: The search itself, so conditions can be chained.
+        """
+        condition = {'operator': operator}
+        if value is not None:
+            condition['value'] = value
+        if locale is not None:
+            condition['locale'] = locale
+        if scope is not None:
+            condition['scope'] = scope
+        if locales is not None:
+            condition['locales'] = locales
+
+        self.validate({property: [condition]})
+        self.filters.setdefault(property, []).append(condition)
+        return self
+
+    def merge(self, other: 'AkeneoSearch | dict | None') -> 'AkeneoSearch':
+        """
+        Returns a new search with the conditions of both searches.
+
+        Args:
+            other (AkeneoSearch | dict): The search to merge with.
+
+        Returns:
+            AkeneoSearch: The merged search.
+        """
+        merged = AkeneoSearch(self.filters)
+        if other is None:
+            return merged
+
+        other = other.filters if isinstance(other, AkeneoSearch) else other
+        for property, conditions in AkeneoSearch(other).filters.items():
+            merged.filters.setdefault(property, []).extend(conditions)
+        return merged
+
+    @classmethod
+    def validate(cls, filters: dict):
+        """
+        Validates the structure of a search filter.
+
+        Args:
+            filters (dict): The filters by property.
+        """
+        if not isinstance(filters, dict):
+            raise ValueError("Search filters must be a dictionary of conditions by property.")
+
+        for property, conditions in filters.items():
+            if not isinstance(property, str) or not CODE_PATTERN.match(property):
+                raise ValueError(f"Invalid search property: {property!r}.")
+            if not isinstance(conditions, list) or not conditions:
+                raise ValueError(f"Conditions of search property {property} must be a non-empty list.")
+
+            for condition in conditions:
+                if not isinstance(condition, dict):
+                    raise ValueError(f"Invalid condition for search property {property}: {condition!r}.")
+                operator = condition.get('operator')
+                if operator not in cls.OPERATORS:
+                    raise ValueError(f"Invalid operator for search property {property}: {operator!r}.")
+                if operator not in cls.NO_VALUE_OPERATORS and 'value' not in condition:
+                    raise ValueError(f"Operator {operator} for search property {property} requires a value.")
+                if operator in ('IN', 'NOT IN', 'BETWEEN', 'NOT BETWEEN') and not isinstance(condition.get('value'), list):
+                    raise ValueError(f"Operator {operator} for search property {property} requires a list value.")
+
+    def to_dict(self) -> dict:
+        """
+        Returns the filters.
+
+        Returns:
+            dict: The filters by property.
+        """
+        return self.filters
+
+    def to_json(self) -> str:
+        """
+        Returns the filters as the JSON string used in the `search` query parameter.
+
+        Returns:
+            str: The JSON string.
+        """
+        return json.dumps(self.filters, separators=(',', ':'), ensure_ascii=False)
+
+    def __bool__(self) -> bool:
+        return bool(self.filters)
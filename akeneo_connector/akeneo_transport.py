@@ -0,0 +1,559 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlencode
+
+import requests as req
+from requests.adapters import HTTPAdapter
+
+from akeneo_connector.akeneo_checkpoint import read_json, write_json_atomic
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TransportError(Exception):
+    """
+    Raised when a transport cannot get a response, e.g. when a recorded response is missing.
+    """
+
+
+class Headers(dict):
+    """
+    Response headers with case-insensitive lookups.
+    """
+
+    def __init__(self, headers: dict | None = None):
+        super().__init__((key.lower(), value) for key, value in (headers or {}).items())
+
+    def __getitem__(self, key: str):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key: str, default=None):
+        return super().get(key.lower(), default)
+
+
+class TransportResponse:
+    """
+    A response held in memory, with the parts of the `requests` response the connector uses.
+
+    Attributes:
+        status_code (int): The HTTP status.
+        headers (Headers): The response headers.
+        content (bytes): The body.
+        url (str): The URL of the request.
+    """
+
+    def __init__(self, status_code: int, content: bytes = b'', headers: dict | None = None, url: str | None = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = Headers(headers)
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        """
+        Yields the body in chunks.
+
+        Args:
+            chunk_size (int): The size of the chunks.
+        """
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+def encode_body(data) -> bytes:
+    """
+    Encodes a request body the way `requests` sends it.
+
+    Args:
+        data (bytes | str | dict): The body. Dictionaries are form-encoded.
+
+    Returns:
+        bytes: The encoded body.
+    """
+    if data is None:
+        return b''
+    if isinstance(data, dict):
+        return urlencode(data).encode()
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    return bytes(data)
+
+
+class AkeneoTransport:
+    """
+    The AkeneoTransport class sends the HTTP requests of a connector.
+
+    Transports return responses with `status_code`, `headers`, `content`, `text`
+    and `iter_content`, and raise one of `errors` when no response is received, so
+    the connector can retry.
+
+    Attributes:
+        name (str): The name of the transport.
+        errors (tuple): The exceptions raised when a request fails without a response.
+    """
+    name = None
+    errors = (TransportError,)
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        """
+        Sends a request.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            headers (dict): The request headers.
+            data (bytes | str | dict): The body of the request. Dictionaries are form-encoded.
+            stream (bool): Whether to download the body while it is being read.
+
+        Returns:
+            Response: The response.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources of the transport, such as open connections.
+        """
+
+
+class RequestsTransport(AkeneoTransport):
+    """
+    The RequestsTransport class sends requests with a `requests` session, reusing
+    connections from a pool instead of opening one per request.
+
+    Attributes:
+        session (Session): The session.
+        timeout (float): The seconds to wait for a connection or response. None to wait forever.
+    """
+    name = 'requests'
+    errors = (req.RequestException,)
+
+    def __init__(self, pool_size: int = 32, timeout: float | None = None):
+        """
+        Initializes an instance of the RequestsTransport class.
+
+        Args:
+            pool_size (int): The maximum number of connections kept open per host.
+            timeout (float): The seconds to wait for a connection or response. None to wait forever.
+        """
+        self.timeout = timeout
+        self.session = req.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        return self.session.request(method, url, headers=headers, data=data, stream=stream, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class HttpxResponse:
+    """
+    Adapts an httpx response to the parts of the `requests` response the connector uses.
+
+    Attributes:
+        response (httpx.Response): The response.
+        status_code (int): The HTTP status.
+        headers (Headers): The response headers.
+        http_version (str): The negotiated protocol, e.g. 'HTTP/2' or 'HTTP/1.1'.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.http_version = response.http_version
+        self.url = str(response.url)
+
+    @property
+    def content(self) -> bytes:
+        return self.response.read()
+
+    @property
+    def text(self) -> str:
+        self.response.read()
+        return self.response.text
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        """
+        Yields the body in chunks while it is downloaded. The response is closed at the end.
+
+        Args:
+            chunk_size (int): The size of the chunks.
+        """
+        return self.response.iter_bytes(chunk_size)
+
+    def close(self):
+        self.response.close()
+
+
+class Http2Transport(AkeneoTransport):
+    """
+    The Http2Transport class sends requests with httpx over HTTP/2, multiplexing
+    concurrent requests from all threads over a single connection per host.
+
+    The protocol is negotiated with every server: when a server (or a proxy in front
+    of it) does not offer HTTP/2, requests fall back to HTTP/1.1 with a pool of
+    connections. Plain http:// URLs always use HTTP/1.1.
+
+    Attributes:
+        client (httpx.Client): The client.
+        versions (dict): The number of responses per negotiated protocol.
+    """
+    name = 'http2'
+
+    def __init__(self, max_connections: int = 32, timeout: float | None = None, http2: bool = True):
+        """
+        Initializes an instance of the Http2Transport class.
+
+        Args:
+            max_connections (int): The maximum number of connections per host when falling back to HTTP/1.1.
+            timeout (float): The seconds to wait for a connection or response. None to wait forever.
+            http2 (bool): Whether to offer HTTP/2. False to use httpx over HTTP/1.1 only.
+        """
+        if httpx is None:
+            raise ImportError("httpx is not installed: pip install akeneo_connector[http2]")
+
+        try:
+            self.client = httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                timeout=httpx.Timeout(timeout),
+            )
+        except ImportError:
+            raise ImportError("h2 is not installed: pip install akeneo_connector[http2]")
+
+        self.errors = (httpx.RequestError,)
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        # httpx form-encodes dictionaries, and takes raw bodies as content
+        body = {'data': data} if isinstance(data, dict) else {'content': data}
+        request = self.client.build_request(method, url, headers=headers, **body)
+        response = HttpxResponse(self.client.send(request, stream=stream))
+
+        with self.lock:
+            self.versions[response.http_version] = self.versions.get(response.http_version, 0) + 1
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+def is_token_request(method: str, url: str) -> bool:
+    """
+    Checks whether a request asks for an access token.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The URL of the request.
+
+    Returns:
+        bool: True for POST requests to a '/token' URL.
+    """
+    return method.upper() == 'POST' and url.split('?', 1)[0].endswith('/token')
+
+
+class MemoryTransport(AkeneoTransport):
+    """
+    The MemoryTransport class answers requests from memory, without any network.
+
+    Responses are looked up by method and URL, then by method and URL without its
+    query. Other requests go to `handler`, if given, and unrouted token requests get
+    `access_token`, so a connector can be created without a server. All other
+    requests get a 404.
+
+    Attributes:
+        routes (dict): The responses by (method, URL).
+        handler (callable): Called with the method, URL, headers and body of unrouted requests.
+        access_token (str): The access token returned for unrouted token requests.
+        requests (list): The (method, URL, body) of every request.
+    """
+    name = 'memory'
+
+    def __init__(self, handler = None, access_token: str = 'memory-token'):
+        """
+        Initializes an instance of the MemoryTransport class.
+
+        Args:
+            handler (callable): Called with the method, URL, headers and encoded body of requests
+                without a route. Returns a response, or a (status, body, headers) tuple.
+            access_token (str): The access token returned for unrouted token requests.
+        """
+        self.routes = {}
+        self.handler = handler
+        self.access_token = access_token
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def add(self, method: str, url: str, body = None, status: int = 200, headers: dict | None = None):
+        """
+        Adds a response.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL, with or without query.
+            body (bytes | str | dict | list): The body. Dictionaries and lists are encoded as JSON.
+            status (int): The HTTP status.
+            headers (dict): The response headers.
+        """
+        self.routes[(method.upper(), url)] = self.build(status, body, headers, url)
+
+    @staticmethod
+    def build(status: int, body = None, headers: dict | None = None, url: str | None = None) -> TransportResponse:
+        """
+        Builds a response.
+
+        Args:
+            status (int): The HTTP status.
+            body (bytes | str | dict | list): The body. Dictionaries and lists are encoded as JSON.
+            headers (dict): The response headers.
+            url (str): The URL of the request.
+
+        Returns:
+            TransportResponse: The response.
+        """
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        return TransportResponse(status, body or b'', headers, url)
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        body = encode_body(data)
+        with self.lock:
+            self.requests.append((method, url, body))
+
+        response = self.routes.get((method, url)) or self.routes.get((method, url.split('?', 1)[0]))
+        if response is not None:
+            return response
+
+        if self.handler is not None:
+            response = self.handler(method, url, headers or {}, body)
+            if isinstance(response, tuple):
+                response = self.build(*response, url=url)
+            if response is not None:
+                return response
+
+        if is_token_request(method, url):
+            return self.build(200, {'access_token': self.access_token, 'refresh_token': self.access_token, 'expires_in': 3600}, url=url)
+
+        return self.build(404, {'code': 404, 'message': f"No response for {method} {url}."}, url=url)
+
+
+class RecordReplayTransport(AkeneoTransport):
+    """
+    The RecordReplayTransport class records responses to a file and replays them.
+
+    Requests are matched on method, URL and a hash of the body. Repeated requests
+    replay their responses in the order they were recorded, repeating the last one.
+    Replaying needs no server and is deterministic, so it suits offline tests and
+    performance experiments.
+
+    Token requests are never recorded, as they carry credentials and return access
+    and refresh tokens. They are sent to `transport` when there is one, and answered
+    with `access_token` when only replaying.
+
+    Modes:
+        record: Send every request with `transport` and record the response.
+        replay: Only replay recorded responses. Unrecorded requests raise TransportError.
+        auto: Replay recorded responses, and record the others.
+
+    Attributes:
+        path (str): The path of the recording.
+        mode (str): 'record', 'replay' or 'auto'.
+        transport (AkeneoTransport): The transport that sends the requests that are recorded.
+        interactions (dict): The recorded responses by request key.
+        access_token (str): The access token returned for token requests when only replaying.
+    """
+    name = 'record'
+    MODES = ['record', 'replay', 'auto']
+
+    def __init__(self, path: str, mode: str = 'auto', transport: AkeneoTransport | None = None, access_token: str = 'replay-token'):
+        """
+        Initializes an instance of the RecordReplayTransport class.
+
+        Args:
+            path (str): The path of the recording. Loaded if it exists.
+            mode (str): 'record', 'replay' or 'auto'.
+            transport (AkeneoTransport): The transport that sends the requests that are recorded. A RequestsTransport if None.
+            access_token (str): The access token returned for token requests when only replaying.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid mode: {mode}. Choose one of {', '.join(self.MODES)}.")
+
+        self.path = path
+        self.mode = mode
+        self.access_token = access_token
+        self.transport = transport if transport is not None else (RequestsTransport() if mode != 'replay' else None)
+        self.errors = (TransportError,) + (self.transport.errors if self.transport is not None else ())
+        self.lock = threading.Lock()
+        self.positions = {}
+
+        recording = read_json(path) if mode != 'record' else None
+        self.interactions = {}
+        for interaction in (recording or {}).get('interactions', []):
+            self.interactions.setdefault(interaction['key'], []).append(interaction)
+
+    @staticmethod
+    def key(method: str, url: str, body: bytes) -> str:
+        """
+        Builds the key a request is matched on.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            body (bytes): The encoded body.
+
+        Returns:
+            str: The key.
+        """
+        return f"{method} {url} {hashlib.sha256(body).hexdigest()[:16] if body else '-'}"
+
+    def request(self, method: str, url: str, headers: dict | None = None, data = None, stream: bool = False):
+        # Keep credentials and tokens out of the recording
+        if is_token_request(method, url):
+            if self.transport is None:
+                return MemoryTransport.build(200, {'access_token': self.access_token, 'refresh_token': self.access_token, 'expires_in': 3600}, url=url)
+            return self.transport.request(method, url, headers=headers, data=data, stream=stream)
+
+        body = encode_body(data)
+        key = self.key(method, url, body)
+
+        if self.mode != 'record':
+            with self.lock:
+                recorded = self.interactions.get(key)
+                if recorded:
+                    position = self.positions.get(key, 0)
+                    self.positions[key] = position + 1
+                    return self.load(recorded[min(position, len(recorded) - 1)], url)
+
+            if self.mode == 'replay':
+                raise TransportError(f"No recorded response for {method} {url} in {self.path}.")
+
+        response = self.transport.request(method, url, headers=headers, data=data, stream=False)
+        interaction = self.dump(key, method, url, response)
+        with self.lock:
+            recorded = self.interactions.setdefault(key, [])
+            recorded.append(interaction)
+            self.positions[key] = len(recorded)
+        return self.load(interaction, url)
+
+    @staticmethod
+    def dump(key: str, method: str, url: str, response) -> dict:
+        """
+        Converts a response to a recorded interaction.
+
+        Args:
+            key (str): The key of the request.
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            response (Response): The response.
+
+        Returns:
+            dict: The interaction.
+        """
+        content = response.content
+        try:
+            body, encoding = content.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+
+        # Content-Length and Transfer-Encoding no longer apply to the replayed body
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in ('content-length', 'transfer-encoding', 'content-encoding', 'connection')
+        }
+        return {'key': key, 'method': method, 'url': url, 'status': response.status_code, 'headers': headers, 'encoding': encoding, 'body': body}
+
+    @staticmethod
+    def load(interaction: dict, url: str) -> TransportResponse:
+        """
+        Converts a recorded interaction to a response.
+
+        Args:
+            interaction (dict): The interaction.
+            url (str): The URL of the request.
+
+        Returns:
+            TransportResponse: The response.
+        """
+        body = interaction['body']
+        content = base64.b64decode(body) if interaction.get('encoding') == 'base64' else body.encode('utf-8')
+        headers = dict(interaction.get('headers') or {}, **{'Content-Length': str(len(content))})
+        return TransportResponse(interaction['status'], content, headers, url)
+
+    def save(self):
+        """
+        Atomically writes the recording to its file.
+        """
+        with self.lock:
+            interactions = [interaction for recorded in self.interactions.values() for interaction in recorded]
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        write_json_atomic(self.path, {'version': 1, 'interactions': interactions})
+
+    def close(self):
+        """
+        Saves the recording, unless only replaying, and closes the recording transport.
+        """
+        if self.mode != 'replay':
+            self.save()
+        if self.transport is not None:
+            self.transport.close()
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'memory': MemoryTransport,
+    'http2': Http2Transport,
+}
+
+
+def get_transport(transport: str | AkeneoTransport | None = None) -> AkeneoTransport:
+    """
+    Gets a transport.
+
+    Args:
+        transport (str | AkeneoTransport): The name of the transport ('requests', 'http2' or 'memory'), or a transport instance.
+            A pooled RequestsTransport if None.
+
+    Returns:
+        AkeneoTransport: The transport.
+    """
+    if isinstance(transport, AkeneoTransport):
+        return transport
+
+    if transport is None:
+        transport = 'requests'
+
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Invalid transport: {transport}. Choose one of {', '.join(TRANSPORTS)}.")
+
+    return TRANSPORTS[transport]()
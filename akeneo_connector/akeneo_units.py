@@ -110,10 +110,59 @@ ConnectionWordByLocale = {
     "de_DE": "und",
 }
 
+# Measurement families: the standard unit and the factor that converts every unit to it
+AkeneoMeasurementFamilies = {
+    'Weight': {
+        'standard': 'KILOGRAM',
+        'factors': {
+            'KILOGRAM': 1.0,
+            'GRAM': 0.001,
+            'MILLIGRAM': 0.000001,
+            'MICROGRAM': 0.000000001,
+            'TON': 1000.0,
+            'POUND': 0.45359237,
+            'OUNCE': 0.028349523125,
+        },
+    },
+    'Length': {
+        'standard': 'METER',
+        'factors': {
+            'MILLIMETER': 0.001,
+            'CENTIMETER': 0.01,
+            'METER': 1.0,
+            'KILOMETER': 1000.0,
+            'INCH': 0.0254,
+            'FOOT': 0.3048,
+            'YARD': 0.9144,
+        },
+    },
+    'Volume': {
+        'standard': 'LITER',
+        'factors': {
+            'MILLILITER': 0.001,
+            'CENTILITER': 0.01,
+            'LITER': 1.0,
+            'GALLON': 3.785411784,
+        },
+    },
+    'Count': {
+        'standard': 'PIECE',
+        'factors': {
+            'PIECE': 1.0,
+            'DOZEN': 12.0,
+        },
+    },
+}
+AkeneoUnitToFamily = {unit: family for family, definition in AkeneoMeasurementFamilies.items() for unit in definition['factors']}
+AkeneoUnitFactor = {unit: factor for definition in AkeneoMeasurementFamilies.values() for unit, factor in definition['factors'].items()}
 
-def format_value(value: str | dict, locale_name: str | None = None, linked_data: dict | None = {}) -> str:
+
+def format_value(value: str | dict, locale_name: str | None = None, linked_data: dict | None = {}, attribute: str | None = None, option_cache = None) -> str:
     """
     Format the value of an attribute.
+
+    Option labels are taken from the linked data or, when there is none, from the
+    option cache (an AkeneoOptionCache) for the given attribute.
     """
     if locale_name is None:
         locale_name = DefaultLocale
@@ -130,6 +179,10 @@ def format_value(value: str | dict, locale_name: str | None = None, linked_data:
     if isinstance(value, int) or isinstance(value, float):
         return format_number(value, locale_name)
 
+    # Take the option labels from the cache when the value came without linked data
+    if not linked_data and option_cache is not None and attribute is not None and isinstance(value, (str, list)):
+        linked_data = option_cache.linked_data(attribute, value)
+
     if isinstance(value, str):
         if "code" in linked_data and linked_data["code"] == value:
             # Get the label from the linked data
@@ -220,4 +273,83 @@ def format_number(number: int | float, locale_name: str | None = None) -> str:
         formatted_number = formatted_number.rstrip('0').rstrip('.').rstrip(',')
 
 
-    return formatted_number
\ No newline at end of file
+    return formatted_number
+
+
+def convert_amount(amount: str | int | float, unit: str, to_unit: str | None = None) -> float:
+    """
+    Converts an amount to another unit of the same measurement family.
+
+    Args:
+        amount (str | int | float): The amount, e.g. '500.0000' as returned by Akeneo.
+        unit (str): The unit of the amount, e.g. 'GRAM'.
+        to_unit (str): The unit to convert to. The standard unit of the family if None.
+
+    Returns:
+        float: The converted amount.
+    """
+    family = AkeneoUnitToFamily.get(unit)
+    if family is None:
+        raise ValueError(f"Unit {unit} cannot be converted.")
+
+    if to_unit is None:
+        to_unit = AkeneoMeasurementFamilies[family]['standard']
+    if AkeneoUnitToFamily.get(to_unit) != family:
+        raise ValueError(f"Unit {unit} cannot be converted to {to_unit}.")
+
+    return float(amount) * AkeneoUnitFactor[unit] / AkeneoUnitFactor[to_unit]
+
+
+def normalize_amounts(amounts, units, to_unit: str | None = None):
+    """
+    Converts arrays of amounts and units in one go, e.g. to sort or filter a whole catalog by weight. Requires numpy.
+
+    Amounts in units that cannot be converted (e.g. 'BOX', or another family than
+    `to_unit`) become NaN.
+
+    Args:
+        amounts (array-like): The amounts, as numbers or strings.
+        units (array-like): The unit of every amount.
+        to_unit (str): The unit to convert to. The standard unit of every amount's own family if None.
+
+    Returns:
+        numpy.ndarray: The converted amounts as float64.
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required to normalize amounts in batch: pip install akeneo_connector[numpy]")
+
+    amounts = numpy.asarray(amounts, dtype=numpy.float64)
+    units = numpy.asarray(units, dtype=object)
+    if amounts.shape != units.shape:
+        raise ValueError(f"Got {amounts.size} amounts for {units.size} units.")
+
+    if to_unit is not None and to_unit not in AkeneoUnitFactor:
+        raise ValueError(f"Unit {to_unit} cannot be converted.")
+    family = AkeneoUnitToFamily.get(to_unit)
+    target = AkeneoUnitFactor[to_unit] if to_unit is not None else 1.0
+
+    # Fill in the factor per known unit with vectorized comparisons, unknown units stay NaN
+    units = units.astype(str)
+    factors = numpy.full(units.shape, numpy.nan)
+    for unit, factor in AkeneoUnitFactor.items():
+        if family is None or AkeneoUnitToFamily[unit] == family:
+            factors[units == unit] = factor / target
+    return amounts * factors
+
+
+def normalize_metrics(values: list[dict | None], to_unit: str | None = None):
+    """
+    Converts metric values as returned by Akeneo in one go. Requires numpy.
+
+    Args:
+        values (list): The metric values ({'amount': '500', 'unit': 'GRAM'}). Missing values become NaN.
+        to_unit (str): The unit to convert to. The standard unit of every value's own family if None.
+
+    Returns:
+        numpy.ndarray: The converted amounts as float64.
+    """
+    amounts = [value['amount'] if value and value.get('amount') is not None else 'nan' for value in values]
+    units = [value.get('unit') if value else '' for value in values]
+    return normalize_amounts(amounts, units, to_unit=to_unit)
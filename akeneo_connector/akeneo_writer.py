@@ -0,0 +1,396 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Iterable
+
+from akeneo_connector.akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_json import collection_results
+
+
+class AkeneoBulkWriter:
+    """
+    The AkeneoBulkWriter class sends payloads with collection PATCH requests,
+    keeping throughput near what the server accepts without losing data.
+
+    The batch size adapts to the server: it grows while requests answer within
+    `target_latency`, shrinks when they are slower, and halves on 413 (payload too
+    large) and on 429 or 5xx responses, which are retried after a backoff that
+    honors Retry-After. Batches are also capped at `max_bytes`, which halves on 413
+    and grows back towards `max_bytes_limit` while requests succeed. Requests and
+    backoffs happen outside the lock, so threads that are only queuing payloads are
+    not blocked by them, and several threads can send batches at the same time.
+
+    Every line of a response has its own status. Lines that failed with a
+    retryable status are queued again; lines that failed for good, or ran out of
+    attempts, are appended to a dead-letter JSONL file with their status and
+    message, so they can be fixed and replayed later with `replay`.
+
+    Attributes:
+        connector (AkeneoConnector): The Akeneo connector to use.
+        url (str): The collection URL to send the payloads to.
+        dead_letter (str): The path of the dead-letter file. None to keep failures in `failures` instead.
+        batch_size (int): The current number of payloads per request.
+        min_batch_size (int): The smallest batch size.
+        max_batch_size (int): The largest batch size (Akeneo accepts at most 100).
+        max_bytes (int): The current maximum size of a request body in bytes.
+        max_bytes_limit (int): The largest maximum size of a request body in bytes.
+        target_latency (float): The request duration in seconds above which batches shrink.
+        max_attempts (int): The number of times a payload is sent before it goes to the dead-letter file.
+        failures (list): The failed lines, when there is no dead-letter file.
+        stats (dict): The number of payloads 'written', 'failed' and 'retried', and of 'requests', 'throttled' (429 and
+            5xx) and 'too_large' (413) responses.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+            self,
+            connector: AkeneoConnector | None = None,
+            url: str | None = None,
+            dead_letter: str | None = None,
+            batch_size: int = 50,
+            min_batch_size: int = 1,
+            max_batch_size: int = 100,
+            max_bytes: int = 4 * 1024 * 1024,
+            target_latency: float = 2.0,
+            max_attempts: int = 5,
+            backoff: float = 0.5,
+            max_backoff: float = 30.0
+        ):
+        """
+        Initializes an instance of the AkeneoBulkWriter class.
+
+        Args:
+            connector (AkeneoConnector): The Akeneo connector to use.
+            url (str): The collection URL to send the payloads to. The products URL if None.
+            dead_letter (str): The path of the dead-letter JSONL file. None to keep failures in memory.
+            batch_size (int): The initial number of payloads per request.
+            min_batch_size (int): The smallest batch size.
+            max_batch_size (int): The largest batch size (at most 100).
+            max_bytes (int): The maximum size of a request body in bytes.
+            target_latency (float): The request duration in seconds above which batches shrink.
+            max_attempts (int): The number of times a payload is sent before it goes to the dead-letter file.
+            backoff (float): The initial seconds to wait after a throttled request, doubled per consecutive failure.
+            max_backoff (float): The maximum seconds to wait after a throttled request.
+        """
+        if not 1 <= min_batch_size <= max_batch_size <= 100:
+            raise ValueError(f"Invalid batch sizes: {min_batch_size} to {max_batch_size}. Must be between 1 and 100.")
+
+        if connector is None:
+            self.connector = AkeneoConnector()
+        else:
+            self.connector = connector
+
+        self.url = url if url is not None else self.connector.products_url
+        self.dead_letter = dead_letter
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.batch_size = min(max(batch_size, min_batch_size), max_batch_size)
+        self.max_bytes = max_bytes
+        self.max_bytes_limit = max_bytes
+        self.target_latency = target_latency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.in_flight = 0
+        self.queue = deque()
+        self.queued_bytes = 0
+        self.consecutive_failures = 0
+        self.resume_at = 0.0
+        self.failures = []
+        self.stats = {'written': 0, 'failed': 0, 'retried': 0, 'requests': 0, 'throttled': 0, 'too_large': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def add(self, payload: dict):
+        """
+        Queues a payload, sending batches as they fill up.
+
+        Args:
+            payload (dict): The product (or other item) to update or create.
+        """
+        data = self.connector.codec.dumps(payload)
+        with self.lock:
+            self.queue.append([payload, data, 0])
+            self.queued_bytes += len(data) + 1
+        self.send_while(lambda: len(self.queue) >= self.batch_size or self.queued_bytes >= self.max_bytes)
+
+    def write(self, payloads: Iterable[dict]) -> dict:
+        """
+        Sends payloads, and waits until all of them are written or dead-lettered.
+
+        Args:
+            payloads (iterable): The payloads.
+
+        Returns:
+            dict: The stats.
+        """
+        for payload in payloads:
+            self.add(payload)
+        return self.flush()
+
+    def flush(self) -> dict:
+        """
+        Sends all queued payloads, and waits for the batches other threads are sending.
+
+        Returns:
+            dict: The stats.
+        """
+        self.send_while(lambda: self.queue or self.in_flight)
+        with self.lock:
+            return dict(self.stats)
+
+    def send_while(self, condition):
+        """
+        Sends batches while the condition holds. Requests and backoffs happen without holding the lock.
+
+        Args:
+            condition (callable): Checked with the lock held before every batch.
+        """
+        while True:
+            with self.lock:
+                # Batches in flight may come back to the queue
+                while condition() and not self.queue:
+                    self.changed.wait()
+                if not condition():
+                    return
+
+                wait = self.resume_at - time.monotonic()
+                batch = self.next_batch() if wait <= 0 else None
+                if batch:
+                    self.in_flight += 1
+                    self.stats['requests'] += 1
+
+            if batch:
+                self.send_batch(batch)
+            else:
+                time.sleep(wait)
+
+    def next_batch(self) -> list:
+        """
+        Takes the next batch from the queue, within the batch size and byte limit.
+        """
+        batch = []
+        size = 0
+        while self.queue and len(batch) < self.batch_size:
+            item = self.queue[0]
+            if batch and size + len(item[1]) + 1 > self.max_bytes:
+                break
+            batch.append(self.queue.popleft())
+            size += len(item[1]) + 1
+        self.queued_bytes -= size
+        return batch
+
+    def requeue(self, items: list):
+        """
+        Puts items back at the front of the queue, in their original order.
+        """
+        for item in reversed(items):
+            self.queue.appendleft(item)
+            self.queued_bytes += len(item[1]) + 1
+
+    def resize(self, batch_size: int):
+        """
+        Changes the batch size within its limits.
+        """
+        self.batch_size = min(max(batch_size, self.min_batch_size), self.max_batch_size)
+
+    def send_batch(self, batch: list):
+        """
+        Sends a batch taken from the queue, and handles the response of the request and of every line.
+
+        Every item of the batch is written, queued again or dead-lettered, whatever the request raises.
+        """
+        headers = {'Content-Type': 'application/vnd.akeneo.collection+json'}
+        handled = False
+        try:
+            # Throttling is handled here, so the connector must not retry it out of sight
+            started = time.perf_counter()
+            try:
+                response = self.connector.request('PATCH', self.url, headers=headers, data=b'\n'.join(item[1] for item in batch), retries=0)
+            except Exception as e:
+                # Transport errors, an open circuit, ...
+                with self.lock:
+                    self.throttle(None)
+                    self.retry(batch, None, repr(e))
+                handled = True
+                return
+            elapsed = time.perf_counter() - started
+
+            with self.lock:
+                self.handle_response(batch, response, elapsed)
+                handled = True
+        finally:
+            with self.lock:
+                if not handled:
+                    self.requeue(batch)
+                self.in_flight -= 1
+                self.changed.notify_all()
+
+    def handle_response(self, batch: list, response, elapsed: float):
+        """
+        Handles the response of a batch, adapting the batch size and byte limit to it.
+        """
+        # The body is too large: split the batch and send smaller requests
+        if response.status_code == 413:
+            self.stats['too_large'] += 1
+            size = sum(len(item[1]) + 1 for item in batch)
+            self.max_bytes = max(size // 2, 1)
+            self.resize(len(batch) // 2)
+            if len(batch) == 1:
+                self.fail(batch[0], 413, 'Payload too large')
+            else:
+                self.requeue(batch)
+            return
+
+        # The server is busy or unavailable: back off and retry with smaller batches
+        if response.status_code in self.RETRY_STATUSES:
+            self.stats['throttled'] += 1
+            self.resize(len(batch) // 2)
+            self.throttle(response.headers.get('Retry-After'))
+            self.retry(batch, response.status_code, response.text)
+            return
+
+        if response.status_code < 200 or response.status_code >= 300:
+            for item in batch:
+                self.fail(item, response.status_code, response.text)
+            return
+
+        try:
+            results = collection_results(response.text) or []
+        except ValueError as e:
+            self.retry(batch, response.status_code, f"Invalid response: {e}")
+            return
+
+        self.consecutive_failures = 0
+        self.handle_lines(batch, results)
+
+        # Grow while the server keeps up, shrink when it slows down
+        if elapsed > self.target_latency:
+            self.resize(int(self.batch_size * 0.75))
+            return
+        if len(batch) >= self.batch_size:
+            self.resize(self.batch_size + max(self.batch_size // 4, 1))
+        if self.max_bytes < self.max_bytes_limit:
+            self.max_bytes = min(self.max_bytes + max(self.max_bytes // 4, 1), self.max_bytes_limit)
+
+    def handle_lines(self, batch: list, results: list[dict]):
+        """
+        Handles the status of every line of a collection response.
+        """
+        retry = []
+        answered = set()
+        for result in results:
+            index = result.get('line', 0) - 1
+            if not 0 <= index < len(batch):
+                continue
+            answered.add(index)
+
+            status = int(result.get('status_code', 0))
+            if 200 <= status < 300:
+                self.stats['written'] += 1
+            elif status in self.RETRY_STATUSES:
+                retry.append(batch[index])
+            else:
+                self.fail(batch[index], status, result.get('message'), result.get('errors'))
+
+        # Lines without a result are sent again
+        retry += [item for index, item in enumerate(batch) if index not in answered]
+        if retry:
+            self.retry(retry, None, 'No result for the line')
+
+    def throttle(self, retry_after: str | None):
+        """
+        Pauses sending before the next request, honoring Retry-After.
+        """
+        self.consecutive_failures += 1
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = min(self.backoff * 2 ** (self.consecutive_failures - 1), self.max_backoff)
+        self.resume_at = time.monotonic() + delay
+
+    def retry(self, items: list, status: int | None, message: str | None):
+        """
+        Queues items again, or dead-letters them once they ran out of attempts.
+        """
+        again = []
+        for item in items:
+            item[2] += 1
+            if item[2] >= self.max_attempts:
+                self.fail(item, status, message)
+            else:
+                again.append(item)
+
+        self.stats['retried'] += len(again)
+        self.requeue(again)
+
+    def fail(self, item: list, status: int | None, message: str | None, errors: list | None = None):
+        """
+        Records a payload that could not be written in the dead-letter file.
+        """
+        self.stats['failed'] += 1
+        entry = {
+            'url': self.url,
+            'status_code': status,
+            'message': message,
+            'errors': errors,
+            'attempts': item[2] + 1,
+            'failed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'payload': item[0],
+        }
+        if self.dead_letter is None:
+            self.failures.append(entry)
+            return
+
+        with open(self.dead_letter, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def replay(self, path: str | None = None) -> dict:
+        """
+        Sends the payloads of a dead-letter file again, e.g. after fixing their cause.
+
+        The file is moved aside to '<path>.replay' first, so payloads that fail again
+        are recorded anew. The '.replay' file of an interrupted replay is sent again
+        along with the new failures, so its payloads are never lost; some may be sent
+        twice, which is harmless as updates are upserts.
+
+        Args:
+            path (str): The path of the dead-letter file. The writer's dead-letter file if None.
+
+        Returns:
+            dict: The stats.
+        """
+        path = self.dead_letter if path is None else path
+        if path is None:
+            return self.flush()
+
+        replaying = path + '.replay'
+        if os.path.exists(path):
+            if os.path.exists(replaying):
+                # Add the new failures to those of the interrupted replay
+                with open(path, 'rb') as source, open(replaying, 'ab') as target:
+                    shutil.copyfileobj(source, target)
+                os.remove(path)
+            else:
+                os.replace(path, replaying)
+        if not os.path.exists(replaying):
+            return self.flush()
+
+        with open(replaying, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    self.add(json.loads(line)['payload'])
+
+        stats = self.flush()
+        os.remove(replaying)
+        return stats
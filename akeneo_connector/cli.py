@@ -0,0 +1,114 @@
+import argparse
+import json
+import sys
+
+from dotenv import load_dotenv
+
+
+def split_list(value: str | None) -> list[str] | None:
+    """
+    Splits a comma-separated command line value.
+
+    Args:
+        value (str): The comma-separated value.
+
+    Returns:
+        list: The separate values. None if the value is empty.
+    """
+    if not value:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def export(args: argparse.Namespace) -> int:
+    """
+    Runs the export command.
+
+    Args:
+        args (Namespace): The parsed command line arguments.
+
+    Returns:
+        int: The exit code.
+    """
+    from akeneo_connector.akeneo_connector import AkeneoConnector
+    from akeneo_connector.akeneo_exporter import AkeneoExporter
+    from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+    # Let Akeneo filter and project the products, so only the requested slice is downloaded
+    attributes = split_list(args.attributes)
+    locales = split_list(args.locales)
+    paginator = AkeneoPaginator(
+        connector=AkeneoConnector(log_requests=args.log_requests, retries=args.retries, transport=args.transport, option_cache=args.formatted),
+        page_size=args.page_size,
+        search=args.search,
+        attributes=attributes,
+        locales=locales,
+        scope=args.scope,
+    )
+
+    exporter = AkeneoExporter(
+        args.output,
+        format=args.format,
+        paginator=paginator,
+        attributes=attributes,
+        locales=locales,
+        formatted=args.formatted,
+        resume=args.resume,
+        queue_size=args.queue_size,
+        progress_interval=0 if args.quiet else args.progress_interval,
+        progress_stream=None if args.quiet else sys.stderr,
+    )
+    exporter.run()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Entry point of the `akeneo-connector` command.
+
+    Args:
+        argv (list): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    # Read the AKENEO_* credentials from a .env file if there is one
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(prog='akeneo-connector', description='Command line tools for the Akeneo REST API.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='Export products to a JSONL, CSV or Parquet file.')
+    export_parser.add_argument('output', help='The file to export to.')
+    export_parser.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], help='The output format. Inferred from the file extension by default.')
+    export_parser.add_argument('--attributes', help='Comma-separated attribute codes to export. All attributes by default.')
+    export_parser.add_argument('--locales', help='Comma-separated locales to export. All locales by default.')
+    export_parser.add_argument('--scope', help='The channel to export scopable values for. All channels by default.')
+    export_parser.add_argument('--search', help='Akeneo search filters as JSON, e.g. \'{"enabled": [{"operator": "=", "value": true}]}\'.')
+    export_parser.add_argument('--formatted', action='store_true', help='Export formatted values instead of raw data.')
+    export_parser.add_argument('--resume', action='store_true', help='Continue an interrupted export.')
+    export_parser.add_argument('--page-size', type=int, default=100, help='The number of products per page (max 100).')
+    export_parser.add_argument('--queue-size', type=int, default=4, help='The number of pages buffered between pipeline stages.')
+    export_parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between progress reports.')
+    export_parser.add_argument('--retries', type=int, default=3, help='The number of times to retry a page when Akeneo is busy or unavailable.')
+    export_parser.add_argument('--transport', choices=['requests', 'http2'], default='requests', help='The HTTP client to use. http2 multiplexes requests over one connection and needs akeneo_connector[http2].')
+    export_parser.add_argument('--log-requests', action='store_true', help='Print every request.')
+    export_parser.add_argument('--quiet', action='store_true', help='Do not report progress.')
+    export_parser.set_defaults(func=export)
+
+    args = parser.parse_args(argv)
+
+    # Decode the search filters up front, so invalid JSON is reported as a usage error
+    if getattr(args, 'search', None):
+        try:
+            args.search = json.loads(args.search)
+        except json.JSONDecodeError as e:
+            export_parser.error(f"argument --search: invalid JSON: {e}")
+        if not isinstance(args.search, dict):
+            export_parser.error("argument --search: must be a JSON object")
+
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,586 @@
+import bisect
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, urlencode, urlparse
+
+
+API_PREFIX = '/api/rest/v1/'
+TOKEN_PATH = '/api/oauth/v1/token'
+
+ATTRIBUTES = {
+    code: {'code': code, 'type': attribute_type, 'group': 'general', 'labels': {'en_US': code.title(), 'nl_NL': code.title()}}
+    for code, attribute_type in [
+        ('name', 'pim_catalog_text'),
+        ('description', 'pim_catalog_textarea'),
+        ('weight', 'pim_catalog_metric'),
+        ('length', 'pim_catalog_metric'),
+        ('price', 'pim_catalog_price_collection'),
+        ('color', 'pim_catalog_simpleselect'),
+        ('ean', 'pim_catalog_text'),
+        ('image', 'pim_catalog_image'),
+    ]
+}
+
+OPTIONS = {
+    'color': [
+        {'code': code, 'attribute': 'color', 'sort_order': index, 'labels': {'en_US': label, 'nl_NL': dutch}}
+        for index, (code, label, dutch) in enumerate([('red', 'Red', 'Rood'), ('blue', 'Blue', 'Blauw'), ('black', 'Black', 'Zwart')])
+    ],
+}
+OPTIONS['color'] += [
+    {'code': f"color_{index}", 'attribute': 'color', 'sort_order': index + 3, 'labels': {'en_US': f"Color {index}", 'nl_NL': f"Kleur {index}"}}
+    for index in range(247)
+]
+
+# The catalog structure, served as paginated lists and by code
+RESOURCES = {
+    'attributes': list(ATTRIBUTES.values()),
+    'families': [
+        {'code': code, 'attribute_as_label': 'name', 'attributes': list(ATTRIBUTES), 'labels': {'en_US': code.title()}}
+        for code in ('shoes', 'shirts', 'bags')
+    ],
+    'channels': [
+        {'code': 'ecommerce', 'locales': ['en_US', 'nl_NL'], 'currencies': ['EUR'], 'category_tree': 'master', 'labels': {'en_US': 'Ecommerce'}},
+        {'code': 'print', 'locales': ['nl_NL'], 'currencies': ['EUR'], 'category_tree': 'master', 'labels': {'en_US': 'Print'}},
+    ],
+    'locales': [{'code': code, 'enabled': code in ('en_US', 'nl_NL')} for code in ('de_DE', 'en_US', 'fr_FR', 'nl_NL')],
+    'categories': [{'code': 'master', 'parent': None, 'labels': {'en_US': 'Master'}}] + [
+        {'code': f"category_{index}", 'parent': 'master' if index < 5 else f"category_{index % 5}", 'labels': {'en_US': f"Category {index}"}}
+        for index in range(25)
+    ],
+    **{f"attributes/{code}/options": options for code, options in OPTIONS.items()},
+}
+
+def make_product(index: int, origin: str) -> dict:
+    """
+    Builds a deterministic product resembling a real catalog product.
+
+    Args:
+        index (int): The number of the product.
+        origin (str): The base URL of the server, used for media links.
+
+    Returns:
+        dict: The product.
+    """
+    identifier = f"{index:08d}"
+    media_code = f"a/b/c/{identifier}_image.jpg"
+    return {
+        'uuid': f"00000000-0000-4000-8000-{index:012d}",
+        'identifier': identifier,
+        'enabled': index % 10 != 0,
+        'family': ('shoes', 'shirts', 'bags')[index % 3],
+        'categories': ['master', f"category_{index % 25}"],
+        'groups': [],
+        'parent': f"sub_{index // 5}",
+        'values': {
+            'name': [
+                {'locale': 'en_US', 'scope': None, 'data': f"Product {index}"},
+                {'locale': 'nl_NL', 'scope': None, 'data': f"Product {index}"},
+            ],
+            'description': [
+                {'locale': locale, 'scope': 'ecommerce', 'data': f"Description of product {index}. " * 8}
+                for locale in ('en_US', 'nl_NL')
+            ],
+            'weight': [{'locale': None, 'scope': None, 'data': {'amount': f"{(index % 5000) / 7:.4f}", 'unit': 'GRAM'}}],
+            'length': [{'locale': None, 'scope': None, 'data': {'amount': f"{index % 300}.0000", 'unit': 'CENTIMETER'}}],
+            'price': [{'locale': None, 'scope': None, 'data': [{'amount': f"{index % 200}.99", 'currency': 'EUR'}]}],
+            'color': [{
+                'locale': None,
+                'scope': None,
+                'data': ('red', 'blue', 'black')[index % 3],
+                'linked_data': {
+                    'attribute': 'color',
+                    'code': ('red', 'blue', 'black')[index % 3],
+                    'labels': {'en_US': ('Red', 'Blue', 'Black')[index % 3], 'nl_NL': ('Rood', 'Blauw', 'Zwart')[index % 3]},
+                },
+            }],
+            'ean': [{'locale': None, 'scope': None, 'data': str(8710000000000 + index)}],
+            'image': [{
+                'locale': None,
+                'scope': None,
+                'data': media_code,
+                '_links': {'download': {'href': f"{origin}{API_PREFIX}media-files/{media_code}/download"}},
+            }],
+        },
+        'created': '2024-01-01T00:00:00+00:00',
+        'updated': f"2024-06-{index % 28 + 1:02d}T12:00:00+00:00",
+        'associations': {},
+        'quantified_associations': {},
+    }
+
+
+def make_product_model(code: str) -> dict | None:
+    """
+    Builds a deterministic product model. Every five products share a sub-model
+    'sub_{n}', and every five sub-models share a root model 'root_{n}'.
+
+    Args:
+        code (str): The code of the product model.
+
+    Returns:
+        dict: The product model. None if the code is not a product model code.
+    """
+    level, _, number = code.partition('_')
+    if level not in ('root', 'sub') or not number.isdigit():
+        return None
+
+    index = int(number)
+    values = {'brand': [{'locale': None, 'scope': None, 'data': f"Brand {index}"}]} if level == 'root' else \
+        {'size': [{'locale': None, 'scope': None, 'data': ('s', 'm', 'l', 'xl', 'xxl')[index % 5]}]}
+    return {
+        'code': code,
+        'family': ('shoes', 'shirts', 'bags')[index % 3],
+        'family_variant': 'by_size',
+        'parent': f"root_{index // 5}" if level == 'sub' else None,
+        'categories': ['master'],
+        'values': values,
+        'created': '2024-01-01T00:00:00+00:00',
+        'updated': '2024-01-01T00:00:00+00:00',
+        'associations': {},
+        'quantified_associations': {},
+    }
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """
+    A threading HTTP server that ignores clients closing their connection early.
+    """
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class MockAkeneoServer:
+    """
+    An in-process mock of the Akeneo REST API for benchmarks.
+
+    Serves authentication, the products list (page and search_after pagination,
+    filtered on `identifier`, `categories`, `family` and `updated` as the paginator
+    and the crawler shards send them; other filters are answered with a 422),
+    product GET and PATCH, product models, collection PATCH, media file downloads and the catalog
+    structure (attributes, options, families, channels, locales and categories)
+    from a generated catalog. Latency and errors can be injected per request.
+
+    Attributes:
+        product_count (int): The number of products in the catalog.
+        latency (float): The seconds every request is delayed.
+        jitter (float): The maximum extra random delay in seconds.
+        error_rate (float): The fraction of API requests answered with `error_status`.
+        error_status (int): The status of injected errors.
+        media_size (int): The size of every media file in bytes.
+        requests (int): The number of handled requests.
+        errors (int): The number of injected errors.
+        patched (int): The number of products received by PATCH requests.
+        url (str): The base URL of the server, e.g. 'http://127.0.0.1:8080'.
+    """
+
+    def __init__(
+            self,
+            product_count: int = 1000,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            error_status: int = 503,
+            media_size: int = 256 * 1024,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            seed: int = 0
+        ):
+        """
+        Initializes an instance of the MockAkeneoServer class.
+
+        Args:
+            product_count (int): The number of products in the catalog.
+            latency (float): The seconds every request is delayed.
+            jitter (float): The maximum extra random delay in seconds.
+            error_rate (float): The fraction of API requests answered with `error_status`.
+            error_status (int): The status of injected errors.
+            media_size (int): The size of every media file in bytes.
+            host (str): The host to listen on.
+            port (int): The port to listen on. A free port if 0.
+            seed (int): The seed of the random generator for jitter and errors.
+        """
+        self.product_count = product_count
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.media_size = media_size
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.patched = 0
+
+        self.server = QuietHTTPServer((host, port), self.handler())
+        self.origin = f"{host}:{self.server.server_address[1]}"
+        self.url = f"http://{self.origin}"
+        self.thread = None
+
+        # Pre-encode the catalog, so the server is never the bottleneck of a benchmark
+        self.products = [json.dumps(make_product(index, self.url)).encode() for index in range(product_count)]
+        self.media = bytes(range(256)) * (media_size // 256) + bytes(media_size % 256)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops serving.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def connector_options(self) -> dict:
+        """
+        Returns the keyword arguments for an AkeneoConnector talking to this server.
+
+        Returns:
+            dict: The origin, scheme, credentials and authentication URL.
+        """
+        return {
+            'origin': self.origin,
+            'scheme': 'http',
+            'username': 'benchmark',
+            'password': 'benchmark',
+            'auth_token': 'client:secret',
+            'auth_url': self.url + TOKEN_PATH,
+        }
+
+    def reset_counters(self):
+        """
+        Resets the request, error and patch counters.
+        """
+        with self.lock:
+            self.requests = 0
+            self.errors = 0
+            self.patched = 0
+
+    def delay(self) -> bool:
+        """
+        Applies the latency of a request and decides whether it fails.
+
+        Returns:
+            bool: True if an error should be injected.
+        """
+        with self.lock:
+            self.requests += 1
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+            fail = self.error_rate > 0 and self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+        return fail
+
+    def page(self, path: str, query: dict) -> bytes:
+        """
+        Builds a page of the products list.
+
+        Args:
+            path (str): The path of the request.
+            query (dict): The query parameters of the request.
+
+        Returns:
+            bytes: The encoded page.
+        """
+        limit = min(max(int(query.get('limit', 10)), 1), 100)
+        base = self.url + path
+
+        # An `identifier IN` filter, as used to refresh products in bulk, fits in a single page
+        search = json.loads(query.get('search') or '{}')
+        identifiers = [identifier for condition in search.get('identifier', []) if condition.get('operator') == 'IN' for identifier in condition['value']]
+        if identifiers:
+            indexes = [index for index in map(self.index_of, identifiers) if index is not None][:limit]
+            head = json.dumps({'_links': {'self': {'href': base + '?' + urlencode(query, quote_via=quote)}}})[:-1].encode()
+            return head + b', "_embedded": {"items": [' + b', '.join(self.products[index] for index in indexes) + b']}}'
+
+        # Other filters select the matching products, e.g. those of a crawler shard
+        conditions = [(property, condition) for property, items in search.items() if property != 'identifier' for condition in items]
+        if conditions:
+            indexes = [index for index in range(self.product_count) if all(self.matches(index, *item) for item in conditions)]
+        else:
+            indexes = range(self.product_count)
+        count = len(indexes)
+
+        if query.get('pagination_type') == 'search_after':
+            after = query.get('search_after')
+            start = bisect.bisect_right(indexes, int(after)) if after else 0
+            end = min(start + limit, count)
+            links = {'self': {'href': base + '?' + urlencode(query, quote_via=quote)}}
+            if end < count:
+                links['next'] = {'href': base + '?' + urlencode(dict(query, search_after=f"{indexes[end - 1]:08d}"), quote_via=quote)}
+            extra = {}
+        else:
+            page = max(int(query.get('page', 1)), 1)
+            start = min((page - 1) * limit, count)
+            end = min(start + limit, count)
+            links = {
+                'self': {'href': base + '?' + urlencode(dict(query, page=page), quote_via=quote)},
+                'first': {'href': base + '?' + urlencode(dict(query, page=1), quote_via=quote)},
+            }
+            if page > 1:
+                links['previous'] = {'href': base + '?' + urlencode(dict(query, page=page - 1), quote_via=quote)}
+            if end < count:
+                links['next'] = {'href': base + '?' + urlencode(dict(query, page=page + 1), quote_via=quote)}
+            extra = {'current_page': page}
+            if query.get('with_count') == 'true':
+                extra['items_count'] = count
+
+        head = json.dumps({'_links': links, **extra})[:-1].encode()
+        return head + b', "_embedded": {"items": [' + b', '.join(self.products[index] for index in indexes[start:end]) + b']}}'
+
+    @staticmethod
+    def matches(index: int, property: str, condition: dict) -> bool:
+        """
+        Checks whether a product matches a search condition.
+
+        Args:
+            index (int): The number of the product.
+            property (str): The property the condition is on.
+            condition (dict): The condition, with its operator and value.
+
+        Returns:
+            bool: True if the product matches.
+
+        Raises:
+            ValueError: When the property or operator is not supported by the mock.
+        """
+        operator = condition.get('operator')
+        value = condition.get('value')
+
+        # Products are in 'master' and in 'category_<n>', a child of 'category_<n % 5>' from 5 on
+        if property == 'categories' and operator in ('IN', 'NOT IN', 'IN CHILDREN', 'NOT IN CHILDREN'):
+            category = index % 25
+            codes = {'master', f"category_{category}"}
+            if operator.endswith('CHILDREN') and category >= 5:
+                codes.add(f"category_{category % 5}")
+            return bool(codes & set(value)) == operator.startswith('IN')
+
+        if property == 'family':
+            family = ('shoes', 'shirts', 'bags')[index % 3]
+            if operator in ('IN', 'NOT IN'):
+                return (family in value) == (operator == 'IN')
+            if operator in ('EMPTY', 'NOT EMPTY'):
+                return operator == 'NOT EMPTY'
+
+        # Dates are compared as 'YYYY-MM-DD HH:MM:SS' strings, the format of the filter
+        if property == 'updated':
+            updated = f"2024-06-{index % 28 + 1:02d} 12:00:00"
+            comparisons = {
+                '<': lambda: updated < value,
+                '<=': lambda: updated <= value,
+                '>': lambda: updated > value,
+                '>=': lambda: updated >= value,
+                '=': lambda: updated == value,
+                '!=': lambda: updated != value,
+                'BETWEEN': lambda: value[0] <= updated <= value[1],
+                'NOT BETWEEN': lambda: not value[0] <= updated <= value[1],
+            }
+            if operator in comparisons:
+                return comparisons[operator]()
+
+        raise ValueError(f"Unsupported filter: {property} {operator}.")
+
+    def list_page(self, path: str, query: dict, items: list) -> bytes:
+        """
+        Builds a page of a catalog structure list, such as families or attribute options.
+
+        Args:
+            path (str): The path of the request.
+            query (dict): The query parameters of the request.
+            items (list): All items of the list.
+
+        Returns:
+            bytes: The encoded page.
+        """
+        limit = min(max(int(query.get('limit', 10)), 1), 100)
+        page = max(int(query.get('page', 1)), 1)
+        base = self.url + path
+        links = {'self': {'href': base + '?' + urlencode(dict(query, page=page), quote_via=quote)}}
+        if page * limit < len(items):
+            links['next'] = {'href': base + '?' + urlencode(dict(query, page=page + 1), quote_via=quote)}
+
+        data = {'_links': links, 'current_page': page, '_embedded': {'items': items[(page - 1) * limit:page * limit]}}
+        if query.get('with_count') == 'true':
+            data['items_count'] = len(items)
+        return json.dumps(data).encode()
+
+    def product_models(self, query: dict) -> list[dict]:
+        """
+        Gets the product models matching the `code IN` filter of a request, or all of them.
+
+        Args:
+            query (dict): The query parameters of the request.
+
+        Returns:
+            list: The product models.
+        """
+        search = json.loads(query.get('search') or '{}')
+        codes = [code for condition in search.get('code', []) if condition.get('operator') == 'IN' for code in condition['value']]
+        if not codes:
+            subs = (self.product_count + 4) // 5
+            codes = [f"root_{index}" for index in range((subs + 4) // 5)] + [f"sub_{index}" for index in range(subs)]
+        return [model for model in map(make_product_model, codes) if model is not None]
+
+    def index_of(self, identifier: str) -> int | None:
+        """
+        Gets the position of a product in the catalog.
+
+        Args:
+            identifier (str): The identifier of the product.
+
+        Returns:
+            int: The position. None if there is no such product.
+        """
+        if not identifier.isdigit() or int(identifier) >= self.product_count:
+            return None
+        return int(identifier)
+
+    def handler(self):
+        """
+        Builds the request handler class bound to this server.
+
+        Returns:
+            type: The request handler class.
+        """
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status: int, body: bytes = b'', content_type: str = 'application/json', headers: dict | None = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if body and self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def send_json(self, status: int, data):
+                self.send(status, json.dumps(data).encode())
+
+            def read_body(self) -> bytes:
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def route(self):
+                url = urlparse(self.path)
+                query = dict(parse_qsl(url.query))
+                body = self.read_body()
+
+                if url.path == TOKEN_PATH:
+                    if not self.headers.get('Authorization', '').startswith('Basic '):
+                        return self.send_json(401, {'code': 401, 'message': 'Missing client credentials.'})
+                    mock.delay()
+                    return self.send_json(200, {'access_token': 'mock-token', 'refresh_token': 'mock-refresh', 'expires_in': 3600})
+
+                if not url.path.startswith(API_PREFIX):
+                    return self.send_json(404, {'code': 404, 'message': 'Not found.'})
+                if self.headers.get('Authorization') != 'Bearer mock-token':
+                    return self.send_json(401, {'code': 401, 'message': 'The access token provided is invalid.'})
+
+                if mock.delay():
+                    headers = {'Retry-After': '0'} if mock.error_status in (429, 503) else None
+                    body = json.dumps({'code': mock.error_status, 'message': 'Injected error.'}).encode()
+                    return self.send(mock.error_status, body, headers=headers)
+
+                resource = url.path[len(API_PREFIX):].strip('/')
+                if resource == 'products':
+                    if self.command == 'GET':
+                        try:
+                            return self.send(200, mock.page(url.path, query))
+                        except ValueError as e:
+                            return self.send_json(422, {'code': 422, 'message': str(e)})
+                    if self.command == 'PATCH':
+                        return self.patch_collection(body)
+
+                if resource == 'product-models' and self.command == 'GET':
+                    return self.send(200, mock.list_page(url.path, query, mock.product_models(query)))
+
+                if resource.startswith('product-models/') and self.command == 'GET':
+                    model = make_product_model(resource[len('product-models/'):])
+                    if model is None:
+                        return self.send_json(404, {'code': 404, 'message': 'Product model not found.'})
+                    return self.send_json(200, model)
+
+                if resource.startswith('products/'):
+                    index = mock.index_of(resource[len('products/'):])
+                    if self.command == 'GET':
+                        if index is None:
+                            return self.send_json(404, {'code': 404, 'message': 'Product not found.'})
+                        return self.send(200, mock.products[index])
+                    if self.command == 'PATCH':
+                        with mock.lock:
+                            mock.patched += 1
+                        return self.send(204 if index is not None else 201)
+
+                if resource.startswith('media-files/') and resource.endswith('/download') and self.command == 'GET':
+                    return self.send(200, mock.media, content_type='image/jpeg')
+
+                if resource == 'media-files' and self.command == 'POST':
+                    return self.send(201, headers={'Location': mock.url + API_PREFIX + 'media-files/a/b/c/upload.jpg'})
+
+                if resource in RESOURCES and self.command == 'GET':
+                    return self.send(200, mock.list_page(url.path, query, RESOURCES[resource]))
+
+                # A single family, attribute, option, ...
+                parent, _, code = resource.rpartition('/')
+                if parent in RESOURCES and self.command == 'GET':
+                    for item in RESOURCES[parent]:
+                        if item['code'] == code:
+                            return self.send_json(200, item)
+                    return self.send_json(404, {'code': 404, 'message': 'Resource not found.'})
+
+                return self.send_json(404, {'code': 404, 'message': 'Not found.'})
+
+            def patch_collection(self, body: bytes):
+                # Answer every line of the NDJSON body with its own status, like Akeneo does
+                lines = []
+                for number, line in enumerate(body.splitlines(), start=1):
+                    try:
+                        identifier = json.loads(line).get('identifier')
+                    except ValueError:
+                        lines.append({'line': number, 'status_code': 400, 'message': 'Invalid json message received'})
+                        continue
+                    status = 204 if identifier is not None and mock.index_of(identifier) is not None else 201
+                    lines.append({'line': number, 'identifier': identifier, 'status_code': status})
+
+                with mock.lock:
+                    mock.patched += len(lines)
+                self.send(200, '\n'.join(json.dumps(line) for line in lines).encode(), content_type='application/vnd.akeneo.collection+json')
+
+            def do_GET(self):
+                self.route()
+
+            def do_POST(self):
+                self.route()
+
+            def do_PATCH(self):
+                self.route()
+
+        return Handler
+
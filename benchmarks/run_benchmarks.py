@@ -0,0 +1,324 @@
+"""
+Runs the benchmark suite against a local mock of the Akeneo REST API and writes
+the results as JSON, so performance can be compared across releases.
+
+Usage:
+    python benchmarks/run_benchmarks.py --products 5000 --output results.json
+    python benchmarks/run_benchmarks.py --latency 0.02 --error-rate 0.05 --only paginator
+
+    # Record the traffic once, then replay it offline at full CPU speed
+    python benchmarks/run_benchmarks.py --record traffic.json
+    python benchmarks/run_benchmarks.py --replay traffic.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_akeneo import MockAkeneoServer, make_product
+
+from akeneo_connector import AkeneoCatalog, AkeneoConnector, AkeneoPaginator, AkeneoProduct
+from akeneo_connector.akeneo_transport import TRANSPORTS, RecordReplayTransport, get_transport
+
+# The port to record and replay on, as recorded URLs include it
+REPLAY_PORT = 8642
+
+
+def package_version() -> str | None:
+    """
+    Gets the installed version of the akeneo_connector package.
+
+    Returns:
+        str: The version. None if the package is not installed.
+    """
+    try:
+        return version('akeneo_connector')
+    except PackageNotFoundError:
+        return None
+
+
+def connect(server: MockAkeneoServer, args: argparse.Namespace) -> AkeneoConnector:
+    """
+    Creates a quiet connector for the mock server that collects metrics.
+
+    Args:
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings, with the retries and the transport.
+
+    Returns:
+        AkeneoConnector: The connector.
+    """
+    return AkeneoConnector(log_requests=False, retries=args.retries, metrics=True, transport=args.transport, **server.connector_options())
+
+
+def bench_paginator(server: MockAkeneoServer, args: argparse.Namespace, **options) -> dict:
+    """
+    Iterates through the whole catalog with the paginator.
+
+    Args:
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings.
+        **options: Keyword arguments for the paginator, e.g. stream and pagination_type.
+
+    Returns:
+        dict: The measurements.
+    """
+    connector = connect(server, args)
+    paginator = AkeneoPaginator(connector=connector, page_size=args.page_size, **options)
+
+    count = 0
+    started = time.perf_counter()
+    for _ in paginator:
+        count += 1
+    elapsed = time.perf_counter() - started
+
+    return {'items': count, 'seconds': elapsed, 'connector': connector}
+
+
+def bench_bulk_update(server: MockAkeneoServer, args: argparse.Namespace) -> dict:
+    """
+    Updates the whole catalog with collection PATCH requests of `batch_size` products.
+
+    Args:
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings.
+
+    Returns:
+        dict: The measurements.
+    """
+    connector = connect(server, args)
+    payloads = [
+        {'identifier': f"{index:08d}", 'values': {'name': [{'locale': 'en_US', 'scope': None, 'data': f"Updated {index}"}]}}
+        for index in range(args.products)
+    ]
+
+    count = 0
+    started = time.perf_counter()
+    for start in range(0, len(payloads), args.batch_size):
+        batch = payloads[start:start + args.batch_size]
+        if connector.update(connector.products_url, batch) is not None:
+            count += len(batch)
+    elapsed = time.perf_counter() - started
+
+    return {'items': count, 'seconds': elapsed, 'connector': connector}
+
+
+def bench_media(server: MockAkeneoServer, args: argparse.Namespace) -> dict:
+    """
+    Downloads the image of `media_files` products.
+
+    Args:
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings.
+
+    Returns:
+        dict: The measurements.
+    """
+    connector = connect(server, args)
+    products = [AkeneoProduct(make_product(index, server.url), connector=connector) for index in range(min(args.media_files, args.products))]
+
+    count = 0
+    size = 0
+    started = time.perf_counter()
+    for product in products:
+        content = product.get_media('image')
+        if content is not None:
+            count += 1
+            size += len(content)
+    elapsed = time.perf_counter() - started
+
+    return {'items': count, 'seconds': elapsed, 'bytes': size, 'connector': connector}
+
+
+def bench_format(server: MockAkeneoServer, args: argparse.Namespace) -> dict:
+    """
+    Formats the values of the catalog, without any requests.
+
+    Args:
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings.
+
+    Returns:
+        dict: The measurements.
+    """
+    connector = connect(server, args)
+    products = [AkeneoProduct(make_product(index, server.url), connector=connector) for index in range(args.products)]
+    attributes = ['name', 'weight', 'length', 'color', 'ean']
+
+    count = 0
+    started = time.perf_counter()
+    for product in products:
+        for attribute in attributes:
+            product.get_formatted_value(attribute, args.locale)
+            count += 1
+    elapsed = time.perf_counter() - started
+
+    return {'items': count, 'seconds': elapsed}
+
+
+def bench_catalog(server: MockAkeneoServer, args: argparse.Namespace) -> dict:
+    """
+    Loads the catalog structure: families, attributes, options, channels, locales and categories.
+
+    Args:
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings.
+
+    Returns:
+        dict: The measurements.
+    """
+    connector = connect(server, args)
+    catalog = AkeneoCatalog(connector=connector)
+
+    started = time.perf_counter()
+    catalog.load()
+    elapsed = time.perf_counter() - started
+
+    count = sum(len(getattr(catalog, resource)) for resource in catalog.RESOURCES) + sum(len(options) for options in catalog.options.values())
+    return {'items': count, 'seconds': elapsed, 'connector': connector}
+
+
+BENCHMARKS = {
+    'paginator': lambda server, args: bench_paginator(server, args),
+    'paginator_stream': lambda server, args: bench_paginator(server, args, stream=True),
+    'paginator_search_after': lambda server, args: bench_paginator(server, args, pagination_type='search_after'),
+    'bulk_update': bench_bulk_update,
+    'media': bench_media,
+    'format': bench_format,
+    'catalog': bench_catalog,
+}
+
+
+def run(name: str, server: MockAkeneoServer, args: argparse.Namespace) -> dict:
+    """
+    Runs a benchmark `repeat` times and summarizes the runs.
+
+    Args:
+        name (str): The name of the benchmark.
+        server (MockAkeneoServer): The mock server.
+        args (Namespace): The benchmark settings.
+
+    Returns:
+        dict: The result, with the median and best run and the request metrics of the median run.
+    """
+    runs = []
+    for _ in range(args.repeat):
+        server.reset_counters()
+        measurement = BENCHMARKS[name](server, args)
+        measurement['server_requests'] = server.requests
+        measurement['injected_errors'] = server.errors
+        runs.append(measurement)
+
+    runs.sort(key=lambda run: run['seconds'])
+    median = runs[len(runs) // 2]
+    result = {
+        'name': name,
+        'items': median['items'],
+        'seconds': median['seconds'],
+        'best_seconds': runs[0]['seconds'],
+        'stdev_seconds': statistics.stdev(run['seconds'] for run in runs) if len(runs) > 1 else 0.0,
+        'items_per_second': median['items'] / median['seconds'] if median['seconds'] else None,
+        'server_requests': median['server_requests'],
+        'injected_errors': median['injected_errors'],
+    }
+    if 'bytes' in median:
+        result['bytes'] = median['bytes']
+        result['megabytes_per_second'] = median['bytes'] / median['seconds'] / 1e6 if median['seconds'] else None
+    if 'connector' in median:
+        metrics = median['connector'].metrics
+        result['retries'] = sum(metrics.retries.values())
+        result['latency'] = metrics.summary()
+
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the selected benchmarks and writes the results.
+
+    Args:
+        argv (list): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks the connector against a local mock Akeneo server.')
+    parser.add_argument('--products', type=int, default=2000, help='The number of products in the mock catalog.')
+    parser.add_argument('--page-size', type=int, default=100, help='The number of products per page.')
+    parser.add_argument('--batch-size', type=int, default=100, help='The number of products per bulk update request.')
+    parser.add_argument('--media-files', type=int, default=200, help='The number of media files to download.')
+    parser.add_argument('--media-size', type=int, default=256 * 1024, help='The size of every media file in bytes.')
+    parser.add_argument('--locale', default='en_US', help='The locale to format values in.')
+    parser.add_argument('--latency', type=float, default=0.0, help='The seconds every request is delayed.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='The maximum extra random delay in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='The fraction of requests that fail with --error-status.')
+    parser.add_argument('--error-status', type=int, default=503, help='The status of injected errors.')
+    parser.add_argument('--retries', type=int, default=3, help='The number of times the connector retries failed requests.')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of runs per benchmark.')
+    parser.add_argument('--transport', default='requests', choices=[name for name in TRANSPORTS if name != 'memory'], help='The transport to send requests with.')
+    parser.add_argument('--record', help='Record all responses to this file.')
+    parser.add_argument('--replay', help='Replay the responses recorded in this file instead of using the mock server.')
+    parser.add_argument('--only', help=f"Comma-separated benchmarks to run: {', '.join(BENCHMARKS)}.")
+    parser.add_argument('--output', help='The JSON file to write the results to. Printed if not set.')
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.only.split(',')] if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}.")
+
+    recording = None
+    if args.record:
+        recording = RecordReplayTransport(args.record, mode='record', transport=get_transport(args.transport))
+    elif args.replay:
+        recording = RecordReplayTransport(args.replay, mode='replay')
+    settings = {key: value for key, value in vars(args).items() if key not in ('only', 'output')}
+    if recording is not None:
+        args.transport = recording
+
+    server = MockAkeneoServer(
+        product_count=args.products,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        media_size=args.media_size,
+        port=REPLAY_PORT if recording is not None else 0,
+    )
+    with server:
+        results = []
+        for name in names:
+            result = run(name, server, args)
+            results.append(result)
+            print(f"{name:<24} {result['items']:>8} items {result['seconds']:>8.3f}s {result['items_per_second'] or 0:>12.1f}/s", file=sys.stderr)
+
+    if recording is not None:
+        recording.close()
+
+    report = {
+        'package_version': package_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'settings': settings,
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
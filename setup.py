@@ -22,5 +22,15 @@ setup(
         'Operating System :: OS Independent',
     ],
     python_requires='>=3.12',
-
+    extras_require={
+        'fast': ['orjson >= 3.9.0'],
+        'parquet': ['pyarrow >= 14.0.0'],
+        'http2': ['httpx[http2] >= 0.25.0'],
+        'numpy': ['numpy >= 1.24.0'],
+    },
+    entry_points={
+        'console_scripts': [
+            'akeneo-connector = akeneo_connector.cli:main',
+        ],
+    },
 )
\ No newline at end of file
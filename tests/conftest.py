@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+# The scripts next to the tests talk to a live Akeneo instance
+collect_ignore = ['iterate_through_products.py', 'retrieve_and_update_product.py']
+
+
+@pytest.fixture
+def mock_server():
+    from mock_akeneo import MockAkeneoServer
+
+    with MockAkeneoServer(product_count=1000) as server:
+        yield server
+
+
+@pytest.fixture
+def mock_connector(mock_server):
+    from akeneo_connector import AkeneoConnector
+
+    connector = AkeneoConnector(**mock_server.connector_options(), log_requests=False)
+    yield connector
+    connector.close()
+
+
+@pytest.fixture
+def memory_connector():
+    from akeneo_connector import AkeneoConnector
+    from akeneo_connector.akeneo_transport import MemoryTransport
+
+    connector = AkeneoConnector(
+        origin='akeneo.test',
+        scheme='http',
+        username='test',
+        password='test',
+        auth_token='client:secret',
+        auth_url='http://akeneo.test/api/oauth/v1/token',
+        transport=MemoryTransport(),
+        log_requests=False
+    )
+    yield connector
+    connector.close()
@@ -0,0 +1,71 @@
+import pytest
+
+from akeneo_connector.akeneo_catalog import AkeneoCatalog
+from akeneo_connector.akeneo_checkpoint import read_json, write_json_atomic
+from akeneo_connector.akeneo_options import AkeneoOptionCache
+
+
+def test_load_and_lookups(mock_server, mock_connector):
+    mock_server.reset_counters()
+    catalog = AkeneoCatalog(mock_connector).load()
+
+    # One page per list, then the three pages of the 250 options of the only select attribute
+    assert mock_server.requests == 5 + 3
+    assert (len(catalog.families), len(catalog.attributes), len(catalog.channels), len(catalog.locales), len(catalog.categories)) == (3, 8, 2, 4, 26)
+    assert list(catalog.options) == ['color']
+    assert len(catalog.options['color']) == 250
+    assert catalog.loaded_at is not None and catalog.load_seconds >= 0
+
+    assert catalog.family('shoes')['attribute_as_label'] == 'name'
+    assert catalog.family('missing') is None
+    assert catalog.attribute('weight')['type'] == 'pim_catalog_metric'
+    assert catalog.attribute_label('color', 'en_US') == 'Color'
+    assert catalog.attribute_label('color', 'fr_FR') == 'color'
+    assert catalog.option('color', 'red')['sort_order'] == 0
+    assert catalog.option_label('color', 'red', 'nl_NL') == 'Rood'
+    assert catalog.option_label('color', 'purple', 'nl_NL') == 'purple'
+    assert [attribute['code'] for attribute in catalog.family_attributes('bags')] == list(catalog.attributes)
+    assert catalog.family_attributes('missing') == []
+    assert catalog.channel_locales('print') == ['nl_NL']
+    assert catalog.enabled_locales() == ['en_US', 'nl_NL']
+
+    # Loaded options are not fetched again
+    mock_server.reset_counters()
+    assert catalog.load_options('color') is catalog.options['color']
+    assert mock_server.requests == 0
+
+    # The catalog warms an option cache without requests
+    cache = AkeneoOptionCache(mock_connector, catalog=catalog)
+    assert cache.label('color', 'blue', 'en_US') == 'Blue'
+    assert mock_server.requests == 0
+
+
+def test_load_some_resources(mock_server, mock_connector):
+    catalog = AkeneoCatalog(mock_connector).load(['families', 'locales'])
+    assert len(catalog.families) == 3 and len(catalog.locales) == 4
+    assert catalog.attributes == catalog.options == {}
+
+    mock_server.reset_counters()
+    assert len(catalog.load_options('color')) == 250
+    assert mock_server.requests == 3
+
+    with pytest.raises(ValueError):
+        catalog.load(['products'])
+
+
+def test_snapshot(mock_server, mock_connector, tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    catalog = AkeneoCatalog(mock_connector).load()
+    catalog.save(path)
+
+    mock_server.reset_counters()
+    restored = AkeneoCatalog(mock_connector).warm(path)
+    assert mock_server.requests == 0
+    assert restored.to_dict() == catalog.to_dict()
+    assert restored.option_label('color', 'black', 'en_US') == 'Black'
+
+    # Outdated snapshots and snapshots of another instance are not used
+    assert not AkeneoCatalog(mock_connector).restore(path, max_age=-1)
+    write_json_atomic(path, dict(read_json(path), origin='other.test'))
+    assert not AkeneoCatalog(mock_connector).restore(path)
+    assert not AkeneoCatalog(mock_connector).restore(str(tmp_path / 'missing.json'))
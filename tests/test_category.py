@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from akeneo_connector.akeneo_category import AkeneoCategoryTree
+from akeneo_connector.akeneo_product import AkeneoProduct
+from akeneo_connector.akeneo_search import AkeneoSearch
+
+
+# The mock's tree: 'master' > 'category_0' .. 'category_4' > 'category_5' .. 'category_24'
+SUBTREE = {'category_2', 'category_7', 'category_12', 'category_17', 'category_22'}
+
+
+@pytest.fixture
+def tree(mock_connector):
+    return AkeneoCategoryTree(mock_connector).load()
+
+
+def test_indexes(tree):
+    assert len(tree) == 26
+    assert tree.roots == ['master']
+    assert tree.ancestors('category_7') == ['master', 'category_2']
+    assert tree.ancestors('master') == tree.ancestors('missing') == []
+    assert tree.descendants('category_2') == SUBTREE - {'category_2'}
+    assert tree.descendants('category_2', include_self=True) == SUBTREE
+    assert len(tree.descendants('master')) == 25
+    assert tree.path('category_7', locale='en_US') == 'Master > Category 2 > Category 7'
+    assert tree.path('category_7') == 'master > category_2 > category_7'
+    assert tree.is_under('category_7', 'master') and tree.is_under('category_7', 'category_7')
+    assert not tree.is_under('category_7', 'category_3')
+
+
+def test_categories_with_an_unknown_parent_are_roots(memory_connector):
+    tree = AkeneoCategoryTree(memory_connector)
+    tree.build({
+        'a': {'code': 'a', 'parent': None},
+        'b': {'code': 'b', 'parent': 'a'},
+        'orphan': {'code': 'orphan', 'parent': 'deleted'},
+    })
+    assert tree.roots == ['a', 'orphan']
+    assert tree.descendants('a') == {'b'}
+    assert tree.ancestors('orphan') == []
+
+
+def test_search_switches_to_in_children_above_max_codes(tree):
+    assert tree.search('category_2').to_dict() == {'categories': [{'operator': 'IN', 'value': sorted(SUBTREE)}]}
+    assert tree.search('category_2', include_children=False).to_dict() == {'categories': [{'operator': 'IN', 'value': ['category_2']}]}
+
+    tree.max_codes = len(SUBTREE) - 1
+    assert tree.search('category_2').to_dict() == {'categories': [{'operator': 'IN CHILDREN', 'value': ['category_2']}]}
+
+    search = AkeneoSearch().add('family', 'IN', ['shoes'])
+    assert tree.search('category_7', search=search) is search
+    assert set(search.to_dict()) == {'family', 'categories'}
+
+    with pytest.raises(ValueError):
+        tree.search('missing')
+
+
+@pytest.mark.parametrize('max_codes', [500, 1])
+def test_move_subtree(mock_server, tree, max_codes):
+    tree.max_codes = max_codes
+    mock_server.reset_counters()
+    report = tree.move('category_2', 'category_0', include_children=True, dry_run=True)
+    assert (report['seen'], report['changed'], report['requests']) == (200, 200, 0)
+    assert mock_server.patched == 0
+
+    report = tree.move('category_2', 'category_0', include_children=True)
+    assert (report['seen'], report['changed'], report['updated'], report['failed'], report['requests']) == (200, 200, 200, 0, 2)
+    assert mock_server.patched == 200
+
+    # Only the products of the category itself are moved without its children
+    report = tree.move('category_2', 'category_0', dry_run=True)
+    assert report['seen'] == report['changed'] == 40
+
+
+@pytest.fixture
+def patches(memory_connector):
+    rejected = set()
+    sent = []
+
+    def handler(method, url, headers, body):
+        lines = []
+        for number, line in enumerate(body.splitlines(), 1):
+            payload = json.loads(line)
+            sent.append(payload)
+            status = 422 if payload['identifier'] in rejected else 204
+            lines.append({'line': number, 'identifier': payload['identifier'], 'status_code': status, 'message': 'Invalid' if status == 422 else None})
+        return 200, '\n'.join(json.dumps(line) for line in lines)
+
+    memory_connector.transport.handler = handler
+    return sent, rejected
+
+
+@pytest.fixture
+def small_tree(memory_connector):
+    tree = AkeneoCategoryTree(memory_connector)
+    tree.build({code: {'code': code, 'parent': None if code == 'master' else 'master'} for code in ('master', 'sale', 'archive')})
+    return tree
+
+
+def test_reassign_counts_per_line_failures(memory_connector, small_tree, patches):
+    sent, rejected = patches
+    rejected.add('shoe-2')
+    products = [
+        {'identifier': 'shoe-1', 'categories': ['master', 'sale']},
+        {'identifier': 'shoe-2', 'categories': ['sale']},
+        AkeneoProduct({'identifier': 'shoe-3', 'categories': ['archive']}, connector=memory_connector),
+        {'identifier': 'shoe-4', 'categories': None},
+    ]
+    report = small_tree.reassign(products, add=['archive'], remove=['sale'], batch_size=2)
+
+    assert (report['seen'], report['changed'], report['updated'], report['failed'], report['requests']) == (4, 3, 2, 1, 2)
+    assert report['errors'] == [('shoe-2', 'Invalid')]
+    assert sent == [
+        {'identifier': 'shoe-1', 'categories': ['master', 'archive']},
+        {'identifier': 'shoe-2', 'categories': ['archive']},
+        {'identifier': 'shoe-4', 'categories': ['archive']},
+    ]
+
+    with pytest.raises(ValueError):
+        small_tree.reassign(products, add=['missing'])
+
+
+def test_reassign_skips_products_without_categories(small_tree, patches):
+    sent, _ = patches
+    report = small_tree.reassign([{'identifier': 'shoe-1'}, {'identifier': 'shoe-2', 'categories': []}], add=['sale'])
+
+    # The product without its categories is not sent, as that would replace all of them
+    assert (report['seen'], report['changed'], report['updated'], report['failed']) == (2, 1, 1, 1)
+    assert report['errors'] == [('shoe-1', 'Missing categories')]
+    assert sent == [{'identifier': 'shoe-2', 'categories': ['sale']}]
+
+
+def test_failed_request_fails_the_whole_batch(memory_connector, small_tree):
+    memory_connector.transport.add('PATCH', memory_connector.products_url, {'code': 400, 'message': 'Invalid json message received'}, status=400)
+    report = small_tree.reassign([{'identifier': f"shoe-{index}", 'categories': []} for index in range(3)], add=['sale'])
+    assert (report['changed'], report['updated'], report['failed'], report['requests']) == (3, 0, 3, 1)
+    assert report['errors'] == [(f"shoe-{index}", 'Request failed') for index in range(3)]
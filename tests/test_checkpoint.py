@@ -0,0 +1,38 @@
+import os
+
+from akeneo_connector.akeneo_checkpoint import PaginatorCheckpoint, read_json, write_json_atomic
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+
+def paginator(connector, path: str) -> AkeneoPaginator:
+    checkpoint = PaginatorCheckpoint(path, every=1)
+    return AkeneoPaginator(connector.products_url, page_size=100, pagination_type='search_after', connector=connector, checkpoint=checkpoint)
+
+
+def test_write_json_atomic(tmp_path):
+    path = str(tmp_path / 'state.json')
+    write_json_atomic(path, {'url': 'next'})
+    write_json_atomic(path, {'url': None})
+    assert read_json(path) == {'url': None}
+    assert os.listdir(tmp_path) == ['state.json']
+    assert read_json(str(tmp_path / 'missing.json')) is None
+
+
+def test_crawl_resumes_where_it_stopped(tmp_path, mock_connector):
+    path = str(tmp_path / 'crawl.json')
+    first = []
+    for product in paginator(mock_connector, path):
+        first.append(product.identifier)
+        if len(first) == 250:
+            break
+
+    # The item being processed when the crawl stopped is yielded again
+    second = [product.identifier for product in paginator(mock_connector, path)]
+    assert second[0] == first[-1]
+    assert first[:-1] + second == [f"{i:08d}" for i in range(1000)]
+    assert read_json(path)['done'] is True
+
+    # A finished crawl yields nothing until the checkpoint is cleared
+    assert list(paginator(mock_connector, path)) == []
+    PaginatorCheckpoint(path).clear()
+    assert sum(1 for _ in paginator(mock_connector, path)) == 1000
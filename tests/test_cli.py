@@ -0,0 +1,22 @@
+import pytest
+
+from akeneo_connector import cli
+
+
+@pytest.mark.parametrize('search, message', [
+    ('{"enabled": [', 'argument --search: invalid JSON'),
+    ('[1, 2]', 'argument --search: must be a JSON object'),
+])
+def test_invalid_search_is_a_usage_error(capsys, search, message):
+    with pytest.raises(SystemExit) as exit:
+        cli.main(['export', 'products.jsonl', '--search', search])
+    assert exit.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_search_is_decoded(monkeypatch):
+    exports = []
+    monkeypatch.setattr(cli, 'export', exports.append)
+    monkeypatch.setattr(cli, 'load_dotenv', lambda: None)
+    cli.main(['export', 'products.jsonl', '--search', '{"enabled": [{"operator": "=", "value": true}]}'])
+    assert exports[0].search == {'enabled': [{'operator': '=', 'value': True}]}
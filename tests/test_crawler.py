@@ -0,0 +1,61 @@
+import queue
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from akeneo_connector.akeneo_crawler import AkeneoCrawler, CrawlShard, _report_lost_worker, shards_by_family
+
+
+def test_crawl_merges_disjoint_shards(tmp_path, mock_server, capfd):
+    crawler = AkeneoCrawler(
+        shards_by_family(['shoes', 'shirts']),
+        processes=2,
+        checkpoint_dir=str(tmp_path),
+        connector_options=mock_server.connector_options()
+    )
+    items = list(crawler)
+    assert all(isinstance(item, dict) for item in items)
+    assert sorted(item['identifier'] for item in items) == [f"{i:08d}" for i in range(1000)]
+    assert crawler.counts == {'family-shoes': 334, 'family-shirts': 333, 'family-other': 333, 'family-none': 0}
+
+    # Worker connectors do not log every request
+    assert capfd.readouterr().out == ''
+
+    # Finished shards are skipped when crawling again
+    assert list(crawler) == []
+
+
+def test_failed_shard_is_reported_and_resumed(tmp_path, mock_server):
+    # The mock answers filters it does not support with a 422
+    shards = [CrawlShard('shoes', {'family': [{'operator': 'IN', 'value': ['shoes']}]}), CrawlShard('enabled', {'enabled': [{'operator': '=', 'value': True}]})]
+    crawler = AkeneoCrawler(shards, processes=2, checkpoint_dir=str(tmp_path), connector_options=dict(mock_server.connector_options(), retries=0))
+
+    items = []
+    with pytest.raises(RuntimeError, match=r'Crawl failed for shards: enabled \(RuntimeError'):
+        for item in crawler:
+            items.append(item)
+    assert len(items) == 334
+    assert list(crawler.errors) == ['enabled']
+
+    # Only the failed shard is crawled again
+    with pytest.raises(RuntimeError):
+        list(crawler)
+
+
+def test_only_lost_workers_are_reported_by_the_pool():
+    messages = queue.Queue()
+    for error in (None, RuntimeError('Reported by the worker'), BrokenProcessPool('Killed')):
+        future = Future()
+        if error is None:
+            future.set_result(0)
+        else:
+            future.set_exception(error)
+        _report_lost_worker(messages, 'shard', future)
+
+    cancelled = Future()
+    cancelled.cancel()
+    _report_lost_worker(messages, 'shard', cancelled)
+
+    assert messages.get_nowait() == ('done', 'shard', "BrokenProcessPool('Killed')", None)
+    assert messages.empty()
@@ -0,0 +1,73 @@
+import time
+
+from akeneo_connector.akeneo_events import AkeneoEventReceiver, AkeneoEventSimulator, sign, verify_signature
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_verify_signature():
+    timestamp = int(time.time())
+    signature = sign('secret', timestamp, b'{}')
+    assert verify_signature('secret', str(timestamp), b'{}', signature)
+    assert not verify_signature('other', str(timestamp), b'{}', signature)
+    assert not verify_signature('secret', str(timestamp - 3600), b'{}', sign('secret', timestamp - 3600, b'{}'))
+
+
+def test_batches_refreshed_products(mock_connector):
+    batches = []
+    with AkeneoEventReceiver(batches.append, secret='secret', connector=mock_connector, batch_size=100, flush_interval=0.2) as receiver:
+        simulator = AkeneoEventSimulator(receiver.url, secret='secret')
+        statuses = simulator.products_changed([f"{i:08d}" for i in range(150)] + ['99999999'])
+        assert set(statuses) == {200}
+        assert AkeneoEventSimulator(receiver.url, secret='wrong').products_changed(['00000001']) == [401]
+        assert wait_for(lambda: sum(len(batch.products) for batch in batches) == 150)
+
+    assert receiver.rejected == 1
+    assert receiver.errors == 0
+    assert ['99999999'] in [batch.removed for batch in batches]
+
+
+def test_refresh_errors_keep_the_receiver_alive(mock_server, mock_connector):
+    batches = []
+    errors = []
+    mock_server.error_rate = 1.0
+    receiver = AkeneoEventReceiver(
+        batches.append,
+        connector=mock_connector,
+        flush_interval=0.1,
+        on_error=lambda error, batch: errors.append(batch)
+    )
+    with receiver:
+        simulator = AkeneoEventSimulator(receiver.url)
+        simulator.products_changed(['00000001', '00000002'])
+        assert wait_for(lambda: len(batches) == 1)
+        assert batches[0].failed == ['00000001', '00000002']
+        assert batches[0].products == []
+        assert receiver.threads[1].is_alive()
+
+        # Once Akeneo answers again, the next events are delivered
+        mock_server.error_rate = 0.0
+        simulator.products_changed(['00000003'])
+        assert wait_for(lambda: len(batches) == 2)
+        assert [product.identifier for product in batches[1].products] == ['00000003']
+
+    assert receiver.errors == 1
+    assert errors[0].failed == ['00000001', '00000002']
+
+
+def test_callback_errors_are_counted(mock_connector):
+    def callback(batch):
+        raise ValueError('broken')
+
+    errors = []
+    with AkeneoEventReceiver(callback, connector=mock_connector, refresh=False, flush_interval=0.1, on_error=lambda e, b: errors.append(e)) as receiver:
+        AkeneoEventSimulator(receiver.url).products_changed(['00000001'])
+        assert wait_for(lambda: receiver.errors == 1)
+        assert receiver.threads[1].is_alive()
+
+    assert isinstance(errors[0], ValueError)
@@ -0,0 +1,90 @@
+import csv
+import json
+
+import pytest
+from mock_akeneo import MockAkeneoServer
+
+from akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_checkpoint import PaginatorCheckpoint
+from akeneo_connector.akeneo_exporter import AkeneoExporter
+from akeneo_connector.akeneo_options import AkeneoOptionCache
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+
+def test_formatted_export_resolves_option_labels(tmp_path, memory_connector):
+    transport = memory_connector.transport
+    product = {
+        'identifier': 'shoe-1',
+        'family': 'shoes',
+        'categories': [],
+        'values': {
+            'color': [{'locale': 'en_US', 'scope': None, 'data': 'red'}],
+            'main_color': [{'locale': None, 'scope': None, 'data': 'red'}],
+        },
+    }
+    transport.add('GET', memory_connector.products_url, {'_links': {}, '_embedded': {'items': [product]}})
+    transport.add('GET', memory_connector.attributes_url + '/color', {'code': 'color', 'type': 'pim_catalog_simpleselect'})
+    transport.add('GET', memory_connector.attributes_url + '/main_color', {'code': 'main_color', 'type': 'pim_catalog_simpleselect'})
+    for attribute in ('color', 'main_color'):
+        transport.add('GET', memory_connector.attribute_options_url.format(attribute=attribute), {
+            '_links': {},
+            '_embedded': {'items': [{'code': 'red', 'attribute': attribute, 'labels': {'en_US': 'Red', 'nl_NL': 'Rood'}}]},
+        })
+    memory_connector.option_cache = AkeneoOptionCache(memory_connector)
+
+    path = str(tmp_path / 'products.csv')
+    paginator = AkeneoPaginator(memory_connector.products_url, page_size=100, connector=memory_connector)
+    exporter = AkeneoExporter(path, paginator=paginator, locales=['en_US'], formatted=True, progress_interval=0)
+    assert exporter.run() == 1
+
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file, delimiter=';'))
+    assert rows[0]['color-en_US'] == 'Red'
+
+    # Values without a locale are formatted in the requested locale, not the default one
+    assert rows[0]['main_color'] == 'Red'
+
+
+class FailingServer(MockAkeneoServer):
+    """
+    Fails the request with the given number, e.g. the third page of an export.
+    """
+    fail_at = None
+
+    def delay(self) -> bool:
+        super().delay()
+        return self.requests == self.fail_at
+
+
+def test_interrupted_export_resumes_from_the_checkpoint(tmp_path):
+    path = str(tmp_path / 'products.jsonl')
+    with FailingServer(product_count=350) as server:
+        connector = AkeneoConnector(**server.connector_options(), log_requests=False)
+
+        def exporter(resume: bool):
+            paginator = AkeneoPaginator(connector.products_url, page_size=100, pagination_type='search_after', connector=connector)
+            return AkeneoExporter(path, paginator=paginator, resume=resume, queue_size=1, progress_interval=0, progress_stream=None)
+
+        server.reset_counters()
+        server.fail_at = 3
+        with pytest.raises(RuntimeError, match='Failed to fetch'):
+            exporter(resume=False).run()
+
+        # The checkpoint holds the position after the last written page, like a paginator's own
+        state = PaginatorCheckpoint(path + '.checkpoint').load()
+        assert (state['offset'], state['count'], state['done']) == (100, 200, False)
+        assert 'search_after=00000099' in state['url']
+
+        assert exporter(resume=True).run() == 150
+        assert exporter(resume=True).run() == 350
+
+    with open(path, encoding='utf-8') as file:
+        identifiers = [json.loads(line)['identifier'] for line in file]
+    assert identifiers == [f"{index:08d}" for index in range(350)]
+
+    # Without resume the export starts over
+    with MockAkeneoServer(product_count=10) as server:
+        connector = AkeneoConnector(**server.connector_options(), log_requests=False)
+        paginator = AkeneoPaginator(connector.products_url, page_size=100, connector=connector)
+        assert AkeneoExporter(path, paginator=paginator, progress_interval=0, progress_stream=None).run() == 10
+    assert PaginatorCheckpoint(path + '.checkpoint').load()['count'] == 10
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from akeneo_connector.akeneo_json import InternCodec, InternTable, JsonCodec, PageStream, get_codec, shared_intern_table
+
+
+PAGE = {
+    '_links': {'self': {'href': 'http://akeneo.test/api/rest/v1/products?page=1'}},
+    'current_page': 1,
+    '_embedded': {'items': [
+        {'identifier': f"product-{i}", 'values': {'name': [{'locale': 'de_DE', 'scope': None, 'data': 'Größe [1], "XL"'}]}}
+        for i in range(20)
+    ]},
+}
+
+
+def chunked(data: bytes, size: int, consumed: list | None = None):
+    for start in range(0, len(data), size):
+        if consumed is not None:
+            consumed.append(start + size)
+        yield data[start:start + size]
+
+
+@pytest.mark.parametrize('size', [1, 7, 4096])
+def test_page_stream_decodes_items_across_chunks(size):
+    stream = PageStream(chunked(json.dumps(PAGE, ensure_ascii=False, indent=1).encode('utf-8'), size))
+    assert list(stream) == PAGE['_embedded']['items']
+    assert stream.count == 20
+    assert stream.envelope == dict(PAGE, _embedded={'items': []})
+
+
+def test_page_stream_reads_incrementally():
+    data = json.dumps(PAGE).encode('utf-8')
+    consumed = []
+    items = iter(PageStream(chunked(data, 64, consumed)))
+    assert next(items)['identifier'] == 'product-0'
+    assert consumed[-1] < len(data) / 4
+
+
+def test_page_stream_without_items():
+    stream = PageStream(chunked(b'{"code": 404, "message": "Not found"}', 5))
+    assert list(stream) == []
+    assert stream.envelope == {'code': 404, 'message': 'Not found'}
+
+
+def test_page_stream_truncated_body():
+    data = json.dumps(PAGE).encode('utf-8')[:300]
+    with pytest.raises(json.JSONDecodeError):
+        list(PageStream(chunked(data, 16)))
+
+
+def test_intern_codec_deduplicates_repeated_strings():
+    table = InternTable()
+    codec = InternCodec(table)
+    data = json.dumps(PAGE).encode('utf-8')
+    first, second = codec.loads(data), codec.loads(data)
+
+    # Decoding is unchanged, but keys and the values of `keys` are shared between documents
+    assert first == second == PAGE
+    first_value = first['_embedded']['items'][0]['values']['name'][0]
+    second_value = second['_embedded']['items'][5]['values']['name'][0]
+    assert next(iter(first_value)) is next(iter(second_value))
+    assert first_value['locale'] is second_value['locale']
+    assert first_value['data'] is not second_value['data']
+
+    stats = table.stats()
+    assert stats['hits'] > 0 and stats['saved_bytes'] > 0
+    assert 'de_DE' in table.strings and 'product-0' not in table.strings
+
+    table.clear()
+    assert table.stats() == {'strings': 0, 'hits': 0, 'saved_bytes': 0}
+
+
+def test_intern_table_limits():
+    table = InternTable(keys={'family'}, max_length=8)
+    obj = InternCodec(table).loads('{"family": "shoes", "scope": "ecommerce", "categories": ["a"], "parent": "a-very-long-code"}')
+    assert obj['family'] is table.strings['shoes']
+    assert 'ecommerce' not in table.strings and 'a' not in table.strings
+
+    obj = InternCodec(table).loads('{"family": "a-very-long-code"}')
+    assert 'a-very-long-code' not in table.strings
+
+
+def test_intern_codec_while_streaming():
+    table = InternTable()
+    stream = PageStream(chunked(json.dumps(PAGE).encode('utf-8'), 32), codec=InternCodec(table))
+    items = list(stream)
+    assert items == PAGE['_embedded']['items']
+    assert items[0]['values']['name'][0]['locale'] is items[19]['values']['name'][0]['locale']
+
+
+def test_get_codec():
+    assert get_codec('intern').table is shared_intern_table
+    assert isinstance(get_codec('json'), JsonCodec)
+    codec = InternCodec(InternTable())
+    assert get_codec(codec) is codec
+    with pytest.raises(ValueError):
+        get_codec('yaml')
@@ -0,0 +1,84 @@
+import pytest
+
+from akeneo_connector.akeneo_metrics import AkeneoMetrics, Histogram, endpoint_of
+
+
+def test_endpoint_of():
+    assert endpoint_of('https://akeneo.test/api/rest/v1/products/shoe-1') == 'products/{code}'
+    assert endpoint_of('https://akeneo.test/api/rest/v1/products?limit=100') == 'products'
+    assert endpoint_of('https://akeneo.test/api/rest/v1/attributes/color/options/red') == 'attributes/{code}/options/{code}'
+    assert endpoint_of('https://akeneo.test/api/rest/v1/media-files/a/b/c.jpg/download') == 'media-files/{code}/download'
+    assert endpoint_of('https://akeneo.test/api/oauth/v1/token') == 'token'
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.4))
+    assert histogram.percentile(0.5) is None
+
+    for value in (0.05, 0.1, 0.15, 0.3, 1.0):
+        histogram.observe(value)
+    # Bounds are inclusive, like Prometheus' 'le'
+    assert histogram.counts == [2, 1, 1, 1]
+    assert (histogram.count, histogram.sum) == (5, pytest.approx(1.6))
+    assert histogram.percentile(0.2) == pytest.approx(0.05)
+    assert histogram.percentile(0.5) == pytest.approx(0.15)
+    assert histogram.percentile(0.7) == pytest.approx(0.3)
+    # Observations above the last bucket are reported as its bound
+    assert histogram.percentile(1.0) == pytest.approx(0.4)
+
+
+def events():
+    yield {'event': 'request_end', 'method': 'GET', 'endpoint': 'products/{code}', 'status': 200, 'elapsed': 0.003, 'bytes_in': 100, 'bytes_out': 0}
+    yield {'event': 'request_end', 'method': 'GET', 'endpoint': 'products/{code}', 'status': 404, 'elapsed': 0.02, 'bytes_in': 20, 'bytes_out': 0}
+    yield {'event': 'request_end', 'method': 'PATCH', 'endpoint': 'products', 'status': 200, 'elapsed': 0.4, 'bytes_in': 50, 'bytes_out': 900}
+    yield {'event': 'retry', 'endpoint': 'products'}
+    yield {'event': 'error', 'endpoint': 'products/{code}'}
+    yield {'event': 'token_refresh'}
+
+
+def test_prometheus_text():
+    metrics = AkeneoMetrics(buckets=(0.01, 0.1, 1.0))
+    for event in events():
+        metrics.handle(event)
+
+    lines = metrics.to_prometheus(labels={'tenant': 'brand "a"'}).splitlines()
+    assert '# TYPE akeneo_request_duration_seconds histogram' in lines
+    prefix = 'akeneo_request_duration_seconds_bucket{tenant="brand \\"a\\"",method="GET",endpoint="products/{code}"'
+    assert [line for line in lines if line.startswith(prefix)] == [
+        prefix + ',le="0.01"} 1',
+        prefix + ',le="0.1"} 2',
+        prefix + ',le="1.0"} 2',
+        prefix + ',le="+Inf"} 2',
+    ]
+    assert 'akeneo_request_duration_seconds_count{tenant="brand \\"a\\"",method="PATCH",endpoint="products"} 1' in lines
+    assert 'akeneo_requests_total{tenant="brand \\"a\\"",method="GET",endpoint="products/{code}",status="404"} 1' in lines
+    assert 'akeneo_request_bytes_total{tenant="brand \\"a\\"",direction="out"} 900' in lines
+    assert 'akeneo_retries_total{tenant="brand \\"a\\"",endpoint="products"} 1' in lines
+    assert 'akeneo_request_errors_total{tenant="brand \\"a\\"",endpoint="products/{code}"} 1' in lines
+    assert 'akeneo_token_refreshes_total{tenant="brand \\"a\\""} 1' in lines
+
+    assert metrics.to_prometheus(prefix='pim').splitlines()[-1] == 'pim_token_refreshes_total 1'
+    assert metrics.summary()['GET products/{code}']['count'] == 2
+    assert metrics.percentile('products', 0.5, method='PATCH') == pytest.approx(0.55)
+    assert metrics.percentile('products', 0.5) is None
+
+
+def test_collects_the_requests_of_a_connector(memory_connector):
+    metrics = AkeneoMetrics()
+    metrics.attach(memory_connector)
+    transport = memory_connector.transport
+    for identifier, status in (('shoe-1', 200), ('shoe-2', 200), ('missing', 404)):
+        url = memory_connector.product_url.format(identifier=identifier)
+        transport.add('GET', url, {'identifier': identifier} if status == 200 else {'code': 404}, status=status)
+        memory_connector.get(url)
+
+    assert metrics.requests == {('GET', 'products/{code}', 200): 2, ('GET', 'products/{code}', 404): 1}
+    assert metrics.latency[('GET', 'products/{code}')].count == 3
+    assert metrics.bytes_in > 0
+
+    metrics.detach(memory_connector)
+    memory_connector.get(memory_connector.product_url.format(identifier='shoe-1'))
+    assert sum(metrics.requests.values()) == 3
+
+    metrics.reset()
+    assert metrics.requests == {} and metrics.summary() == {}
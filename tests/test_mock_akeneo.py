@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import pytest
+
+from akeneo_connector.akeneo_crawler import shards_by_family, shards_by_updated
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_search import AkeneoSearch
+
+
+def identifiers(connector, search: AkeneoSearch) -> list[str]:
+    paginator = AkeneoPaginator(connector.products_url, page_size=100, pagination_type='search_after', search=search, connector=connector)
+    return [product.identifier for product in paginator]
+
+
+@pytest.mark.parametrize('shards', [
+    shards_by_family(['shoes', 'shirts']),
+    shards_by_updated(datetime(2024, 6, 5), datetime(2024, 6, 20), 4),
+])
+def test_shards_cover_the_catalog_once(mock_connector, shards):
+    found = [identifier for shard in shards for identifier in identifiers(mock_connector, shard.search)]
+    assert sorted(found) == [f"{i:08d}" for i in range(1000)]
+
+
+def test_category_filters(mock_connector):
+    assert len(identifiers(mock_connector, AkeneoSearch().add('categories', 'IN', ['category_1']))) == 40
+    assert len(identifiers(mock_connector, AkeneoSearch().add('categories', 'IN CHILDREN', ['category_1']))) == 200
+
+
+def test_unsupported_filters_are_rejected(mock_connector):
+    search = AkeneoSearch().add('enabled', '=', True)
+    assert mock_connector.get(mock_connector.products_url + '?search=' + search.to_json()) is None
@@ -0,0 +1,42 @@
+import pytest
+from mock_akeneo import MockAkeneoServer
+
+from akeneo_connector import AkeneoConnector
+from akeneo_connector.akeneo_checkpoint import PaginatorCheckpoint
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+
+
+class FailingServer(MockAkeneoServer):
+    """
+    Fails the request with the given number, e.g. the third page of a crawl.
+    """
+    fail_at = None
+
+    def delay(self) -> bool:
+        super().delay()
+        return self.requests == self.fail_at
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_failed_page_raises_and_resumes(tmp_path, stream):
+    with FailingServer(product_count=350) as server:
+        connector = AkeneoConnector(**server.connector_options(), log_requests=False)
+        server.reset_counters()
+        server.fail_at = 3
+
+        def paginator():
+            checkpoint = PaginatorCheckpoint(str(tmp_path / 'crawl.json'), interval=3600)
+            return AkeneoPaginator(
+                connector.products_url, page_size=100, pagination_type='search_after', stream=stream,
+                connector=connector, checkpoint=checkpoint
+            )
+
+        first = []
+        with pytest.raises(RuntimeError, match='Failed to fetch'):
+            for product in paginator():
+                first.append(product.identifier)
+        assert len(first) == 200
+
+        # The position was saved when the page failed, so nothing is skipped or repeated
+        second = [product.identifier for product in paginator()]
+        assert first + second == [f"{i:08d}" for i in range(350)]
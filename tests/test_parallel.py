@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_parallel import imap_products, map_products
+from akeneo_connector.akeneo_product import AkeneoProduct
+
+
+def test_map_products_fetches_identifiers_and_captures_errors(mock_server, mock_connector):
+    def family(product):
+        if product.identifier == '00000002':
+            raise RuntimeError('Broken product')
+        return product.family
+
+    items = ['00000000', '00000001', '00000002', 'missing', AkeneoProduct({'identifier': 'local', 'family': 'bags'}, connector=mock_connector)]
+    mock_server.reset_counters()
+    results = map_products(family, items, workers=4, connector=mock_connector)
+
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    assert [result.identifier for result in results] == ['00000000', '00000001', '00000002', 'missing', 'local']
+    assert [result.value for result in results] == ['shoes', 'shirts', None, None, 'bags']
+    assert [result.ok for result in results] == [True, True, False, False, True]
+    assert isinstance(results[2].error, RuntimeError)
+    assert isinstance(results[3].error, LookupError)
+
+    # Only the identifiers are fetched
+    assert mock_server.requests == 4
+
+
+def test_map_products_over_a_paginator(mock_server, mock_connector):
+    paginator = AkeneoPaginator(mock_connector.products_url, page_size=100, connector=mock_connector)
+    mock_server.reset_counters()
+    results = map_products(lambda product: product.identifier, paginator, workers=8)
+
+    # The items of the pages are used as they are, with the paginator's connector
+    assert [result.value for result in results] == [f"{index:08d}" for index in range(1000)]
+    assert mock_server.requests == 10
+
+
+def test_imap_products_bounds_the_items_in_flight(memory_connector):
+    consumed = []
+    running = []
+    lock = threading.Lock()
+
+    def items():
+        for index in range(40):
+            consumed.append(index)
+            yield {'identifier': str(index)}
+
+    def work(product):
+        with lock:
+            running.append(product.identifier)
+        time.sleep(0.002)
+        return int(product.identifier)
+
+    ahead = []
+    for result in imap_products(work, items(), workers=2, connector=memory_connector, max_in_flight=4):
+        ahead.append(len(consumed) - result.index)
+    # At most 4 items are queued or running, and one more is taken from the input while waiting for room
+    assert max(ahead) == 4 + 1
+    assert sorted(int(identifier) for identifier in running) == list(range(40))
+
+    unordered = list(imap_products(work, items(), workers=4, connector=memory_connector, ordered=False))
+    assert sorted(result.value for result in unordered) == list(range(40))
+
+    with pytest.raises(ValueError):
+        map_products(work, [], workers=0, connector=memory_connector)
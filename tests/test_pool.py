@@ -0,0 +1,57 @@
+import pytest
+
+from akeneo_connector.akeneo_pool import AkeneoConnectorPool, tenant_prefix
+from akeneo_connector.akeneo_transport import MemoryTransport
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    for name, value in {
+        'AKENEO_ORIGIN': 'brand-a.test',
+        'AKENEO_AUTH_URL': 'http://brand-a.test/api/oauth/v1/token',
+        'AKENEO_USERNAME': 'brand-a',
+        'AKENEO_PASSWORD': 'brand-a-password',
+        'AKENEO_AUTH_TOKEN': 'brand-a:secret',
+        'AKENEO_BRAND_A_ORIGIN': 'brand-a.test',
+        'AKENEO_BRAND_A_SCHEME': 'http',
+        'AKENEO_BRAND_A_AUTH_URL': 'http://brand-a.test/api/oauth/v1/token',
+        'AKENEO_BRAND_A_USERNAME': 'brand-a',
+        'AKENEO_BRAND_A_PASSWORD': 'brand-a-password',
+        'AKENEO_BRAND_A_AUTH_TOKEN': 'brand-a:secret',
+        'AKENEO_BRAND_B_USERNAME': 'brand-b',
+        'AKENEO_BRAND_B_PASSWORD': 'brand-b-password',
+        'AKENEO_BRAND_B_AUTH_TOKEN': 'brand-b:secret',
+    }.items():
+        monkeypatch.setenv(name, value)
+
+
+def test_tenant_prefix():
+    assert tenant_prefix('brand-a') == 'AKENEO_BRAND_A_'
+
+
+def test_tenants_use_their_own_variables(environment):
+    memory = MemoryTransport()
+    with AkeneoConnectorPool({'brand-a': {'transport': memory}}, log_requests=False) as pool:
+        connector = pool['brand-a']
+        assert connector.products_url == 'http://brand-a.test/api/rest/v1/products'
+        assert pool['brand-a'] is connector
+    assert [url for _, url, _ in memory.requests] == ['http://brand-a.test/api/oauth/v1/token']
+
+
+def test_missing_tenant_variables_do_not_fall_back(environment):
+    memory = MemoryTransport()
+    with AkeneoConnectorPool({'brand-b': {'transport': memory}}, log_requests=False) as pool:
+        with pytest.raises(ValueError) as error:
+            pool.get('brand-b')
+
+    assert 'AKENEO_BRAND_B_ORIGIN' in str(error.value)
+    assert 'AKENEO_BRAND_B_AUTH_URL' in str(error.value)
+    assert memory.requests == []
+
+
+def test_fan_out_reports_errors_per_tenant(environment):
+    with AkeneoConnectorPool({'brand-a': {'transport': MemoryTransport()}, 'brand-b': {}}, log_requests=False) as pool:
+        results = pool.fan_out(lambda tenant, connector: connector.origin)
+
+    assert results['brand-a'].value == 'brand-a.test'
+    assert isinstance(results['brand-b'].error, ValueError)
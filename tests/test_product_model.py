@@ -0,0 +1,71 @@
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_product import AkeneoProduct
+from akeneo_connector.akeneo_product_model import AkeneoModelCache, AkeneoProductModel
+
+
+def test_prefetch_fetches_models_and_parents_in_bulk(mock_server, mock_connector):
+    cache = AkeneoModelCache(mock_connector)
+    mock_server.reset_counters()
+    cache.prefetch(f"sub_{i}" for i in range(250))
+
+    # Three pages of sub-models, then one page with their 50 root models
+    assert mock_server.requests == 4
+    assert cache.requests == 4
+    assert len(cache) == 300
+    assert isinstance(cache.get('root_49'), AkeneoProductModel)
+
+    # Cached and unknown models are not fetched again
+    cache.prefetch(['sub_0', 'root_0', 'missing'])
+    cache.prefetch(['missing'])
+    assert cache.get('missing') is None
+    assert mock_server.requests == 5
+
+
+def test_cached_model_avoids_a_request(mock_server, mock_connector):
+    cache = AkeneoModelCache(mock_connector)
+    cache.add({'code': 'sub_0', 'family_variant': 'by_size', 'parent': None, 'values': {}})
+    mock_server.reset_counters()
+    assert cache.get('sub_0').code == 'sub_0'
+    assert mock_server.requests == 0
+
+    assert cache.get('sub_1').parent == 'root_0'
+    assert cache.get('sub_1') is cache.get('sub_1')
+    assert mock_server.requests == 1
+
+
+def test_values_are_inherited_from_parents(memory_connector):
+    cache = AkeneoModelCache(memory_connector)
+    cache.add({'code': 'root', 'parent': None, 'values': {
+        'brand': [{'locale': None, 'scope': None, 'data': 'Acme'}],
+        'name': [{'locale': 'en_US', 'scope': None, 'data': 'Root name'}, {'locale': 'nl_NL', 'scope': None, 'data': 'Naam'}],
+    }})
+    cache.add({'code': 'sub', 'parent': 'root', 'values': {'size': [{'locale': None, 'scope': None, 'data': 'm'}]}})
+    product = AkeneoProduct({
+        'identifier': 'shoe-1',
+        'parent': 'sub',
+        'values': {'name': [{'locale': 'en_US', 'scope': None, 'data': 'Shoe'}]},
+    }, connector=memory_connector)
+
+    assert [model.code for model in cache.ancestors(product)] == ['sub', 'root']
+    resolved = cache.resolve(product)
+    assert resolved.values['brand'][0]['data'] == 'Acme'
+    assert resolved.values['size'][0]['data'] == 'm'
+    assert {value['locale']: value['data'] for value in resolved.values['name']} == {'en_US': 'Shoe', 'nl_NL': 'Naam'}
+    assert 'brand' not in product.values
+    assert not any('product-models' in url for _, url, _ in memory_connector.transport.requests)
+
+
+def test_paginator_prefetches_the_parents_of_every_page(mock_server, mock_connector):
+    cache = AkeneoModelCache(mock_connector)
+    paginator = AkeneoPaginator(mock_connector.products_url, page_size=100, connector=mock_connector, model_cache=cache)
+    mock_server.reset_counters()
+    products = list(paginator)
+
+    # 10 pages of products, and per page one request for its 20 sub-models and one for their root models
+    assert len(products) == 1000
+    assert mock_server.requests == 10 + 10 * 2
+    assert len(cache) == 200 + 40
+
+    mock_server.reset_counters()
+    assert all('brand' in cache.merged_values(product) for product in products[:50])
+    assert mock_server.requests == 0
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from akeneo_connector.akeneo_paginator import AkeneoPaginator
+from akeneo_connector.akeneo_profiler import AkeneoProfiler
+
+
+def test_report_per_phase_and_page():
+    profiler = AkeneoProfiler()
+    profiler.add('network', 0.2)
+    with profiler.phase('decode'):
+        time.sleep(0.01)
+    profiler.page_done()
+    profiler.add('network', 0.4)
+    profiler.page_done()
+
+    report = profiler.report()
+    assert report['pages'] == 2
+    assert report['phases']['network'] == {'seconds': pytest.approx(0.6), 'share': pytest.approx(0.6 / report['wall']), 'count': 2}
+    assert report['phases']['decode']['seconds'] >= 0.01
+    assert report['per_page']['network'] == {'mean': pytest.approx(0.3), 'max': pytest.approx(0.4)}
+    assert report['per_page']['decode']['max'] == report['phases']['decode']['seconds']
+
+    # Phases without measurements are left out of the table
+    lines = profiler.format_report().splitlines()
+    assert lines[0].endswith('over 2 pages')
+    assert [line.split()[0] for line in lines[2:]] == ['network', 'decode', 'other']
+
+    profiler.reset()
+    assert profiler.report()['pages'] == 0 and profiler.report()['per_page'] == {}
+
+
+def test_caller_time_excludes_formatting():
+    profiler = AkeneoProfiler()
+    mark = profiler.mark()
+    time.sleep(0.02)
+    profiler.add('format', 0.015)
+    profiler.add_caller(mark)
+    assert 0.005 <= profiler.totals['caller'] < 0.02
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_profiled_paginator(mock_server, mock_connector, stream):
+    paginator = AkeneoPaginator(mock_connector.products_url, page_size=100, connector=mock_connector, profile=True, stream=stream)
+    profiler = paginator.profiler
+    assert mock_connector.profiler is profiler
+
+    for product in paginator:
+        product.get_formatted_value('name', 'en_US')
+        time.sleep(0.0001)
+
+    report = profiler.report()
+    assert report['pages'] == 10
+    assert report['phases']['network']['count'] == 10
+    assert report['phases']['format']['count'] == 1000
+    assert report['phases']['caller']['count'] == 1000
+    assert report['phases']['caller']['seconds'] >= 1000 * 0.0001
+    assert report['phases']['stream' if stream else 'decode']['count'] > 0
+    assert report['phases']['decode' if stream else 'stream']['count'] == 0
+
+    profiler.detach(mock_connector)
+    assert mock_connector.profiler is None
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from akeneo_connector.akeneo_product import AkeneoProduct
+from akeneo_connector.akeneo_json import collection_results
+from akeneo_connector.akeneo_reconcile import AkeneoReconciler, FingerprintStore, digest, fingerprint
+
+
+LINES = [
+    {'line': 1, 'identifier': 'shoe-1', 'status_code': 204},
+    {'line': 2, 'identifier': 'shoe-2', 'status_code': 422, 'message': 'Validation failed.', 'errors': [{'property': 'values'}]},
+    {'line': 3, 'identifier': 'shoe-3', 'status_code': 201},
+]
+
+
+def test_collection_results_of_every_response_shape():
+    assert collection_results(None) is None
+    assert collection_results(LINES[0]) == [LINES[0]]
+    assert collection_results(LINES) == LINES
+    assert collection_results('\n'.join(json.dumps(line) for line in LINES) + '\n\n') == LINES
+
+
+def test_collection_results_of_a_collection_patch(memory_connector):
+    transport = memory_connector.transport
+    url = memory_connector.products_url
+    payloads = [{'identifier': line['identifier']} for line in LINES]
+
+    # Several lines are returned as text, a single line is decoded as JSON
+    transport.add('PATCH', url, '\n'.join(json.dumps(line) for line in LINES))
+    results = collection_results(memory_connector.update(url, payloads))
+    assert [result['status_code'] for result in results] == [204, 422, 201]
+    assert results[1]['errors'] == [{'property': 'values'}]
+
+    transport.add('PATCH', url, json.dumps(LINES[0]))
+    assert collection_results(memory_connector.update(url, payloads[:1])) == [LINES[0]]
+
+    transport.add('PATCH', url, {'code': 400, 'message': 'Invalid json message received'}, status=400)
+    assert collection_results(memory_connector.update(url, payloads)) is None
+    assert transport.requests[-1][2] == b'\n'.join(json.dumps(payload, separators=(',', ':')).encode() for payload in payloads)
+
+
+def product(identifier: str, name: str = 'Shoe', categories: list | None = None) -> dict:
+    return {
+        'identifier': identifier,
+        'family': 'shoes',
+        'categories': categories if categories is not None else ['master'],
+        'values': {'name': [{'locale': 'en_US', 'scope': None, 'data': name}]},
+    }
+
+
+@pytest.fixture
+def patches(memory_connector):
+    rejected = set()
+    sent = []
+
+    def handler(method, url, headers, body):
+        lines = []
+        for number, line in enumerate(body.splitlines(), 1):
+            payload = json.loads(line)
+            sent.append(payload)
+            status = 422 if payload['identifier'] in rejected else 204
+            lines.append({'line': number, 'identifier': payload['identifier'], 'status_code': status, 'message': 'Invalid' if status == 422 else None})
+        return 200, '\n'.join(json.dumps(line) for line in lines)
+
+    memory_connector.transport.handler = handler
+    return sent, rejected
+
+
+def test_reconcile_sends_only_changes(memory_connector, patches):
+    sent, _ = patches
+    reconciler = AkeneoReconciler(memory_connector)
+    assert reconciler.observe([product('shoe-1'), AkeneoProduct(product('shoe-2'), connector=memory_connector), product('shoe-3')]) == 3
+
+    report = reconciler.reconcile([
+        product('shoe-1'),
+        product('shoe-2', name='Boot'),
+        product('shoe-3', categories=['master', 'sale']),
+        product('shoe-4'),
+    ])
+    assert (report.seen, report.unchanged, report.changed, report.unknown, report.updated) == (4, 1, 2, 1, 3)
+    assert sent == [
+        {'identifier': 'shoe-2', 'values': {'name': [{'locale': 'en_US', 'scope': None, 'data': 'Boot'}]}},
+        {'identifier': 'shoe-3', 'categories': ['master', 'sale']},
+        product('shoe-4'),
+    ]
+
+    # Accepted changes are fingerprinted, so nothing is sent again
+    sent.clear()
+    report = reconciler.reconcile([product('shoe-2', name='Boot'), product('shoe-4')])
+    assert report.unchanged == 2
+    assert sent == []
+
+
+def test_rejected_lines_are_not_fingerprinted(memory_connector, patches):
+    sent, rejected = patches
+    rejected.add('shoe-1')
+    reconciler = AkeneoReconciler(memory_connector)
+    reconciler.observe([product('shoe-1')])
+
+    report = reconciler.reconcile([product('shoe-1', name='Boot')])
+    assert (report.failed, report.errors) == (1, [('shoe-1', 'Invalid')])
+
+    # The change is sent again until Akeneo accepts it
+    rejected.clear()
+    assert reconciler.reconcile([product('shoe-1', name='Boot')]).updated == 1
+    assert len(sent) == 2
+
+
+def test_dry_run_sends_nothing(memory_connector, patches):
+    sent, _ = patches
+    report = AkeneoReconciler(memory_connector).reconcile([product('shoe-1')], dry_run=True)
+    assert report.unknown == 1
+    assert sent == []
+
+
+def test_fingerprint_store_reloads_from_disk(tmp_path):
+    path = str(tmp_path / 'fingerprints.db')
+    reconciler = AkeneoReconciler(store=path, sink=lambda batch: [])
+    reconciler.observe([product('shoe-1'), product('shoe-2')])
+    reconciler.store.close()
+
+    store = FingerprintStore(path)
+    assert len(store) == 2
+    assert store.get('shoe-1') == fingerprint(product('shoe-1'))
+    assert store.get('shoe-3') is None
+    report = AkeneoReconciler(store=store, sink=lambda batch: []).reconcile([product('shoe-1'), product('shoe-2', name='Boot')])
+    assert (report.unchanged, report.changed) == (1, 1)
+    store.close()
+
+
+def test_normalized_values_are_equal():
+    assert digest({'amount': '1.2500', 'unit': 'GRAM'}) == digest({'amount': 1.25, 'unit': 'GRAM'})
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from akeneo_connector.akeneo_resilience import CircuitBreakerTransport, CircuitOpenError, HedgedTransport
+from akeneo_connector.akeneo_transport import MemoryTransport
+
+
+PRODUCT_URL = 'http://akeneo.test/api/rest/v1/products/shoe-1'
+FAMILY_URL = 'http://akeneo.test/api/rest/v1/families/shoes'
+
+
+def test_circuit_opens_after_consecutive_failures():
+    status = {'products': 503}
+    memory = MemoryTransport(lambda method, url, headers, body: (status.get(url.split('/')[-2], 200), {}))
+    breaker = CircuitBreakerTransport(memory, failure_threshold=3, reset_timeout=0.1)
+
+    for _ in range(3):
+        assert breaker.request('GET', PRODUCT_URL).status_code == 503
+    assert breaker.state('products/{code}') == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.request('GET', PRODUCT_URL)
+    assert len(memory.requests) == 3
+    assert breaker.rejected == 1
+
+    # Other endpoints have their own circuit
+    assert breaker.request('GET', FAMILY_URL).status_code == 200
+
+    # A failed trial opens the circuit again, a successful one closes it
+    time.sleep(0.12)
+    assert breaker.state('products/{code}') == 'half_open'
+    assert breaker.request('GET', PRODUCT_URL).status_code == 503
+    assert breaker.state('products/{code}') == 'open'
+
+    time.sleep(0.12)
+    status.clear()
+    assert breaker.request('GET', PRODUCT_URL).status_code == 200
+    assert breaker.state('products/{code}') == 'closed'
+
+
+def test_circuit_counts_transport_errors():
+    def handler(method, url, headers, body):
+        raise ConnectionError('refused')
+
+    breaker = CircuitBreakerTransport(MemoryTransport(handler), failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.request('GET', PRODUCT_URL)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.request('GET', PRODUCT_URL)
+    assert error.value.endpoint == 'products/{code}'
+
+
+def slow_first(delay: float):
+    lock = threading.Lock()
+    calls = []
+
+    def handler(method, url, headers, body):
+        with lock:
+            calls.append(method)
+            first = len(calls) == 1
+        if first:
+            time.sleep(delay)
+        return 200, {'call': len(calls)}
+    return handler, calls
+
+
+def test_hedged_request_returns_the_faster_answer():
+    handler, calls = slow_first(1.0)
+    hedged = HedgedTransport(MemoryTransport(handler), delay=0.05, budget=1.0)
+    started = time.perf_counter()
+    response = hedged.request('GET', PRODUCT_URL)
+    assert time.perf_counter() - started < 0.5
+    assert response.status_code == 200
+    assert (hedged.requests, hedged.hedged, hedged.hedge_wins) == (1, 1, 1)
+    hedged.close()
+
+
+def test_hedging_is_limited_to_gets_and_the_budget():
+    handler, calls = slow_first(0.2)
+    hedged = HedgedTransport(MemoryTransport(handler), delay=0.05, budget=1.0)
+    assert hedged.request('PATCH', PRODUCT_URL).status_code == 200
+    assert calls == ['PATCH']
+    hedged.close()
+
+    handler, calls = slow_first(0.2)
+    hedged = HedgedTransport(MemoryTransport(handler), delay=0.05, budget=0.0)
+    assert hedged.request('GET', PRODUCT_URL).status_code == 200
+    assert len(calls) == 1
+    assert hedged.hedged == 0
+    hedged.close()
+
+
+def test_hedge_delay_follows_the_latency_percentile():
+    hedged = HedgedTransport(MemoryTransport(lambda *args: (200, {})), initial_delay=0.25, min_samples=20)
+    assert hedged.hedge_delay('products/{code}') == 0.25
+    for _ in range(20):
+        hedged.request('GET', PRODUCT_URL)
+    assert hedged.hedge_delay('products/{code}') < 0.25
+    assert hedged.hedged == 0
+    hedged.close()
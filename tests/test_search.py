@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from akeneo_connector.akeneo_search import AkeneoSearch, validate_codes
+
+
+def test_search_builds_conditions():
+    search = AkeneoSearch().add('family', 'IN', ['shoes']).add('updated', '>', '2024-01-01 00:00:00')
+    search.add('name', 'CONTAINS', 'boot', locale='en_US').add('description', 'EMPTY', scope='ecommerce')
+    assert search.to_dict() == {
+        'family': [{'operator': 'IN', 'value': ['shoes']}],
+        'updated': [{'operator': '>', 'value': '2024-01-01 00:00:00'}],
+        'name': [{'operator': 'CONTAINS', 'value': 'boot', 'locale': 'en_US'}],
+        'description': [{'operator': 'EMPTY', 'scope': 'ecommerce'}],
+    }
+    assert json.loads(search.to_json()) == search.to_dict()
+
+
+def test_merge_combines_conditions():
+    merged = AkeneoSearch().add('enabled', '=', True).merge({'enabled': [{'operator': '!=', 'value': False}]})
+    assert [condition['operator'] for condition in merged.filters['enabled']] == ['=', '!=']
+
+
+@pytest.mark.parametrize('filters', [
+    [],
+    {'fam ily': [{'operator': 'IN', 'value': ['shoes']}]},
+    {'family': []},
+    {'family': ['IN']},
+    {'family': [{'operator': 'LIKE', 'value': 'shoes'}]},
+    {'family': [{'operator': 'IN'}]},
+    {'family': [{'operator': 'IN', 'value': 'shoes'}]},
+    {'updated': [{'operator': 'BETWEEN', 'value': '2024-01-01'}]},
+])
+def test_invalid_filters_are_rejected(filters):
+    with pytest.raises(ValueError):
+        AkeneoSearch(filters)
+
+
+def test_validate_codes():
+    assert validate_codes('attributes', 'name, color') == ['name', 'color']
+    assert validate_codes('locales', None) is None
+    with pytest.raises(ValueError):
+        validate_codes('attributes', ['name', 'bad code'])
+    with pytest.raises(ValueError):
+        validate_codes('attributes', [])
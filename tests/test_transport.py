@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from akeneo_connector import AkeneoConnector, AkeneoPaginator
+from akeneo_connector.akeneo_json import collection_results
+from akeneo_connector.akeneo_transport import MemoryTransport, RecordReplayTransport
+
+
+def connector_options(transport) -> dict:
+    return {
+        'origin': 'akeneo.test',
+        'scheme': 'http',
+        'username': 'user',
+        'password': 'secret-password',
+        'auth_token': 'client:secret',
+        'auth_url': 'http://akeneo.test/api/oauth/v1/token',
+        'transport': transport,
+        'log_requests': False,
+    }
+
+
+def test_record_replay_keeps_tokens_out_of_the_recording(tmp_path):
+    path = str(tmp_path / 'traffic.json')
+    memory = MemoryTransport(access_token='live-secret-token')
+    recorder = RecordReplayTransport(path, mode='record', transport=memory)
+    with AkeneoConnector(**connector_options(recorder)) as connector:
+        memory.add('GET', connector.product_url.format(identifier='shoe-1'), {'identifier': 'shoe-1'})
+        assert connector.get(connector.product_url.format(identifier='shoe-1'))['identifier'] == 'shoe-1'
+
+    with open(path, encoding='utf-8') as file:
+        recording = file.read()
+    assert 'live-secret-token' not in recording
+    assert 'secret-password' not in recording
+    assert [interaction['method'] for interaction in json.loads(recording)['interactions']] == ['GET']
+
+    with AkeneoConnector(**connector_options(RecordReplayTransport(path, mode='replay'))) as connector:
+        assert connector.get(connector.product_url.format(identifier='shoe-1'))['identifier'] == 'shoe-1'
+
+
+def test_http2_transport_falls_back_to_http1(mock_server):
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    from akeneo_connector.akeneo_parallel import map_products
+    from akeneo_connector.akeneo_transport import Http2Transport
+
+    # The mock only speaks HTTP/1.1, so the offer of HTTP/2 is not taken up
+    transport = Http2Transport(max_connections=4)
+    with AkeneoConnector(**mock_server.connector_options(), transport=transport, log_requests=False) as connector:
+        products = list(AkeneoPaginator(connector.products_url, page_size=100, connector=connector, stream=True))
+        assert len(products) == 1000
+
+        results = map_products(lambda product: product.family, [f"{index:08d}" for index in range(20)], workers=4, connector=connector)
+        assert [result.value for result in results] == [('shoes', 'shirts', 'bags')[index % 3] for index in range(20)]
+
+        response = connector.update(connector.products_url, [{'identifier': '00000001'}, {'identifier': 'new'}])
+        assert [line['status_code'] for line in collection_results(response)] == [204, 201]
+
+    assert set(transport.versions) == {'HTTP/1.1'}
+    assert sum(transport.versions.values()) >= 10 + 20 + 1
@@ -0,0 +1,54 @@
+import math
+
+import pytest
+
+from akeneo_connector.akeneo_units import convert_amount, normalize_amounts, normalize_metrics
+
+
+def test_convert_amount_between_units():
+    assert convert_amount('500.0000', 'GRAM') == pytest.approx(0.5)
+    assert convert_amount(1, 'POUND', 'OUNCE') == pytest.approx(16)
+    assert convert_amount('2', 'KILOGRAM', 'GRAM') == pytest.approx(2000)
+    assert convert_amount(12, 'INCH', 'FOOT') == pytest.approx(1)
+    assert convert_amount(1, 'GALLON', 'MILLILITER') == pytest.approx(3785.411784)
+    assert convert_amount(3, 'DOZEN') == pytest.approx(36)
+
+
+@pytest.mark.parametrize('unit, to_unit', [('GRAM', 'METER'), ('LITER', 'PIECE'), ('BOX', None), ('GRAM', 'BOX')])
+def test_convert_amount_rejects_other_families(unit, to_unit):
+    with pytest.raises(ValueError):
+        convert_amount(1, unit, to_unit)
+
+
+def test_normalize_amounts():
+    numpy = pytest.importorskip('numpy')
+    converted = normalize_amounts(['500', 2, '1.5', 1, 4], ['GRAM', 'KILOGRAM', 'METER', 'BOX', 'POUND'], to_unit='GRAM')
+    assert numpy.allclose(converted[[0, 1, 4]], [500, 2000, 1814.36948])
+
+    # Other families and unknown units cannot be converted
+    assert math.isnan(converted[2]) and math.isnan(converted[3])
+
+    # Without a unit, every amount is converted to the standard unit of its own family
+    converted = normalize_amounts([250, 30], ['GRAM', 'CENTIMETER'])
+    assert numpy.allclose(converted, [0.25, 0.3])
+
+
+def test_normalize_amounts_rejects_invalid_input():
+    pytest.importorskip('numpy')
+    with pytest.raises(ValueError, match='2 amounts for 3 units'):
+        normalize_amounts([1, 2], ['GRAM', 'GRAM', 'GRAM'])
+    with pytest.raises(ValueError):
+        normalize_amounts([1], ['GRAM'], to_unit='BOX')
+
+
+def test_normalize_metrics_with_missing_values():
+    numpy = pytest.importorskip('numpy')
+    converted = normalize_metrics([
+        {'amount': '500.0000', 'unit': 'GRAM'},
+        None,
+        {'amount': None, 'unit': 'GRAM'},
+        {'amount': '1', 'unit': 'UNKNOWN'},
+        {'amount': '1.2', 'unit': 'KILOGRAM'},
+    ])
+    assert numpy.allclose(converted[[0, 4]], [0.5, 1.2])
+    assert numpy.isnan(converted[1:4]).all()
@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+
+from akeneo_connector.akeneo_writer import AkeneoBulkWriter
+
+
+def collection(body: bytes, status=lambda payload: 204) -> tuple:
+    lines = []
+    for number, line in enumerate(body.splitlines(), 1):
+        payload = json.loads(line)
+        lines.append({'line': number, 'identifier': payload['identifier'], 'status_code': status(payload)})
+    return 200, '\n'.join(json.dumps(line) for line in lines)
+
+
+def test_failed_lines_are_dead_lettered_and_replayed(tmp_path, memory_connector):
+    fixed = set()
+    written = []
+
+    def handler(method, url, headers, body):
+        def status(payload):
+            if payload.get('bad') and payload['identifier'] not in fixed:
+                return 422
+            written.append(payload['identifier'])
+            return 204
+        return collection(body, status)
+
+    memory_connector.transport.handler = handler
+    dead_letter = tmp_path / 'dead.jsonl'
+    writer = AkeneoBulkWriter(memory_connector, dead_letter=str(dead_letter), batch_size=10)
+    stats = writer.write({'identifier': str(i), 'bad': i % 7 == 0} for i in range(50))
+    assert stats['written'] == 42
+    assert stats['failed'] == 8
+
+    entries = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+    assert sorted(entry['payload']['identifier'] for entry in entries) == sorted(str(i) for i in range(0, 50, 7))
+    assert {entry['status_code'] for entry in entries} == {422}
+
+    fixed.update(str(i) for i in range(0, 50, 7))
+    assert writer.replay()['written'] == 50
+    assert not dead_letter.exists()
+    assert not (tmp_path / 'dead.jsonl.replay').exists()
+    assert sorted(written) == sorted(str(i) for i in range(50))
+
+
+def test_replay_keeps_an_interrupted_replay(tmp_path, memory_connector):
+    written = []
+
+    def handler(method, url, headers, body):
+        written.extend(json.loads(line)['identifier'] for line in body.splitlines())
+        return collection(body)
+
+    memory_connector.transport.handler = handler
+    dead_letter = tmp_path / 'dead.jsonl'
+    entry = lambda identifier: json.dumps({'payload': {'identifier': identifier}}) + '\n'
+    (tmp_path / 'dead.jsonl.replay').write_text(entry('left-over'))
+    dead_letter.write_text(entry('new'))
+
+    writer = AkeneoBulkWriter(memory_connector, dead_letter=str(dead_letter))
+    assert writer.replay()['written'] == 2
+    assert sorted(written) == ['left-over', 'new']
+    assert not (tmp_path / 'dead.jsonl.replay').exists()
+
+
+def test_retryable_lines_are_sent_again(memory_connector):
+    attempts = {}
+
+    def handler(method, url, headers, body):
+        def status(payload):
+            attempts[payload['identifier']] = attempts.get(payload['identifier'], 0) + 1
+            return 503 if payload['identifier'] == '3' and attempts['3'] < 3 else 204
+        return collection(body, status)
+
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, backoff=0.001)
+    stats = writer.write({'identifier': str(i)} for i in range(5))
+    assert stats['written'] == 5
+    assert stats['retried'] == 2
+    assert attempts['3'] == 3
+    assert writer.failures == []
+
+
+def test_byte_budget_recovers_after_413(memory_connector):
+    limit = [2000]
+
+    def handler(method, url, headers, body):
+        if len(body) > limit[0]:
+            return 413, {'code': 413, 'message': 'Request Entity Too Large'}
+        return collection(body)
+
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, batch_size=100, max_bytes=8000)
+    payloads = [{'identifier': str(i), 'data': 'x' * 80} for i in range(600)]
+    assert writer.write(payloads[:100])['written'] == 100
+    assert writer.stats['too_large'] > 0
+    assert writer.max_bytes < 8000
+
+    # The server accepts large bodies again: the budget grows back to its limit
+    limit[0] = 10 ** 6
+    writer.write(payloads[100:])
+    assert writer.max_bytes == 8000
+    assert writer.stats['written'] == 600
+
+
+def test_backoff_does_not_block_producers(memory_connector):
+    def handler(method, url, headers, body):
+        if not handler.throttled:
+            handler.throttled = True
+            return 429, {'code': 429}, {'Retry-After': '1'}
+        return collection(body)
+    handler.throttled = False
+
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, batch_size=1)
+    sender = threading.Thread(target=writer.add, args=({'identifier': 'first'},))
+    sender.start()
+    while not handler.throttled:
+        time.sleep(0.01)
+
+    # The lock is not held while the other thread waits out the backoff
+    assert writer.lock.acquire(timeout=0.5)
+    writer.lock.release()
+    assert sender.is_alive()
+
+    sender.join()
+    assert writer.flush()['written'] == 1
+
+
+def test_requests_do_not_block_producers(memory_connector):
+    sending = threading.Event()
+    release = threading.Event()
+
+    def handler(method, url, headers, body):
+        sending.set()
+        release.wait(5)
+        return collection(body)
+
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, batch_size=2)
+    sender = threading.Thread(target=lambda: [writer.add({'identifier': str(i)}) for i in range(2)])
+    sender.start()
+    assert sending.wait(5)
+
+    # Queuing while the other thread waits for its response
+    started = time.perf_counter()
+    writer.add({'identifier': 'queued'})
+    assert time.perf_counter() - started < 0.5
+
+    release.set()
+    sender.join()
+    assert writer.flush()['written'] == 3
+
+
+def test_batches_survive_invalid_responses_and_errors(memory_connector):
+    calls = []
+
+    def handler(method, url, headers, body):
+        calls.append(body)
+        if len(calls) == 1:
+            return 200, 'not json'
+        if len(calls) == 2:
+            raise RuntimeError('circuit open')
+        return collection(body)
+
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, backoff=0.001)
+    stats = writer.write({'identifier': str(i)} for i in range(3))
+    assert stats['written'] == 3
+    assert stats['retried'] == 6
+    assert len(calls) == 3
+
+
+def test_errors_are_dead_lettered_after_max_attempts(memory_connector):
+    def handler(method, url, headers, body):
+        raise RuntimeError('circuit open')
+
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, max_attempts=2, backoff=0.001)
+    assert writer.write([{'identifier': 'shoe-1'}])['failed'] == 1
+    assert writer.failures[0]['payload'] == {'identifier': 'shoe-1'}
+    assert 'circuit open' in writer.failures[0]['message']
+
+
+def test_throttling_shrinks_batches_despite_connector_retries(memory_connector):
+    calls = []
+
+    def handler(method, url, headers, body):
+        calls.append(body.count(b'\n') + 1)
+        if len(calls) == 1:
+            return 429, {'code': 429}, {'Retry-After': '0'}
+        return collection(body)
+
+    memory_connector.retries = 3
+    memory_connector.transport.handler = handler
+    writer = AkeneoBulkWriter(memory_connector, batch_size=8)
+    assert writer.write({'identifier': str(i)} for i in range(8))['throttled'] == 1
+    assert calls[:2] == [8, 4]